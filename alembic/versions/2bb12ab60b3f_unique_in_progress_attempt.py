@@ -0,0 +1,50 @@
+"""unique in-progress attempt per user and test
+
+Revision ID: 2bb12ab60b3f
+Revises: ca64a39bb2ec
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2bb12ab60b3f'
+down_revision: Union[str, Sequence[str], None] = 'ca64a39bb2ec'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Дубликаты, накопленные повторными запросами start: оставляем самую раннюю
+    # незавершенную попытку, остальные помечаем брошенными
+    op.execute("""
+        UPDATE test_attempts SET status = 'abandoned'
+        WHERE status = 'in_progress'
+          AND id IN (
+              SELECT id FROM (
+                  SELECT id, row_number() OVER (
+                      PARTITION BY user_id, test_id ORDER BY started_at, id
+                  ) AS rn
+                  FROM test_attempts
+                  WHERE status = 'in_progress'
+              ) ranked
+              WHERE ranked.rn > 1
+          )
+    """)
+    op.create_index(
+        'uq_test_attempts_user_test_in_progress',
+        'test_attempts',
+        ['user_id', 'test_id'],
+        unique=True,
+        postgresql_where=sa.text("status = 'in_progress'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_test_attempts_user_test_in_progress', table_name='test_attempts')
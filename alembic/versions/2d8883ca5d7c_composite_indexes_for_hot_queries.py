@@ -0,0 +1,52 @@
+"""composite indexes for hot queries
+
+Revision ID: 2d8883ca5d7c
+Revises: 7144a4a12ae6
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d8883ca5d7c'
+down_revision: Union[str, Sequence[str], None] = '7144a4a12ae6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (имя, таблица, колонки)
+NEW_INDEXES = [
+    ('ix_tests_created_at', 'tests', ['created_at']),
+    ('ix_tests_is_active_created_at', 'tests', ['is_active', 'created_at']),
+    ('ix_questions_test_id_order_index', 'questions', ['test_id', 'order_index']),
+    ('ix_test_attempts_user_test_status', 'test_attempts', ['user_id', 'test_id', 'status']),
+]
+
+# Одиночные индексы, которые стали префиксом составных; могли быть созданы
+# через create_all, поэтому удаляются с IF EXISTS
+REDUNDANT_INDEXES = [
+    ('ix_questions_test_id', 'questions', ['test_id']),
+    ('ix_test_attempts_user_id', 'test_attempts', ['user_id']),
+    ('ix_user_answers_attempt_id', 'user_answers', ['attempt_id']),  # покрыт uq_user_answers_attempt_question
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY не блокирует запись, но не работает в транзакции
+    with op.get_context().autocommit_block():
+        for name, table, columns in NEW_INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+        for name, table, _ in REDUNDANT_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns in REDUNDANT_INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+        for name, table, _ in NEW_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
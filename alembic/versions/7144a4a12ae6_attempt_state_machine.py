@@ -0,0 +1,70 @@
+"""attempt state machine: version column, paused state, unique answers
+
+Revision ID: 7144a4a12ae6
+Revises: 2bb12ab60b3f
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7144a4a12ae6'
+down_revision: Union[str, Sequence[str], None] = '2bb12ab60b3f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('test_attempts', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+    op.add_column('test_attempts', sa.Column('paused_at', sa.DateTime(), nullable=True))
+    op.add_column('test_attempts', sa.Column('paused_seconds', sa.Integer(), nullable=False, server_default='0'))
+
+    # Незавершенной считается и приостановленная попытка
+    op.drop_index('uq_test_attempts_user_test_in_progress', table_name='test_attempts')
+    op.create_index(
+        'uq_test_attempts_user_test_active',
+        'test_attempts',
+        ['user_id', 'test_id'],
+        unique=True,
+        postgresql_where=sa.text("status IN ('in_progress', 'paused')"),
+    )
+
+    # Дубликаты ответов от двойных кликов: оставляем самый ранний
+    op.execute("""
+        DELETE FROM user_answers
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY attempt_id, question_id ORDER BY answered_at, id
+                ) AS rn
+                FROM user_answers
+            ) ranked
+            WHERE ranked.rn > 1
+        )
+    """)
+    op.create_unique_constraint(
+        'uq_user_answers_attempt_question', 'user_answers', ['attempt_id', 'question_id']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_user_answers_attempt_question', 'user_answers', type_='unique')
+    op.drop_index('uq_test_attempts_user_test_active', table_name='test_attempts')
+    op.execute("UPDATE test_attempts SET status = 'in_progress' WHERE status = 'paused'")
+    op.execute("UPDATE test_attempts SET status = 'abandoned' WHERE status = 'expired'")
+    op.create_index(
+        'uq_test_attempts_user_test_in_progress',
+        'test_attempts',
+        ['user_id', 'test_id'],
+        unique=True,
+        postgresql_where=sa.text("status = 'in_progress'"),
+    )
+    op.drop_column('test_attempts', 'paused_seconds')
+    op.drop_column('test_attempts', 'paused_at')
+    op.drop_column('test_attempts', 'version')
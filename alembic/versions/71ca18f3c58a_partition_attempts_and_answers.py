@@ -0,0 +1,218 @@
+"""partition test_attempts and user_answers by month
+
+Revision ID: 71ca18f3c58a
+Revises: 2d8883ca5d7c
+Create Date: 2026-10-19 18:00:00.000000
+
+Обе таблицы пересоздаются секционированными RANGE по UUIDv7 попытки
+(test_attempts.id, user_answers.attempt_id), секции помесячные. Старые id
+попыток случайные (uuid4) и в секции по времени не попадают, поэтому
+такие попытки получают новые id: UUIDv7 от started_at плюс хеш старого id
+(детерминированно). Id, уже имеющие версию 7, не меняются. Соответствие
+остается в таблице attempt_id_aliases: по ней переносятся ответы, API
+принимает старые id (app/api/dependencies.py: resolve_attempt_id), а откат
+возвращает попыткам прежние id.
+
+Частичный уникальный индекс незавершенных попыток на секционированной
+таблице невозможен (он обязан включать ключ секционирования) и заменен
+таблицей active_attempts.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '71ca18f3c58a'
+down_revision: Union[str, Sequence[str], None] = '2d8883ca5d7c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ATTEMPT_COLUMNS = (
+    "user_id, test_id, started_at, completed_at, score, max_score, status, version, paused_at, paused_seconds"
+)
+ANSWER_COLUMNS = "question_id, selected_options, text_answer, is_correct, points_earned, answered_at"
+
+# Граница секции: миллисекунды начала месяца в старших 48 битах UUID
+_BOUND = "lpad(to_hex((extract(epoch FROM {0}) * 1000)::bigint), 12, '0') || '00000000000000000000'"
+
+CREATE_PARTITIONS = f"""
+DO $$
+DECLARE
+    m date;
+BEGIN
+    FOR m IN
+        SELECT generate_series(
+            date_trunc('month', coalesce((SELECT min(started_at) FROM test_attempts_old), now())),
+            date_trunc('month', now()) + interval '3 months',
+            interval '1 month'
+        )::date
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF test_attempts FOR VALUES FROM (%L) TO (%L)',
+            'test_attempts_y' || to_char(m, 'YYYY') || 'm' || to_char(m, 'MM'),
+            {_BOUND.format("m::timestamp")},
+            {_BOUND.format("(m + interval '1 month')::timestamp")}
+        );
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF user_answers FOR VALUES FROM (%L) TO (%L)',
+            'user_answers_y' || to_char(m, 'YYYY') || 'm' || to_char(m, 'MM'),
+            {_BOUND.format("m::timestamp")},
+            {_BOUND.format("(m + interval '1 month')::timestamp")}
+        );
+    END LOOP;
+END $$;
+"""
+
+
+def _rename_indexes(table: str) -> None:
+    """Индексы старой таблицы переименовываются, чтобы освободить имена"""
+    op.execute(f"""
+        DO $$
+        DECLARE
+            name text;
+        BEGIN
+            FOR name IN SELECT indexname FROM pg_indexes WHERE tablename = '{table}' LOOP
+                EXECUTE format('ALTER INDEX %I RENAME TO %I', name, left(name, 55) || '_old');
+            END LOOP;
+        END $$;
+    """)
+
+
+def _create_attempts_table(**kw) -> None:
+    op.create_table(
+        'test_attempts',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('test_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('tests.id'), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.Column('score', sa.Integer(), nullable=True),
+        sa.Column('max_score', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('version', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('paused_at', sa.DateTime(), nullable=True),
+        sa.Column('paused_seconds', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('id'),
+        **kw,
+    )
+    op.create_index('ix_test_attempts_test_id', 'test_attempts', ['test_id'])
+    op.create_index('ix_test_attempts_user_test_status', 'test_attempts', ['user_id', 'test_id', 'status'])
+
+
+def _create_answers_table(primary_key: Sequence[str], **kw) -> None:
+    op.create_table(
+        'user_answers',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('attempt_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('test_attempts.id'), nullable=False),
+        sa.Column('question_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('questions.id'), nullable=False),
+        sa.Column('selected_options', sa.JSON(), nullable=True),
+        sa.Column('text_answer', sa.Text(), nullable=True),
+        sa.Column('is_correct', sa.Boolean(), nullable=True),
+        sa.Column('points_earned', sa.Integer(), nullable=True),
+        sa.Column('answered_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint(*primary_key),
+        sa.UniqueConstraint('attempt_id', 'question_id', name='uq_user_answers_attempt_question'),
+        **kw,
+    )
+    op.create_index('ix_user_answers_question_id', 'user_answers', ['question_id'])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.rename_table('user_answers', 'user_answers_old')
+    op.rename_table('test_attempts', 'test_attempts_old')
+    _rename_indexes('user_answers_old')
+    _rename_indexes('test_attempts_old')
+
+    _create_attempts_table(postgresql_partition_by='RANGE (id)')
+    _create_answers_table(['id', 'attempt_id'], postgresql_partition_by='RANGE (attempt_id)')
+    op.execute(CREATE_PARTITIONS)
+
+    op.create_table(
+        'active_attempts',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('test_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('tests.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('attempt_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.PrimaryKeyConstraint('user_id', 'test_id'),
+        sa.UniqueConstraint('attempt_id'),
+        sa.ForeignKeyConstraint(
+            ['attempt_id'], ['test_attempts.id'], ondelete='CASCADE', deferrable=True, initially='DEFERRED'
+        ),
+    )
+
+    # Новые id для не-UUIDv7: UUIDv7 от started_at, хвост - хеш старого id.
+    # Внешних ключей нет: попытка может уйти в архив, а старый id остаться в ссылках
+    op.create_table(
+        'attempt_id_aliases',
+        sa.Column('old_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('new_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.PrimaryKeyConstraint('old_id'),
+        sa.UniqueConstraint('new_id'),
+    )
+    op.execute("""
+        INSERT INTO attempt_id_aliases (old_id, new_id)
+        SELECT id,
+               (lpad(to_hex((extract(epoch FROM started_at) * 1000)::bigint), 12, '0')
+                || '7' || substr(md5(id::text), 1, 3)
+                || 'a' || substr(md5(id::text), 4, 15))::uuid
+        FROM test_attempts_old
+        WHERE substr(id::text, 15, 1) <> '7'
+    """)
+    op.execute(f"""
+        INSERT INTO test_attempts (id, {ATTEMPT_COLUMNS})
+        SELECT coalesce(m.new_id, o.id), {', '.join('o.' + c.strip() for c in ATTEMPT_COLUMNS.split(','))}
+        FROM test_attempts_old o LEFT JOIN attempt_id_aliases m ON m.old_id = o.id
+    """)
+    op.execute(f"""
+        INSERT INTO user_answers (id, attempt_id, {ANSWER_COLUMNS})
+        SELECT a.id, coalesce(m.new_id, a.attempt_id), {', '.join('a.' + c.strip() for c in ANSWER_COLUMNS.split(','))}
+        FROM user_answers_old a LEFT JOIN attempt_id_aliases m ON m.old_id = a.attempt_id
+    """)
+    op.execute("""
+        INSERT INTO active_attempts (user_id, test_id, attempt_id)
+        SELECT DISTINCT ON (user_id, test_id) user_id, test_id, id
+        FROM test_attempts
+        WHERE status IN ('in_progress', 'paused')
+        ORDER BY user_id, test_id, started_at DESC
+    """)
+
+    op.drop_table('user_answers_old')
+    op.drop_table('test_attempts_old')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('active_attempts')
+    op.rename_table('user_answers', 'user_answers_old')
+    op.rename_table('test_attempts', 'test_attempts_old')
+    _rename_indexes('user_answers_old')
+    _rename_indexes('test_attempts_old')
+
+    # Перенумерованные попытки получают прежние id, созданные позже остаются UUIDv7
+    _create_attempts_table()
+    _create_answers_table(['id'])
+    op.execute(f"""
+        INSERT INTO test_attempts (id, {ATTEMPT_COLUMNS})
+        SELECT coalesce(m.old_id, o.id), {', '.join('o.' + c.strip() for c in ATTEMPT_COLUMNS.split(','))}
+        FROM test_attempts_old o LEFT JOIN attempt_id_aliases m ON m.new_id = o.id
+    """)
+    op.execute(f"""
+        INSERT INTO user_answers (id, attempt_id, {ANSWER_COLUMNS})
+        SELECT a.id, coalesce(m.old_id, a.attempt_id), {', '.join('a.' + c.strip() for c in ANSWER_COLUMNS.split(','))}
+        FROM user_answers_old a LEFT JOIN attempt_id_aliases m ON m.new_id = a.attempt_id
+    """)
+    op.drop_table('attempt_id_aliases')
+    op.create_index(
+        'uq_test_attempts_user_test_active',
+        'test_attempts',
+        ['user_id', 'test_id'],
+        unique=True,
+        postgresql_where=sa.text("status IN ('in_progress', 'paused')"),
+    )
+
+    # Удаление родителя удаляет и все секции
+    op.drop_table('user_answers_old')
+    op.drop_table('test_attempts_old')
@@ -0,0 +1,37 @@
+"""user role, name and token_version
+
+Revision ID: 8c41e6a2f90b
+Revises: 5e0d7b9a2c61
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c41e6a2f90b'
+down_revision: Union[str, Sequence[str], None] = '5e0d7b9a2c61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Модель давно использует role и name, а в базе оставались is_admin и без name
+    op.add_column('users', sa.Column('name', sa.String(length=255), nullable=True))
+    op.add_column('users', sa.Column('role', sa.String(length=20), nullable=False, server_default='student'))
+    op.add_column('users', sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+    op.execute("UPDATE users SET role = 'admin' WHERE is_admin")
+    op.drop_column('users', 'is_admin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('users', sa.Column('is_admin', sa.Boolean(), nullable=True))
+    op.execute("UPDATE users SET is_admin = (role = 'admin')")
+    op.drop_column('users', 'token_version')
+    op.drop_column('users', 'role')
+    op.drop_column('users', 'name')
@@ -0,0 +1,97 @@
+"""question bank
+
+Revision ID: a7c2e9d4b618
+Revises: f3b8d2c5a914
+Create Date: 2026-10-23 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c2e9d4b618'
+down_revision: Union[str, Sequence[str], None] = 'f3b8d2c5a914'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _normalized(expression: str) -> str:
+    # Как question_bank.normalize: NFC, пробелы схлопнуты, края обрезаны
+    return rf"btrim(regexp_replace(normalize({expression}, NFC), '\s+', ' ', 'g'))"
+
+
+# Ключ question_bank.content_hash: тип, текст, число вариантов и варианты
+CONTENT_HASH = f"""
+    encode(sha256(convert_to(
+        coalesce(q.question_type, 'multiple_choice')
+        || chr(31) || {_normalized('q.question_text')}
+        || chr(31) || CASE WHEN json_typeof(q.options) = 'array' THEN json_array_length(q.options) ELSE 0 END
+        || chr(31) || coalesce((
+            SELECT string_agg({_normalized('o.value')}, chr(30) ORDER BY o.n)
+            FROM json_array_elements_text(CASE WHEN json_typeof(q.options) = 'array' THEN q.options END)
+                WITH ORDINALITY o(value, n)
+        ), ''),
+    'UTF8')), 'hex')
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'question_bank',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('question_text', sa.Text(), nullable=False),
+        sa.Column('options', sa.JSON(), nullable=True),
+        sa.Column('question_type', sa.String(length=50), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('content_hash', name='uq_question_bank_content_hash'),
+    )
+    op.add_column('questions', sa.Column('bank_question_id', postgresql.UUID(as_uuid=True), nullable=True))
+
+    # Хеш считается один раз на строку; текст банка - от любого из совпавших
+    # вопросов (они различаются разве что пробелами)
+    op.execute(f"CREATE TEMPORARY TABLE question_hashes ON COMMIT DROP AS SELECT q.id, {CONTENT_HASH} AS content_hash FROM questions q")
+    op.execute("""
+        INSERT INTO question_bank (id, content_hash, question_text, options, question_type, created_at)
+        SELECT DISTINCT ON (h.content_hash)
+               gen_random_uuid(), h.content_hash, q.question_text, q.options,
+               coalesce(q.question_type, 'multiple_choice'), now()
+        FROM question_hashes h JOIN questions q ON q.id = h.id
+        ORDER BY h.content_hash, q.id
+    """)
+    op.execute("""
+        UPDATE questions SET bank_question_id = b.id
+        FROM question_hashes h JOIN question_bank b ON b.content_hash = h.content_hash
+        WHERE h.id = questions.id
+    """)
+
+    op.alter_column('questions', 'bank_question_id', nullable=False)
+    op.create_foreign_key(
+        'questions_bank_question_id_fkey', 'questions', 'question_bank', ['bank_question_id'], ['id']
+    )
+    op.create_index('ix_questions_bank_question_id', 'questions', ['bank_question_id'])
+    op.drop_column('questions', 'question_text')
+    op.drop_column('questions', 'options')
+    op.drop_column('questions', 'question_type')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('questions', sa.Column('question_text', sa.Text(), nullable=True))
+    op.add_column('questions', sa.Column('options', sa.JSON(), nullable=True))
+    op.add_column('questions', sa.Column('question_type', sa.String(length=50), nullable=True))
+    op.execute("""
+        UPDATE questions SET question_text = b.question_text, options = b.options, question_type = b.question_type
+        FROM question_bank b WHERE b.id = questions.bank_question_id
+    """)
+    op.alter_column('questions', 'question_text', nullable=False)
+    op.drop_index('ix_questions_bank_question_id', table_name='questions')
+    op.drop_constraint('questions_bank_question_id_fkey', 'questions', type_='foreignkey')
+    op.drop_column('questions', 'bank_question_id')
+    op.drop_table('question_bank')
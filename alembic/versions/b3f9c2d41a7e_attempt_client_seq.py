@@ -0,0 +1,29 @@
+"""attempt client_seq for answer sync
+
+Revision ID: b3f9c2d41a7e
+Revises: 71ca18f3c58a
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f9c2d41a7e'
+down_revision: Union[str, Sequence[str], None] = '71ca18f3c58a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Значение по умолчанию константное: столбец добавляется без перезаписи секций
+    op.add_column('test_attempts', sa.Column('client_seq', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('test_attempts', 'client_seq')
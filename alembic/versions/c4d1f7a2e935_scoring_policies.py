@@ -0,0 +1,61 @@
+"""scoring policies
+
+Revision ID: c4d1f7a2e935
+Revises: a7c2e9d4b618
+Create Date: 2026-10-24 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d1f7a2e935'
+down_revision: Union[str, Sequence[str], None] = 'a7c2e9d4b618'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Существующие тесты и версии оценивались "все или ничего"
+    op.add_column('tests', sa.Column(
+        'scoring_policy', sa.String(length=20), nullable=False, server_default='all_or_nothing'
+    ))
+    op.add_column('test_versions', sa.Column(
+        'scoring_policy', sa.String(length=20), nullable=False, server_default='all_or_nothing'
+    ))
+    # Версии неизменяемы: сумма весов считается один раз, а не при каждом завершении
+    op.add_column('test_versions', sa.Column('max_score', sa.Integer(), nullable=False, server_default='0'))
+    op.execute("""
+        UPDATE test_versions SET max_score = q.total
+        FROM (SELECT version_id, coalesce(sum(points), 0) AS total FROM questions GROUP BY version_id) q
+        WHERE q.version_id = test_versions.id
+    """)
+    # Частичные баллы - до сотых. Смена типа переписывает секции целиком:
+    # на большой базе выполнять в окно обслуживания
+    op.alter_column(
+        'user_answers', 'points_earned',
+        type_=sa.Numeric(8, 2), existing_type=sa.Integer(), postgresql_using='points_earned::numeric(8, 2)'
+    )
+    op.alter_column(
+        'test_attempts', 'score',
+        type_=sa.Numeric(10, 2), existing_type=sa.Integer(), postgresql_using='score::numeric(10, 2)'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column(
+        'test_attempts', 'score',
+        type_=sa.Integer(), existing_type=sa.Numeric(10, 2), postgresql_using='round(score)::integer'
+    )
+    op.alter_column(
+        'user_answers', 'points_earned',
+        type_=sa.Integer(), existing_type=sa.Numeric(8, 2), postgresql_using='round(points_earned)::integer'
+    )
+    op.drop_column('test_versions', 'max_score')
+    op.drop_column('test_versions', 'scoring_policy')
+    op.drop_column('tests', 'scoring_policy')
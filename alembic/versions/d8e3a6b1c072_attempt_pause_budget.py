@@ -0,0 +1,35 @@
+"""attempt pause budget
+
+Revision ID: d8e3a6b1c072
+Revises: c4d1f7a2e935
+Create Date: 2026-10-25 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8e3a6b1c072'
+down_revision: Union[str, Sequence[str], None] = 'c4d1f7a2e935'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ('tests', 'test_versions'):
+        op.add_column(table, sa.Column('pause_budget_seconds', sa.Integer(), nullable=False, server_default='600'))
+        op.add_column(table, sa.Column('max_pauses', sa.Integer(), nullable=False, server_default='3'))
+    # Паузы до миграции не считались: начатые попытки получают полный лимит
+    op.add_column('test_attempts', sa.Column('pause_count', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('test_attempts', 'pause_count')
+    for table in ('test_versions', 'tests'):
+        op.drop_column(table, 'max_pauses')
+        op.drop_column(table, 'pause_budget_seconds')
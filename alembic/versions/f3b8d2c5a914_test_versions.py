@@ -0,0 +1,80 @@
+"""test versions
+
+Revision ID: f3b8d2c5a914
+Revises: e6a90c3f1d27
+Create Date: 2026-10-22 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b8d2c5a914'
+down_revision: Union[str, Sequence[str], None] = 'e6a90c3f1d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'test_versions',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('test_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('tests.id'), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.String(length=500), nullable=True),
+        sa.Column('duration', sa.Integer(), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=True),
+        sa.Column('snapshot', sa.LargeBinary(), nullable=True),
+        sa.Column('published_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('test_id', 'version', name='uq_test_versions_test_id_version'),
+    )
+    op.add_column('tests', sa.Column('current_version_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.add_column('questions', sa.Column('version_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.add_column('test_attempts', sa.Column('test_version_id', postgresql.UUID(as_uuid=True), nullable=True))
+
+    # Текущее содержимое каждого теста становится версией 1. Снимок (snapshot)
+    # не заполняется: его соберет первое чтение (app/services/versions.py)
+    op.execute("""
+        INSERT INTO test_versions (id, test_id, version, title, description, duration, published_at)
+        SELECT gen_random_uuid(), id, 1, title, description, duration, created_at FROM tests
+    """)
+    op.execute("UPDATE tests SET current_version_id = v.id FROM test_versions v WHERE v.test_id = tests.id")
+    op.execute("UPDATE questions SET version_id = t.current_version_id FROM tests t WHERE t.id = questions.test_id")
+    op.execute(
+        "UPDATE test_attempts SET test_version_id = t.current_version_id FROM tests t WHERE t.id = test_attempts.test_id"
+    )
+
+    op.alter_column('questions', 'version_id', nullable=False)
+    op.alter_column('test_attempts', 'test_version_id', nullable=False)
+    op.create_foreign_key(
+        'questions_version_id_fkey', 'questions', 'test_versions', ['version_id'], ['id']
+    )
+    op.create_foreign_key(
+        'test_attempts_test_version_id_fkey', 'test_attempts', 'test_versions', ['test_version_id'], ['id']
+    )
+    op.create_index('ix_questions_version_id_order_index', 'questions', ['version_id', 'order_index'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Без версий у теста один набор вопросов: прошлые версии без ответов удаляются,
+    # вопросы с ответами остаются, чтобы не потерять историю попыток
+    op.execute("""
+        DELETE FROM questions q USING tests t
+        WHERE t.id = q.test_id AND q.version_id <> t.current_version_id
+          AND NOT EXISTS (SELECT 1 FROM user_answers a WHERE a.question_id = q.id)
+    """)
+    op.drop_index('ix_questions_version_id_order_index', table_name='questions')
+    op.drop_constraint('test_attempts_test_version_id_fkey', 'test_attempts', type_='foreignkey')
+    op.drop_constraint('questions_version_id_fkey', 'questions', type_='foreignkey')
+    op.drop_column('test_attempts', 'test_version_id')
+    op.drop_column('questions', 'version_id')
+    op.drop_column('tests', 'current_version_id')
+    op.drop_table('test_versions')
@@ -1,14 +1,39 @@
+from uuid import UUID
 from fastapi import Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.db.models.attempt_id_aliases import AttemptIdAlias
 from app.db.models.user import User
-from app.core.auth import get_current_active_user
+from app.db.session import get_db
+from app.schemas.auth import Principal
+from app.core.auth import get_current_active_user, get_current_principal
 
 def get_current_user(current_user: User = Depends(get_current_active_user)) -> User:
     return current_user
 
+def get_current_admin(principal: Principal = Depends(get_current_principal)) -> Principal:
+    """Администратор по claims токена, без загрузки пользователя"""
+    if not principal.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Доступ разрешен только администраторам"
+        )
+    return principal
+
 def get_current_admin_user(current_user: User = Depends(get_current_active_user)) -> User:
-    if not current_user.is_admin:
+    if current_user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Доступ разрешен только администраторам"
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+def resolve_attempt_id(attempt_id: UUID, db: Session = Depends(get_db)) -> UUID:
+    """
+    Id попытки из пути. Новые id - UUIDv7 и идут как есть; прежние (uuid4,
+    до перехода на секции) переводятся по attempt_id_aliases.
+    """
+    if attempt_id.version == 7:
+        return attempt_id
+    new_id = db.scalar(select(AttemptIdAlias.new_id).where(AttemptIdAlias.old_id == attempt_id))
+    return new_id or attempt_id
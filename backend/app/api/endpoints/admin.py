@@ -0,0 +1,133 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from uuid import UUID
+from app.db.session import get_db
+from app.db.models.bulk_jobs import BulkJob
+from app.db.models.question_bank import BankQuestion
+from app.db.models.user import User
+from app.api.dependencies import get_current_admin
+from app.core.auth import update_user_access
+from app.schemas.auth import Principal, UserAccessUpdate, UserResponse
+from app.schemas.bulk_job import BulkJobCreate, BulkJobResponse
+from app.schemas.question_bank import BankQuestionResponse, BankQuestionStats
+from app.services import question_bank
+from app.services.bulk import cancel_job, create_job, resume_job
+
+router = APIRouter()
+
+def _get_job(db: Session, job_id: UUID) -> BulkJob:
+    job = db.get(BulkJob, job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bulk job not found"
+        )
+    return job
+
+def _user_response(user: User) -> UserResponse:
+    return UserResponse(
+        id=str(user.id),
+        email=user.email,
+        name=user.name,
+        is_active=user.is_active,
+        role=user.role,
+        is_admin=user.role == "admin",
+        created_at=user.created_at
+    )
+
+def _change_access(db: Session, admin: Principal, user_id: UUID, data: UserAccessUpdate) -> UserResponse:
+    user = db.get(User, user_id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    if user.id == admin.id:
+        # Иначе последний администратор может запереть всех снаружи
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Administrators cannot change their own access"
+        )
+    return _user_response(update_user_access(db, user, role=data.role, is_active=data.is_active))
+
+@router.patch("/users/{user_id}", response_model=UserResponse, description="Сменить роль или активность пользователя (токены отзываются)")
+def update_user(
+    user_id: UUID,
+    data: UserAccessUpdate,
+    db: Session = Depends(get_db),
+    admin: Principal = Depends(get_current_admin)
+):
+    return _change_access(db, admin, user_id, data)
+
+@router.post("/users/{user_id}/deactivate", response_model=UserResponse, description="Деактивировать пользователя и отозвать его токены")
+def deactivate_user(
+    user_id: UUID,
+    db: Session = Depends(get_db),
+    admin: Principal = Depends(get_current_admin)
+):
+    return _change_access(db, admin, user_id, UserAccessUpdate(is_active=False))
+
+@router.post("/bulk-jobs", response_model=BulkJobResponse, status_code=202, description="Массовая операция над тестами (фоновая задача)")
+def create_bulk_job(
+    data: BulkJobCreate,
+    db: Session = Depends(get_db),
+    admin: Principal = Depends(get_current_admin)
+):
+    return create_job(db, data, admin.id)
+
+@router.get("/bulk-jobs", response_model=List[BulkJobResponse], description="Последние массовые операции")
+def list_bulk_jobs(
+    limit: int = 20,
+    db: Session = Depends(get_db),
+    admin: Principal = Depends(get_current_admin)
+):
+    return db.scalars(select(BulkJob).order_by(BulkJob.created_at.desc()).limit(min(limit, 100))).all()
+
+@router.get("/bulk-jobs/{job_id}", response_model=BulkJobResponse, description="Состояние и прогресс массовой операции")
+def get_bulk_job(
+    job_id: UUID,
+    db: Session = Depends(get_db),
+    admin: Principal = Depends(get_current_admin)
+):
+    return _get_job(db, job_id)
+
+@router.post("/bulk-jobs/{job_id}/cancel", response_model=BulkJobResponse, description="Отменить массовую операцию")
+def cancel_bulk_job(
+    job_id: UUID,
+    db: Session = Depends(get_db),
+    admin: Principal = Depends(get_current_admin)
+):
+    return cancel_job(db, _get_job(db, job_id))
+
+@router.post("/bulk-jobs/{job_id}/resume", response_model=BulkJobResponse, description="Продолжить отмененную или упавшую операцию")
+def resume_bulk_job(
+    job_id: UUID,
+    db: Session = Depends(get_db),
+    admin: Principal = Depends(get_current_admin)
+):
+    return resume_job(db, _get_job(db, job_id))
+
+@router.get("/question-bank", response_model=List[BankQuestionResponse], description="Вопросы банка, самые используемые первыми")
+def list_bank_questions(
+    search: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    admin: Principal = Depends(get_current_admin)
+):
+    return question_bank.list_questions(db, search, limit)
+
+@router.get("/question-bank/{question_id}", response_model=BankQuestionStats, description="Статистика ответов на вопрос банка по всем тестам")
+def get_bank_question_stats(
+    question_id: UUID,
+    db: Session = Depends(get_db),
+    admin: Principal = Depends(get_current_admin)
+):
+    question = db.get(BankQuestion, question_id)
+    if question is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bank question not found"
+        )
+    return question_bank.question_stats(db, question)
@@ -1,10 +1,14 @@
-from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from app.exceptions import UnauthorizedException, ValidationException
-from app.schemas.auth import LoginData, Token, UserCreate, UserResponse
-from app.core.auth import authenticate_user, create_access_token, create_user, get_current_active_user
+from app.schemas.auth import LoginData, RefreshRequest, Token, UserCreate, UserResponse
+from app.core.auth import (
+    authenticate_user, create_token_pair, create_user, decode_token, get_current_active_user, oauth2_scheme,
+    principal_from_claims
+)
+from app.core.revocation import is_revoked_in_db, revoke
 from app.core.config import settings
 from ...db.session import get_db
 from ...db.models.user import User
@@ -21,12 +25,11 @@ def _authenticate_user(db: Session, email: str, password: str) -> Token:
     if not user.is_active:
         raise UnauthorizedException("Пользователь деактивирован")
     
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
-    )
-    
-    return {"access_token": access_token, "token_type": "bearer"}
+    return create_token_pair(user)
+
+def _family_expires_at() -> datetime:
+    # Самый поздний refresh-токен семейства, выпущенный к этому моменту
+    return datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
 
 @router.post("/register", response_model=UserResponse)
 def register(user: UserCreate, db: Session = Depends(get_db)):
@@ -38,7 +41,8 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
             email=user_obj.email,
             name=user_obj.name,
             is_active=user_obj.is_active,
-            is_admin=user_obj.is_admin,
+            role=user_obj.role,
+            is_admin=user_obj.role == "admin",
             created_at=user_obj.created_at
         )
     except ValidationException as e:
@@ -69,7 +73,8 @@ def read_users_me(current_user: User = Depends(get_current_active_user)):
         email=current_user.email,
         name=current_user.name,
         is_active=current_user.is_active,
-        is_admin=current_user.is_admin,
+        role=current_user.role,
+        is_admin=current_user.role == "admin",
         created_at=current_user.created_at
     )
 
@@ -78,4 +83,52 @@ def login_for_access_token_json(
     login_data: LoginData,
     db: Session = Depends(get_db)
 ):
-    return _authenticate_user(db, login_data.email, login_data.password)
\ No newline at end of file
+    return _authenticate_user(db, login_data.email, login_data.password)
+
+@router.post("/refresh", response_model=Token)
+def refresh_access_token(data: RefreshRequest, db: Session = Depends(get_db)):
+    """
+    Ротация: refresh-токен меняется на новую пару того же семейства и
+    становится недействительным. Повторное предъявление означает утечку -
+    отзывается все семейство, включая выданные по нему access-токены.
+    """
+    from jose import JWTError
+    try:
+        payload = decode_token(data.refresh_token, "refresh")
+        principal = principal_from_claims(payload)
+    except JWTError:
+        raise UnauthorizedException("Недействительный refresh-токен")
+    jti, family = payload.get("jti"), payload.get("fam")
+    if not jti or not family or is_revoked_in_db(db, family):
+        raise UnauthorizedException("Недействительный refresh-токен")
+
+    # Атомарная отметка использования: из двух одновременных ротаций пройдет одна
+    if not revoke(db, jti, datetime.utcfromtimestamp(payload["exp"])):
+        revoke(db, family, _family_expires_at())
+        db.commit()
+        raise UnauthorizedException("Refresh-токен уже использован, сессия отозвана")
+
+    user = db.get(User, principal.id)
+    if user is None or not user.is_active:
+        db.rollback()
+        raise UnauthorizedException("Пользователь деактивирован")
+    if (user.token_version or 0) != principal.token_version:
+        db.rollback()
+        raise UnauthorizedException("Сессия отозвана")
+    db.commit()
+    return create_token_pair(user, family)
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    """Отзывает текущий access-токен и все семейство refresh-токенов"""
+    from jose import JWTError
+    try:
+        payload = decode_token(token)
+    except JWTError:
+        raise UnauthorizedException("Недействительный токен")
+    if payload.get("jti"):
+        revoke(db, payload["jti"], datetime.utcfromtimestamp(payload["exp"]))
+    if payload.get("fam"):
+        revoke(db, payload["fam"], _family_expires_at())
+    db.commit()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,99 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from uuid import UUID
+from app.db.session import get_db
+from app.db.models.jobs import Job
+from app.api.dependencies import get_current_admin, get_current_principal
+from app.core import jobs
+from app.schemas.auth import Principal
+from app.schemas.job import JobCreate, JobResponse, JobStats
+
+router = APIRouter()
+
+def _get_job(db: Session, job_id: UUID) -> Job:
+    job = db.get(Job, job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
+
+@router.get("/jobs/{job_id}", response_model=JobResponse, description="Состояние фоновой задачи")
+def get_job(
+    job_id: UUID,
+    db: Session = Depends(get_db),
+    principal: Principal = Depends(get_current_principal)
+):
+    job = _get_job(db, job_id)
+    # Чужие задачи не раскрываем
+    if job.created_by != principal.id and not principal.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
+
+@router.get("/admin/jobs", response_model=List[JobResponse], description="Последние фоновые задачи")
+def list_jobs(
+    status_filter: Optional[str] = Query(None, alias="status", description="queued, running, succeeded, failed, cancelled"),
+    kind: Optional[str] = Query(None, description="Тип задачи, например bulk.run"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    admin: Principal = Depends(get_current_admin)
+):
+    query = select(Job)
+    if status_filter:
+        query = query.where(Job.status == status_filter)
+    if kind:
+        query = query.where(Job.kind == kind)
+    # id - UUIDv7, порядок по нему - порядок создания
+    return db.scalars(query.order_by(Job.id.desc()).limit(limit)).all()
+
+@router.get("/admin/jobs/stats", response_model=JobStats, description="Глубина очереди по типам задач")
+def job_stats(
+    db: Session = Depends(get_db),
+    admin: Principal = Depends(get_current_admin)
+):
+    return jobs.stats(db)
+
+@router.post("/admin/jobs", response_model=JobResponse, status_code=202, description="Поставить задачу обслуживания в очередь")
+def create_job(
+    data: JobCreate,
+    db: Session = Depends(get_db),
+    admin: Principal = Depends(get_current_admin)
+):
+    job = jobs.enqueue(db, data.kind, data.payload, delay=data.delay_seconds, created_by=admin.id)
+    db.commit()
+    db.refresh(job)
+    return job
+
+@router.post("/admin/jobs/{job_id}/cancel", response_model=JobResponse, description="Отменить задачу, ожидающую в очереди")
+def cancel_job(
+    job_id: UUID,
+    db: Session = Depends(get_db),
+    admin: Principal = Depends(get_current_admin)
+):
+    job = _get_job(db, job_id)
+    if not jobs.cancel(db, job):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job is {job.status}, only queued jobs can be cancelled"
+        )
+    return job
+
+@router.post("/admin/jobs/{job_id}/retry", response_model=JobResponse, description="Повторить упавшую или отмененную задачу")
+def retry_job(
+    job_id: UUID,
+    db: Session = Depends(get_db),
+    admin: Principal = Depends(get_current_admin)
+):
+    job = _get_job(db, job_id)
+    if not jobs.retry(db, job):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job is {job.status}, only failed or cancelled jobs can be retried"
+        )
+    return job
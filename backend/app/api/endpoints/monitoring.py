@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from uuid import UUID
+from app.db.session import get_db
+from app.api.dependencies import get_current_admin
+from app.core.events import broker
+from app.services.monitoring import channel, load_snapshot, stream
+
+router = APIRouter()
+
+@router.get("/tests/{test_id}/monitor", description="Живой мониторинг сессии теста (Server-Sent Events)")
+async def monitor_test(
+    test_id: UUID,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_admin)
+):
+    """
+    Снимок незавершенных попыток, затем обновления по событиям.
+    Подписка оформляется до чтения снимка, чтобы не потерять события между ними.
+    """
+    subscription = broker.subscribe(channel(test_id))
+    try:
+        snapshot = await run_in_threadpool(load_snapshot, db, test_id)
+    except BaseException:
+        subscription.close()
+        raise
+    finally:
+        # Поток живет долго: соединение из пула возвращаем сразу
+        db.close()
+    if snapshot is None:
+        subscription.close()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Test not found"
+        )
+    return StreamingResponse(
+        stream(request, test_id, subscription, snapshot),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -4,6 +4,7 @@ from typing import List
 from app.schemas.test import TestCreate
 from app.services.test_service import find_test_by_title, get_tests_with_pagination
 from app.db.session import get_db
+from app.core.serialization import RawJSONResponse, dump_tests
 
 router = APIRouter()
 
@@ -16,7 +17,7 @@ def search_tests(
     if not q.strip():
         raise HTTPException(status_code=400, detail='Поисковый запрос не может быть пустым')
     tests = find_test_by_title(db, q.strip())
-    return tests
+    return RawJSONResponse(dump_tests(tests))
 
 @router.get('/tests/paginated')
 def get_tests_paginated(
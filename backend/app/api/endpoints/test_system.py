@@ -1,115 +1,216 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import logging
+from pathlib import Path
 from uuid import UUID
 from app.db.session import get_db
-from app.api.dependencies import get_current_user
+from app.api.dependencies import get_current_principal, resolve_attempt_id
 from app.schemas.test_attempt import TestAttemptResponse, UserAnswerResponse
 from app.crud.crud import create_test_attempt, get_user_attempts
 from app.db.models.test_attempts import TestAttempt
-from app.db.models.questions import Question
 from app.db.models.user_answers import UserAnswer
-from app.schemas.test_attempt import UserAnswerCreate
-from app.db.models.user import User
+from app.schemas.test_attempt import AttemptSync, AttemptSyncAck, AttemptSyncState, UserAnswerCreate
+from app.core.metrics import ANSWERS_SUBMITTED, ATTEMPTS_STARTED
+from app.services.answers import ensure_accepting_answers, load_questions, upsert_answers
+from app.services.attempts import (
+    abandon_attempt,
+    finish_attempt,
+    get_attempt_for_update,
+    pause_attempt,
+    resume_attempt,
+)
+from app.core.serialization import RawJSONResponse, dump_model
+from app.core.config import settings
+from app.db.archive import read_attempt_answers, read_user_attempts
+from app.services import monitoring
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 @router.get("/tests/{test_id}/start", response_model=TestAttemptResponse, description="Начать прохождение теста")
-async def start_test(
+def start_test(
     test_id: UUID,
     db: Session = Depends(get_db),
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_principal)
 ):
-    """Начать прохождение теста"""
-    return create_test_attempt(db, test_id, current_user.id)
+    """Начать прохождение теста (повторный вызов возвращает незавершенную попытку)"""
+    attempt, created = create_test_attempt(db, test_id, current_user.id)
+    body = dump_model(TestAttemptResponse, attempt)
+    if created:
+        ATTEMPTS_STARTED.inc()
+        monitoring.publish(monitoring.attempt_event(attempt, current_user.email))
+    return RawJSONResponse(body)
+
+@router.get("/attempts/history", response_model=List[TestAttemptResponse], description="История попыток, включая архив")
+def attempts_history(
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_principal)
+):
+    """Попытки из горячих таблиц и из архива, новые первыми"""
+    attempts = [TestAttemptResponse.model_validate(attempt) for attempt in get_user_attempts(db, current_user.id)]
+    attempts.extend(
+        TestAttemptResponse.model_validate(row)
+        for row in read_user_attempts(Path(settings.ARCHIVE_DIR), current_user.id)
+    )
+    attempts.sort(key=lambda attempt: attempt.started_at, reverse=True)
+    return RawJSONResponse(dump_model(List[TestAttemptResponse], attempts))
+
+@router.get("/attempts/{attempt_id}/answers", response_model=List[UserAnswerResponse], description="Ответы попытки, включая архив")
+def attempt_answers(
+    attempt_id: UUID = Depends(resolve_attempt_id),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_principal)
+):
+    """Ответы своей попытки: из горячих таблиц, а для перенесенной в архив - из архива"""
+    exists = db.scalar(
+        select(TestAttempt.id).where(TestAttempt.id == attempt_id, TestAttempt.user_id == current_user.id)
+    )
+    if exists is not None:
+        answers = db.scalars(
+            select(UserAnswer).where(UserAnswer.attempt_id == attempt_id).order_by(UserAnswer.answered_at)
+        ).all()
+    else:
+        answers = read_attempt_answers(Path(settings.ARCHIVE_DIR), attempt_id, current_user.id)
+        if answers is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Attempt not found or not yours"
+            )
+        answers.sort(key=lambda answer: answer["answered_at"])
+    return RawJSONResponse(dump_model(List[UserAnswerResponse], answers))
 
 @router.post("/attempts/{attempt_id}/submit-answer", response_model=UserAnswerResponse, description="Отправить ответ на вопрос")
-async def submit_answer(
-    attempt_id: UUID,
+def submit_answer(
     question_id: UUID,
     answer_data: UserAnswerCreate,
+    attempt_id: UUID = Depends(resolve_attempt_id),
     db: Session = Depends(get_db),
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_principal)
 ):
-    user = db.query(User).filter(User.id == current_user.id).first()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    attempt, limits = get_attempt_for_update(db, attempt_id, current_user.id, shared=True)
+    ensure_accepting_answers(attempt, limits)
+    scoring_policy, questions = load_questions(db, attempt.test_version_id, [question_id])
+
+    # Повторная отправка того же ответа (двойной клик, ретрай) строку не
+    # меняет, другой ответ на тот же вопрос перезаписывает предыдущий
+    answer = answer_data.model_copy(update={"question_id": question_id})
+    changed = upsert_answers(db, attempt_id, scoring_policy, questions, [answer])
+    if changed:
+        user_answer = changed[0]
+    else:
+        user_answer = db.scalars(
+            select(UserAnswer).where(UserAnswer.attempt_id == attempt_id, UserAnswer.question_id == question_id)
+        ).one()
+    test_id = attempt.test_id
+    body = dump_model(UserAnswerResponse, user_answer)
+    db.commit()
+
+    if changed:
+        ANSWERS_SUBMITTED.inc()
+        monitoring.publish(monitoring.answer_event(test_id, attempt_id, question_id))
 
-    attempt = db.query(TestAttempt).filter(
-        TestAttempt.id == attempt_id,
-        TestAttempt.user_id == current_user.id
+    return RawJSONResponse(body)
+
+@router.post("/attempts/{attempt_id}/sync", response_model=AttemptSyncAck, description="Синхронизировать измененные ответы клиента")
+def sync_answers(
+    sync: AttemptSync,
+    attempt_id: UUID = Depends(resolve_attempt_id),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_principal)
+):
+    """
+    Клиент копит измененные с последнего подтверждения ответы и отправляет
+    их с возрастающим номером seq; сервер отвечает номером последнего
+    принятого пакета. Повтор или опоздавший пакет (seq <= принятого)
+    ничего не пишет и просто возвращает подтверждение.
+    """
+    attempt, limits = get_attempt_for_update(db, attempt_id, current_user.id)
+    if sync.seq <= attempt.client_seq:
+        ack_seq = attempt.client_seq
+        db.rollback()
+        return RawJSONResponse(dump_model(AttemptSyncAck, {"ack_seq": ack_seq, "applied": 0}))
+    ensure_accepting_answers(attempt, limits)
+
+    # Внутри пакета побеждает последний ответ на вопрос
+    latest = {answer.question_id: answer for answer in sync.answers}
+    scoring_policy, questions = load_questions(db, attempt.test_version_id, latest)
+    changed = upsert_answers(db, attempt_id, scoring_policy, questions, latest.values())
+    attempt.client_seq = sync.seq
+    test_id = attempt.test_id
+    db.commit()
+
+    if changed:
+        ANSWERS_SUBMITTED.inc(len(changed))
+    for row in changed:
+        monitoring.publish(monitoring.answer_event(test_id, attempt_id, row.question_id))
+    return RawJSONResponse(dump_model(AttemptSyncAck, {"ack_seq": sync.seq, "applied": len(changed)}))
+
+@router.get("/attempts/{attempt_id}/sync", response_model=AttemptSyncState, description="Принятые сервером ответы попытки")
+def sync_state(
+    attempt_id: UUID = Depends(resolve_attempt_id),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_principal)
+):
+    """Восстановление клиента после перезагрузки: подтвержденный seq и сохраненные ответы"""
+    attempt = db.scalars(
+        select(TestAttempt).where(TestAttempt.id == attempt_id, TestAttempt.user_id == current_user.id)
     ).first()
-    
-    if not attempt:
+    if attempt is None:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, 
+            status_code=status.HTTP_404_NOT_FOUND,
             detail="Attempt not found or not yours"
         )
-    
-    if attempt.status == "completed":
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, 
-            detail="Attempt already completed"
-        )
-    if attempt.status == "abandoned":
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, 
-            detail="Attempt already abandoned"
-        )
+    answers = db.execute(
+        select(UserAnswer.question_id, UserAnswer.selected_options, UserAnswer.text_answer)
+        .where(UserAnswer.attempt_id == attempt_id)
+    ).all()
+    return RawJSONResponse(dump_model(AttemptSyncState, {
+        "ack_seq": attempt.client_seq,
+        "status": attempt.status,
+        "version": attempt.version,
+        "answers": answers,
+    }))
 
-    question = db.query(Question).filter(
-        Question.id == question_id,
-        Question.test_id == attempt.test_id
-    ).first()
-    
-    if not question:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, 
-            detail="Question not found or not related to this test"
-        )
 
-    existing_answer = db.query(UserAnswer).filter(
-        UserAnswer.attempt_id == attempt_id,
-        UserAnswer.question_id == question_id
-    ).first()
-    
-    if existing_answer:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, 
-            detail="You already answered this question"
-        )
+@router.post("/attempts/{attempt_id}/pause", response_model=TestAttemptResponse, description="Приостановить попытку")
+def pause_attempt_endpoint(
+    attempt_id: UUID = Depends(resolve_attempt_id),
+    version: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_principal)
+):
+    attempt = pause_attempt(db, attempt_id, current_user.id, version)
+    return RawJSONResponse(dump_model(TestAttemptResponse, attempt))
 
-    is_correct = False
-    points_earned = 0
-    
-    if question.question_type == "multiple_choice":
-        selected = set(answer_data.selected_options or [])
-        correct = set(question.correct_answers)
-        is_correct = selected == correct
-        points_earned = question.points if is_correct else 0
-    elif question.question_type == "text":
-        user_text = (answer_data.text_answer or "").strip().lower()
-        correct_text = question.correct_answers.strip().lower()
-        is_correct = user_text == correct_text
-        points_earned = question.points if is_correct else 0
-
-    user_answer = UserAnswer(
-        attempt_id=attempt_id,
-        question_id=question_id,
-        selected_options=answer_data.selected_options,
-        text_answer=answer_data.text_answer,
-        is_correct=is_correct,
-        points_earned=points_earned
-    )
-    
-    db.add(user_answer)
-    db.commit()
-    db.refresh(user_answer)
-    
-    return user_answer
-    
-    
\ No newline at end of file
+@router.post("/attempts/{attempt_id}/resume", response_model=TestAttemptResponse, description="Продолжить приостановленную попытку")
+def resume_attempt_endpoint(
+    attempt_id: UUID = Depends(resolve_attempt_id),
+    version: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_principal)
+):
+    attempt = resume_attempt(db, attempt_id, current_user.id, version)
+    return RawJSONResponse(dump_model(TestAttemptResponse, attempt))
+
+@router.post("/attempts/{attempt_id}/finish", response_model=TestAttemptResponse, description="Завершить попытку и посчитать баллы")
+def finish_attempt_endpoint(
+    attempt_id: UUID = Depends(resolve_attempt_id),
+    version: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_principal)
+):
+    attempt = finish_attempt(db, attempt_id, current_user.id, version)
+    return RawJSONResponse(dump_model(TestAttemptResponse, attempt))
+
+@router.post("/attempts/{attempt_id}/abandon", response_model=TestAttemptResponse, description="Отказаться от попытки")
+def abandon_attempt_endpoint(
+    attempt_id: UUID = Depends(resolve_attempt_id),
+    version: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_principal)
+):
+    attempt = abandon_attempt(db, attempt_id, current_user.id, version)
+    return RawJSONResponse(dump_model(TestAttemptResponse, attempt))
@@ -1,33 +1,53 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
 import logging
 from uuid import UUID  # Добавлен импорт UUID
 
 from app.db.session import get_db
-from app.schemas.test import TestCreate
+from app.api.dependencies import get_current_admin
+from app.schemas.auth import Principal
+from app.schemas.test import TestCreate, TestVersionResponse, TestVersionSummary
+from app.core.cache import test_payload_cache
+from app.core.serialization import RawJSONResponse, dump_model, dump_test, dump_tests
+from app.core.compression import PrecompressedPayload
 from app.crud.crud import delete_all_tests, delete_test_by_id, get_tests, create_test, get_test_by_id, update_test
+from app.services.versions import get_snapshot, list_versions
 
-# Настройка логирования
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Опубликованная версия не меняется: клиент и прокси могут не перепроверять ее
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match со слабым сравнением (RFC 9110)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in [tag.removeprefix("W/") for tag in tags]
+
 @router.delete("/tests/{test_id}", response_model=dict, description="Delete a test by ID")
 def delete_test_endpoint(test_id: UUID, db: Session = Depends(get_db)):
     try:
-        return delete_test_by_id(db, test_id)
+        result = delete_test_by_id(db, test_id)
+        test_payload_cache.invalidate(test_id)
+        return result
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error deleting test: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
-@router.delete("/tests/", response_model=dict, description="Delete all tests")
-def delete_all_tests_endpoint(db: Session = Depends(get_db)):
+@router.delete("/tests/", response_model=dict, status_code=202, description="Delete all tests (background job, admin only)")
+def delete_all_tests_endpoint(
+    db: Session = Depends(get_db),
+    admin: Principal = Depends(get_current_admin)
+):
     try:
-        return delete_all_tests(db)
+        return delete_all_tests(db, admin.id)
     except HTTPException:
         raise
     except Exception as e:
@@ -37,7 +57,7 @@ def delete_all_tests_endpoint(db: Session = Depends(get_db)):
 @router.get("/tests", response_model=List[TestCreate], description="Get all tests")
 def get_all_tests_endpoint(db: Session = Depends(get_db), skip: int = 0, limit: int = 10):
     try:
-        return get_tests(db, skip=skip, limit=limit)
+        return RawJSONResponse(dump_tests(get_tests(db, skip=skip, limit=limit)))
     except Exception as e:
         logger.error(f"Error fetching tests: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -46,13 +66,10 @@ def get_all_tests_endpoint(db: Session = Depends(get_db), skip: int = 0, limit:
 def create_new_test_endpoint(test: TestCreate, db: Session = Depends(get_db)):
     logger.info(f"Creating new test: '{test.title}' with {len(test.questions)} questions")
     
-    for i, question in enumerate(test.questions):
-        logger.debug(f"Question {i+1}: {question.question_text[:50]}...")
-    
     try:
         result = create_test(db=db, test_data=test)
         logger.info(f"Test created successfully: {result.id}")
-        return result
+        return RawJSONResponse(dump_test(result), status_code=201)
     except HTTPException as e:
         logger.error(f"Validation error: {e.detail}")
         raise
@@ -61,12 +78,18 @@ def create_new_test_endpoint(test: TestCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 @router.get("/tests/{test_id}", response_model=TestCreate, description="Get a test by ID")
-def get_test_by_id_endpoint(test_id: UUID, db: Session = Depends(get_db)):
+def get_test_by_id_endpoint(test_id: UUID, request: Request, db: Session = Depends(get_db)):
+    cached = test_payload_cache.get(test_id)
+    if cached is not None:
+        return cached.response(request)
+    
     try:
         db_test = get_test_by_id(db, test_id=test_id)
         if not db_test:
             raise HTTPException(status_code=404, detail="Test not found")
-        return db_test
+        payload = PrecompressedPayload(dump_test(db_test))
+        test_payload_cache.set(test_id, payload)
+        return payload.response(request)
     except HTTPException:
         raise
     except Exception as e:
@@ -79,11 +102,28 @@ def update_test_endpoint(test_id: UUID, test: TestCreate, db: Session = Depends(
     
     try:
         result = update_test(db=db, test_id=test_id, test_data=test)
+        test_payload_cache.invalidate(test_id)
         logger.info(f"Test updated successfully: {result.id}")
-        return result
+        return RawJSONResponse(dump_test(result))
     except HTTPException as e:
         logger.error(f"Validation error: {e.detail}")
         raise
     except Exception as e:
         logger.exception(f"Unexpected error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@router.get("/tests/{test_id}/versions", response_model=List[TestVersionSummary], description="Published versions of a test")
+def list_test_versions_endpoint(test_id: UUID, db: Session = Depends(get_db)):
+    test = get_test_by_id(db, test_id=test_id)
+    return RawJSONResponse(dump_model(List[TestVersionSummary], list_versions(db, test)))
+
+@router.get("/tests/{test_id}/versions/{version_id}", response_model=TestVersionResponse, description="Immutable snapshot of a test version")
+def get_test_version_endpoint(test_id: UUID, version_id: UUID, request: Request, db: Session = Depends(get_db)):
+    """Снимок из кеша без запроса к базе; повторный запрос с If-None-Match - 304"""
+    snapshot = get_snapshot(db, version_id)
+    if snapshot.test_id != test_id:
+        raise HTTPException(status_code=404, detail="Test version not found")
+    headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL, "ETag": snapshot.etag}
+    if _etag_matches(request, snapshot.etag):
+        return Response(status_code=304, headers=headers)
+    return snapshot.payload.response(request, headers=headers)
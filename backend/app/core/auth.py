@@ -1,41 +1,47 @@
 from datetime import datetime, timedelta
-from typing import Optional, Union
-from fastapi import Depends, HTTPException, status
+from functools import lru_cache
+from typing import Dict, Optional, Union
+from uuid import UUID, uuid4
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from jose import jwt, JWTError
-from passlib.context import CryptContext
 from pydantic import BaseModel
+import logging
 
 from app.db.session import get_db
 from app.db.models.user import User
-from app.schemas.auth import TokenData
+from app.schemas.auth import Principal
+from app.core.cache import token_version_cache
 from app.core.config import settings
+from app.core.keys import get_key_manager
+from app.core.metrics import BCRYPT_SECONDS, timed
+from app.core.revocation import denylist
 
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl="/api/v1/auth/token", 
     scheme_name="JWT"
 )
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=12)
+logger = logging.getLogger(__name__)
+
+# passlib/bcrypt и jose (с бэкендом cryptography) тяжелые при импорте и нужны
+# только при логине/проверке токена, поэтому загружаются при первом использовании
+
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=12)
 
 def authenticate_user(db: Session, email: str, password: str) -> Union[User, bool]:
     user = db.query(User).filter(User.email == email).first()
     if not user:
-        print(f"User with email {email} not found")
+        logger.info("Login failed: unknown email")
         return False
     
-    print(f"Checking password for user {email}")
-    print(f"Input password: {password}")
-    print(f"Stored hash: {user.hashed_password}")
-    
-    is_valid = verify_password(password, user.hashed_password)
-    print(f"Password valid: {is_valid}")
-    
-    if not is_valid:
-        print(f"Password verification failed for user {email}")
+    if not verify_password(password, user.hashed_password):
+        logger.info("Login failed: wrong password for user %s", user.id)
         return False
     
-    print(f"User {email} authenticated successfully")
     return user
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -46,36 +52,168 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    to_encode.setdefault("type", "access")
+    to_encode.setdefault("jti", uuid4().hex)
+    return get_key_manager().encode(to_encode)
+
+def user_claims(user: User) -> Dict:
+    """Claims, по которым запрос авторизуется без загрузки пользователя"""
+    return {
+        "sub": str(user.id),
+        "email": user.email,
+        "role": user.role or "student",
+        "ver": user.token_version or 0,
+    }
+
+def create_refresh_token(claims: Dict, family: str) -> str:
+    """Refresh-токен семейства family; каждый годен для одной ротации"""
+    return create_access_token(
+        {**claims, "fam": family, "type": "refresh"},
+        expires_delta=timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+
+def create_token_pair(user: User, family: Optional[str] = None) -> Dict:
+    """Пара access/refresh; family=None - новый вход (новое семейство)"""
+    family = family or uuid4().hex
+    claims = user_claims(user)
+    return {
+        "access_token": create_access_token({**claims, "fam": family}),
+        "refresh_token": create_refresh_token(claims, family),
+        "token_type": "bearer",
+        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    }
+
+def decode_token(token: str, token_type: str = "access") -> Dict:
+    """Проверяет подпись, срок и тип токена; JWTError при любой ошибке"""
+    from jose import JWTError
+    payload = get_key_manager().decode(token)
+    # Токены без type выпущены до появления refresh-токенов и считаются access
+    if payload.get("type", "access") != token_type:
+        raise JWTError("Unexpected token type")
+    return payload
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    with timed(BCRYPT_SECONDS, operation="verify"):
+        return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    with timed(BCRYPT_SECONDS, operation="hash"):
+        return get_pwd_context().hash(password)
 
-def get_current_user_from_token(token: str, db: Session) -> User:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def principal_from_claims(payload: Dict) -> Principal:
+    """Principal из проверенного payload; токены старого формата (sub=email) не принимаются"""
+    from jose import JWTError
+    try:
+        return Principal(
+            id=UUID(payload["sub"]),
+            email=payload["email"],
+            role=payload["role"],
+            token_version=payload.get("ver", 0),
+        )
+    except (KeyError, TypeError, ValueError):
+        raise JWTError("Malformed claims")
+
+def cached_token_version_current(user_id: UUID, token_version: int) -> Optional[bool]:
+    """Проверка token_version только по кешу; None - промах, нужен запрос к базе"""
+    state = token_version_cache.get(user_id)
+    if state is None:
+        return None
+    version, is_active = state
+    return is_active and version == token_version
+
+def is_token_version_current(user_id: UUID, token_version: int) -> bool:
+    """
+    Токен действителен, пока пользователь активен и его token_version не
+    менялся. Состояние берется из кеша (TOKEN_VERSION_CACHE_TTL_SECONDS),
+    в базу - только поиск по первичному ключу при промахе. Запрос
+    синхронный: из async-кода вызывать через run_in_threadpool.
+    """
+    current = cached_token_version_current(user_id, token_version)
+    if current is not None:
+        return current
+    from app.db.session import SessionLocal
+    with SessionLocal() as db:
+        row = db.execute(select(User.token_version, User.is_active).where(User.id == user_id)).first()
+    state = (row.token_version, bool(row.is_active)) if row is not None else (None, False)
+    token_version_cache.set(user_id, state)
+    version, is_active = state
+    return is_active and version == token_version
+
+def decode_principal(token: str) -> Principal:
+    """Principal из подписанного access-токена без проверки token_version (без базы)"""
+    from jose import JWTError
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-        token_data = TokenData(email=email)
+        payload = decode_token(token)
+        principal = principal_from_claims(payload)
     except JWTError:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.email == token_data.email).first()
+        raise _credentials_exception()
+    # Отзыв проверяется по копии в памяти, без запроса к базе
+    if denylist.is_revoked(payload.get("jti"), payload.get("fam")):
+        raise _credentials_exception()
+    return principal
+
+def get_principal_from_token(token: str) -> Principal:
+    principal = decode_principal(token)
+    if not is_token_version_current(principal.id, principal.token_version):
+        raise _credentials_exception()
+    return principal
+
+def invalidate_user_tokens(db: Session, user: User) -> None:
+    """
+    Сделать недействительными все токены пользователя (смена роли, выход
+    везде). Коммит за вызывающим; другие воркеры увидят изменение через TTL кеша.
+    """
+    user.token_version = (user.token_version or 0) + 1
+    token_version_cache.invalidate(user.id)
+
+def update_user_access(db: Session, user: User, role: Optional[str] = None, is_active: Optional[bool] = None) -> User:
+    """
+    Сменить роль и/или активность. Роль зашита в claims, а проверка
+    активности кешируется, поэтому выданные токены отзываются сразу.
+    """
+    changed = False
+    if role is not None and role != user.role:
+        user.role = role
+        changed = True
+    if is_active is not None and is_active != user.is_active:
+        user.is_active = is_active
+        changed = True
+    if changed:
+        invalidate_user_tokens(db, user)
+        db.commit()
+        # Запрос между сбросом кеша и коммитом мог закешировать старую версию
+        token_version_cache.invalidate(user.id)
+        db.refresh(user)
+        logger.info(f"User {user.id} access changed: role={user.role}, is_active={user.is_active}")
+    return user
+
+def get_current_user_from_token(token: str, db: Session) -> User:
+    principal = get_principal_from_token(token)
+    user = db.get(User, principal.id)
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     return user
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    return get_current_user_from_token(token, db)
+def get_current_principal(request: Request, token: str = Depends(oauth2_scheme)) -> Principal:
+    """Пользователь запроса без обращения к базе (AuthMiddleware уже проверил токен)"""
+    principal = getattr(request.state, "user", None)
+    if isinstance(principal, Principal):
+        return principal
+    return get_principal_from_token(token)
+
+def get_current_user(principal: Principal = Depends(get_current_principal), db: Session = Depends(get_db)) -> User:
+    """Полная строка users - только для маршрутов, которым она нужна"""
+    user = db.get(User, principal.id)
+    if user is None:
+        raise _credentials_exception()
+    return user
 
 def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     if not current_user.is_active:
@@ -96,7 +234,7 @@ def create_user(db: Session, email: str, password: str, name: Optional[str] = No
         hashed_password=hashed_password,
         name=name,
         is_active=True,
-        is_admin=False
+        role="student"
     )
     db.add(db_user)
     db.commit()
@@ -0,0 +1,72 @@
+"""
+Кеши в памяти процесса.
+
+Каждый воркер держит свою копию, поэтому инвалидация локальная, а
+расхождение между воркерами ограничено TTL записи.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from app.core.config import settings
+from app.core.metrics import CACHE_REQUESTS
+
+_MISSING = object()
+
+
+class TTLCache:
+    """LRU-кеш с ограничением размера и временем жизни записей (ttl=None - бессрочно)"""
+
+    def __init__(self, name: str, maxsize: int, ttl: Optional[float]):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    CACHE_REQUESTS.inc(cache=self.name, result="hit")
+                    return value
+                del self._data[key]
+        CACHE_REQUESTS.inc(cache=self.name, result="miss")
+        return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# Ответы GET /tests/{test_id}: PrecompressedPayload с JSON и сжатыми вариантами
+test_payload_cache = TTLCache("test_payload", settings.TEST_CACHE_MAX_ENTRIES, settings.TEST_CACHE_TTL_SECONDS)
+
+# Опубликованные версии тестов: version_id -> versions.Snapshot. Версия
+# неизменяема, поэтому запись не устаревает и инвалидация не нужна
+version_cache = TTLCache("test_version", settings.TEST_VERSION_CACHE_MAX_ENTRIES, None)
+
+# Проверка токенов: user_id -> (token_version, is_active)
+token_version_cache = TTLCache(
+    "token_version", settings.TOKEN_VERSION_CACHE_MAX_ENTRIES, settings.TOKEN_VERSION_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,74 @@
+"""
+Сжатие ответов: выбор кодировки по Accept-Encoding и заранее сжатые
+варианты для кешируемых ответов.
+"""
+
+import gzip
+from typing import Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен: без него отдаем только gzip
+    brotli = None
+
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Выбрать кодировку из Accept-Encoding (br предпочтительнее gzip)"""
+    accepted = set()
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        accepted.add(name.strip())
+    for encoding in SUPPORTED_ENCODINGS:
+        if encoding in accepted or "*" in accepted:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str, best: bool = False) -> bytes:
+    """best=True - максимальная степень сжатия для ответов, сжимаемых один раз"""
+    if encoding == "br":
+        return brotli.compress(body, quality=11 if best else settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=9 if best else settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+class PrecompressedPayload:
+    """JSON байты и их сжатые варианты; каждый вариант считается один раз"""
+
+    __slots__ = ("body", "_encoded")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self._encoded: Dict[str, bytes] = {}
+
+    def encoded(self, encoding: str) -> bytes:
+        data = self._encoded.get(encoding)
+        if data is None:
+            data = compress(self.body, encoding, best=True)
+            self._encoded[encoding] = data
+        return data
+
+    def response(
+        self, request: Request, media_type: str = "application/json", headers: Optional[Dict[str, str]] = None
+    ) -> Response:
+        encoding = None
+        if len(self.body) >= settings.COMPRESSION_MIN_SIZE:
+            encoding = negotiate(request.headers.get("accept-encoding", ""))
+        headers = {**(headers or {}), "Vary": "Accept-Encoding"}
+        if encoding is None:
+            return Response(self.body, media_type=media_type, headers=headers)
+        return Response(
+            self.encoded(encoding),
+            media_type=media_type,
+            headers={**headers, "Content-Encoding": encoding},
+        )
@@ -1,3 +1,4 @@
+from datetime import datetime
 from pydantic_settings import BaseSettings
 import os
 
@@ -6,6 +7,47 @@ class Settings(BaseSettings):
 
     RATE_LIMIT_PER_MINUTE: int = 60
     
+    # Connection pool settings
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    
+    # Health checks
+    HEALTH_CHECK_INTERVAL_SECONDS: float = 5
+    HEALTH_MAX_POOL_SATURATION: float = 1.0  # при полной загрузке пула воркер не готов
+    EXPECTED_MIGRATION_HEAD: str | None = None  # если задан, сверяется с alembic_version
+    
+    # Секции test_attempts/user_answers (см. app/db/partitions.py)
+    PARTITIONS_AHEAD_MONTHS: int = 3
+
+    # Архив завершенных попыток (см. app/db/archive.py)
+    ARCHIVE_DIR: str = "archive"
+    ARCHIVE_RETENTION_DAYS: int = 365  # завершенные раньше уходят из горячих таблиц
+    ARCHIVE_BATCH_SIZE: int = 5000  # попыток в одной паре файлов
+
+    # Живой мониторинг экзаменов (см. app/core/events.py, app/services/monitoring.py)
+    MONITOR_BROKER: str = ""  # "модуль:Класс"; пусто - PostgresBroker для PostgreSQL, иначе LocalBroker
+    MONITOR_PG_CHANNEL: str = "monitor_events"  # канал LISTEN/NOTIFY между воркерами
+    MONITOR_THROTTLE_SECONDS: float = 1.0  # не чаще одного обновления за интервал на подписчика
+    MONITOR_KEEPALIVE_SECONDS: float = 15
+    MONITOR_QUEUE_SIZE: int = 1000  # при переполнении подписчик перечитывает снимок
+
+    # Массовые операции над тестами (см. app/services/bulk.py)
+    BULK_CHUNK_SIZE: int = 50  # тестов в одной транзакции
+    BULK_CHUNK_PAUSE_SECONDS: float = 0.2  # пауза между порциями для экзаменационного трафика
+    BULK_LOCK_TIMEOUT_MS: int = 2000  # порция не ждет блокировок дольше, а повторяется
+    BULK_CHUNK_RETRIES: int = 3
+
+    # Очередь фоновых задач (см. app/core/jobs.py, app/worker.py)
+    JOBS_PROCESSES: int = 0  # процессов воркера; 0 - по числу CPU
+    JOBS_POLL_SECONDS: float = 1
+    JOBS_MAX_ATTEMPTS: int = 5
+    JOBS_RETRY_BASE_SECONDS: float = 5  # отсрочка повтора: 5, 10, 20... со случайным разбросом
+    JOBS_RETRY_MAX_SECONDS: float = 600
+    JOBS_HEARTBEAT_SECONDS: float = 10
+    JOBS_STALE_SECONDS: float = 120  # задачу без heartbeat (воркер упал) возвращают в очередь
+    JOBS_SHUTDOWN_SECONDS: float = 30  # сколько ждать выполняемые задачи при остановке
+    JOBS_RETENTION_DAYS: int = 7  # завершенные задачи потом удаляются
+    
     POSTGRES_USER: str = 'postgres'
     POSTGRES_PASSWORD: str = '3891123'
     POSTGRES_DB: str = 'medical_application'
@@ -14,8 +56,64 @@ class Settings(BaseSettings):
     
     # JWT settings
     SECRET_KEY: str = "your-secret-key-change-this-in-production"
-    ALGORITHM: str = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    ALGORITHM: str = "HS256"  # без JWT_SIGNING_KEYS
+    # Асимметричные ключи и ротация (см. app/core/keys.py)
+    JWT_SIGNING_KEYS: str = ""  # PEM через запятую; первый закрытый подписывает
+    # Токены без kid, подписанные SECRET_KEY, при заданных JWT_SIGNING_KEYS:
+    # переходное окно до JWT_LEGACY_HS256_UNTIL (UTC; момент перехода +
+    # REFRESH_TOKEN_EXPIRE_DAYS) или бессрочно при JWT_ACCEPT_LEGACY_HS256
+    JWT_ACCEPT_LEGACY_HS256: bool = False
+    JWT_LEGACY_HS256_UNTIL: datetime | None = None
+    JWKS_CACHE_SECONDS: int = 300  # Cache-Control для /.well-known/jwks.json
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15  # короткий: продлевается через /auth/refresh
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+
+    # Отзыв токенов (см. app/core/revocation.py)
+    REVOCATION_POLL_SECONDS: float = 5  # как быстро отзыв в одном воркере доходит до остальных
+    REVOCATION_REBUILD_SECONDS: float = 600  # полная перестройка и чистка истекших записей
+    REVOCATION_BLOOM_CAPACITY: int = 100000
+    REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+    REVOCATION_EXACT_MAX: int = 200000  # сверх лимита срабатывание фильтра считается отзывом
+    
+    # Server settings (app/server.py)
+    HOST: str = "0.0.0.0"
+    PORT: int = 8000
+    WEB_CONCURRENCY: int = 0  # 0 - по числу CPU
+    WORKERS_PER_CORE: float = 1.0
+    MAX_WORKERS: int = 16
+    WORKER_MAX_REQUESTS: int = 10000  # перезапуск воркера для ограничения памяти
+    WORKER_MAX_REQUESTS_JITTER: int = 1000
+    GRACEFUL_TIMEOUT: int = 30  # секунд на завершение начатых запросов при SIGTERM
+    WORKER_TIMEOUT: int = 60
+    KEEPALIVE: int = 5
+    CACHE_WARM_TESTS: int = 50  # сколько активных тестов загрузить в кеш при старте воркера
+    
+    # Logging settings
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # json | text
+    LOG_SAMPLE_RATE: float = 1.0  # доля записываемых access-логов по умолчанию
+    LOG_ROUTE_SAMPLE_RATES: str = ""  # "/api/v1/tests/{test_id}=0.1,/metrics=0"
+    
+    # Profiling settings
+    PROFILING_ENABLED: bool = True
+    PROFILING_SLOW_REQUEST_MS: int = 1000  # запросы дольше порога сохраняются в PROFILING_DIR
+    PROFILING_SAMPLE_RATE: float = 0.0  # доля запросов, для которых всегда снимается профиль стеков
+    PROFILING_SAMPLE_INTERVAL_MS: int = 5
+    PROFILING_DIR: str = "profiles"
+    PROFILING_MAX_FILES: int = 200
+    PROFILING_MAX_STATEMENTS: int = 500
+    
+    # Cache settings
+    TEST_CACHE_TTL_SECONDS: float = 30
+    TEST_CACHE_MAX_ENTRIES: int = 1000
+    TOKEN_VERSION_CACHE_TTL_SECONDS: float = 30  # задержка, с которой деактивация доходит до воркера
+    TOKEN_VERSION_CACHE_MAX_ENTRIES: int = 100000
+    TEST_VERSION_CACHE_MAX_ENTRIES: int = 1000  # снимки версий неизменяемы: только LRU, без TTL
+    
+    # Compression settings
+    COMPRESSION_MIN_SIZE: int = 1024  # байт; меньшие ответы не сжимаются
+    COMPRESSION_GZIP_LEVEL: int = 5
+    COMPRESSION_BROTLI_QUALITY: int = 4
     
     # CORS settings
     ALLOWED_ORIGINS: str = "http://localhost:3000,http://127.0.0.1:3000"
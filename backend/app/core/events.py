@@ -0,0 +1,274 @@
+"""
+Pub/sub для живого мониторинга экзаменов.
+
+Broker - интерфейс: publish вызывается из синхронных эндпоинтов (пул
+потоков) и не должен блокировать, subscribe отдает асинхронную подписку на
+канал. Реализация выбирается настройкой MONITOR_BROKER ("модуль:Класс").
+
+LocalBroker раздает события внутри процесса: подписчик видит только события
+своего воркера - годится для одного процесса (разработка, SQLite).
+PostgresBroker (по умолчанию для PostgreSQL) пересылает события между
+воркерами через LISTEN/NOTIFY: подписчики воркера получают события всех
+процессов. Свои события воркер раздает сразу, без круга через базу.
+"""
+
+import asyncio
+import importlib
+import logging
+import os
+import uuid
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Set
+
+import orjson
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """Очередь событий одного подписчика; lost=True - события терялись при переполнении"""
+
+    def __init__(self, broker: "Broker", channel: str, maxsize: int):
+        self.broker = broker
+        self.channel = channel
+        self.queue: "asyncio.Queue[dict]" = asyncio.Queue(maxsize=maxsize)
+        self.lost = False
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """Следующее событие или None по таймауту"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def get_nowait(self) -> Optional[dict]:
+        try:
+            return self.queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return None
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class Broker(ABC):
+    async def start(self) -> None:
+        """Вызывается при старте воркера из event loop"""
+
+    async def stop(self) -> None:
+        """Вызывается при остановке воркера"""
+
+    @abstractmethod
+    def publish(self, channel: str, event: dict) -> None:
+        """Отправить событие; потокобезопасно и не блокирует"""
+
+    @abstractmethod
+    def subscribe(self, channel: str) -> Subscription:
+        """Подписаться на канал (из event loop)"""
+
+    @abstractmethod
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Отписаться (из event loop)"""
+
+
+class LocalBroker(Broker):
+    """Раздача событий подписчикам в памяти процесса"""
+
+    def __init__(self, queue_size: int = 1000):
+        self.queue_size = queue_size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._channels: Dict[str, Set[Subscription]] = {}
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+
+    async def stop(self) -> None:
+        self._channels.clear()
+        self._loop = None
+
+    def publish(self, channel: str, event: dict) -> None:
+        # Без подписчиков событие никому не нужно: не будим event loop
+        if self._loop is None or channel not in self._channels:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._deliver, channel, event)
+        except RuntimeError:
+            pass  # loop уже закрыт (остановка воркера)
+
+    def _deliver(self, channel: str, event: dict) -> None:
+        for subscription in self._channels.get(channel, ()):
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                subscription.lost = True
+
+    def subscribe(self, channel: str) -> Subscription:
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        subscription = Subscription(self, channel, self.queue_size)
+        self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._channels.get(subscription.channel)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._channels[subscription.channel]
+
+
+class PostgresBroker(LocalBroker):
+    """
+    События между воркерами через LISTEN/NOTIFY одного канала PostgreSQL.
+
+    publish отдает событие локальным подписчикам и кладет его в очередь
+    отправки; отправитель пачками упаковывает очередь в NOTIFY (полезная
+    нагрузка до 8000 байт). Слушатель раздает чужие события своим
+    подписчикам. После обрыва соединения слушателя события могли потеряться:
+    все подписки помечаются lost и перечитывают снимок.
+    """
+
+    # Запас до лимита NOTIFY (8000 байт) на обертку пачки
+    PAYLOAD_LIMIT = 7500
+    RECONNECT_SECONDS = 1.0
+
+    def __init__(self, queue_size: int = 1000, dsn: Optional[str] = None, pg_channel: Optional[str] = None):
+        super().__init__(queue_size)
+        self.dsn = dsn or _psycopg_dsn(settings.postgres_url)
+        self.pg_channel = pg_channel or settings.MONITOR_PG_CHANNEL
+        self.source = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._outbox: Optional["asyncio.Queue[tuple]"] = None
+        self._dropped = 0
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        await super().start()
+        self._outbox = asyncio.Queue(maxsize=self.queue_size * 10)
+        self._tasks = [asyncio.create_task(self._listen()), asyncio.create_task(self._send())]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._outbox = None
+        await super().stop()
+
+    def publish(self, channel: str, event: dict) -> None:
+        if self._loop is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._publish, channel, event)
+        except RuntimeError:
+            pass  # loop уже закрыт (остановка воркера)
+
+    def _publish(self, channel: str, event: dict) -> None:
+        self._deliver(channel, event)
+        if self._outbox is None:
+            return
+        try:
+            self._outbox.put_nowait((channel, event))
+        except asyncio.QueueFull:
+            self._dropped += 1
+
+    def _payloads(self, batch: List[tuple]) -> List[str]:
+        """Пачка событий -> полезные нагрузки NOTIFY не длиннее PAYLOAD_LIMIT"""
+        payloads: List[str] = []
+        items: List[bytes] = []
+        size = 0
+        for item in batch:
+            encoded = orjson.dumps(item)
+            if items and size + len(encoded) > self.PAYLOAD_LIMIT:
+                payloads.append(self._wrap(items))
+                items, size = [], 0
+            items.append(encoded)
+            size += len(encoded) + 1
+        if items:
+            payloads.append(self._wrap(items))
+        return payloads
+
+    def _wrap(self, items: List[bytes]) -> str:
+        return '{"src":' + orjson.dumps(self.source).decode() + ',"events":[' + b",".join(items).decode() + "]}"
+
+    async def _send(self) -> None:
+        import psycopg
+
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(self.dsn, autocommit=True) as conn:
+                    while True:
+                        batch = [await self._outbox.get()]
+                        while not self._outbox.empty():
+                            batch.append(self._outbox.get_nowait())
+                        if self._dropped:
+                            logger.warning(f"Monitor outbox overflow: {self._dropped} events not sent to other workers")
+                            self._dropped = 0
+                        for payload in self._payloads(batch):
+                            await conn.execute("SELECT pg_notify(%s, %s)", (self.pg_channel, payload))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Monitor broker send failed: {str(e)}")
+                await asyncio.sleep(self.RECONNECT_SECONDS)
+
+    async def _listen(self) -> None:
+        import psycopg
+
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(self.dsn, autocommit=True) as conn:
+                    await conn.execute(f'LISTEN "{self.pg_channel}"')
+                    # Пока слушателя не было, события могли пройти мимо
+                    self._mark_lost()
+                    async for notify in conn.notifies():
+                        self._receive(notify.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Monitor broker listen failed: {str(e)}")
+                await asyncio.sleep(self.RECONNECT_SECONDS)
+
+    def _receive(self, payload: str) -> None:
+        try:
+            message = orjson.loads(payload)
+        except orjson.JSONDecodeError:
+            logger.warning("Malformed monitor notification skipped")
+            return
+        if message.get("src") == self.source:
+            return  # свои события уже розданы в publish
+        for channel, event in message.get("events", ()):
+            self._deliver(channel, event)
+
+    def _mark_lost(self) -> None:
+        for subscribers in self._channels.values():
+            for subscription in subscribers:
+                subscription.lost = True
+
+
+def _psycopg_dsn(url: str) -> str:
+    from sqlalchemy.engine import make_url
+
+    return make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+def _load_broker(path: str) -> Broker:
+    if not path:
+        from sqlalchemy.engine import make_url
+
+        backend = make_url(settings.postgres_url).get_backend_name()
+        path = "app.core.events:PostgresBroker" if backend == "postgresql" else "app.core.events:LocalBroker"
+    module_name, _, class_name = path.partition(":")
+    broker_class = getattr(importlib.import_module(module_name), class_name)
+    return broker_class(queue_size=settings.MONITOR_QUEUE_SIZE)
+
+
+broker: Broker = _load_broker(settings.MONITOR_BROKER)
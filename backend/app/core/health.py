@@ -0,0 +1,130 @@
+"""
+Состояние готовности воркера.
+
+Проверка базы выполняется в фоне раз в HEALTH_CHECK_INTERVAL_SECONDS через
+отдельный движок с одним соединением, поэтому /health/ready только читает
+закешированный результат и никогда не занимает соединение из основного пула.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import create_engine, text
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+
+class HealthState:
+    def __init__(self):
+        self.db_reachable = False
+        self.db_error: Optional[str] = "not checked yet"
+        self.db_latency_ms: Optional[float] = None
+        self.migration_head: Optional[str] = None
+        self.checked_at: Optional[float] = None  # time.monotonic()
+        self.checked_at_wall: Optional[float] = None
+
+    def is_stale(self) -> bool:
+        if self.checked_at is None:
+            return True
+        return time.monotonic() - self.checked_at > settings.HEALTH_CHECK_INTERVAL_SECONDS * 3
+
+
+state = HealthState()
+
+_probe_engine = None
+
+
+def _get_probe_engine():
+    global _probe_engine
+    if _probe_engine is None:
+        _probe_engine = create_engine(
+            settings.postgres_url,
+            pool_size=1,
+            max_overflow=0,
+            pool_pre_ping=True,
+            pool_recycle=300,
+        )
+    return _probe_engine
+
+
+def pool_stats() -> Dict:
+    """Загрузка основного пула без обращения к базе"""
+    pool = engine.pool
+    checked_out = pool.checkedout() if hasattr(pool, "checkedout") else 0
+    capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    return {
+        "size": pool.size() if hasattr(pool, "size") else None,
+        "checked_out": checked_out,
+        "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+        "capacity": capacity,
+        "saturation": round(checked_out / capacity, 3) if capacity else None,
+    }
+
+
+def check_database() -> None:
+    """Синхронная проверка; вызывается из фонового цикла"""
+    start = time.perf_counter()
+    try:
+        with _get_probe_engine().connect() as conn:
+            conn.execute(text("SELECT 1"))
+            try:
+                head = conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+            except Exception:
+                conn.rollback()
+                head = None
+        state.db_reachable = True
+        state.db_error = None
+        state.migration_head = head
+        state.db_latency_ms = round((time.perf_counter() - start) * 1000, 2)
+    except Exception as e:
+        # Текст ошибки (хост, порт, имя базы) - только в лог, не в ответ /health/ready
+        error = str(e).splitlines()[0] if str(e) else type(e).__name__
+        if state.db_reachable or error != state.db_error:
+            logger.error(f"Database health check failed: {error}")
+        state.db_reachable = False
+        state.db_error = error
+        state.db_latency_ms = None
+    state.checked_at = time.monotonic()
+    state.checked_at_wall = time.time()
+
+
+async def refresh_loop() -> None:
+    while True:
+        await run_in_threadpool(check_database)
+        await asyncio.sleep(settings.HEALTH_CHECK_INTERVAL_SECONDS)
+
+
+def readiness() -> Dict:
+    """Отчет публичного /health/ready: без текста ошибок базы (он в логе)"""
+    pool = pool_stats()
+    reasons = []
+    if state.is_stale():
+        reasons.append("health check is stale")
+    if not state.db_reachable:
+        reasons.append("database unreachable")
+    if settings.EXPECTED_MIGRATION_HEAD and state.migration_head != settings.EXPECTED_MIGRATION_HEAD:
+        reasons.append(f"migration head {state.migration_head} != {settings.EXPECTED_MIGRATION_HEAD}")
+    if pool["saturation"] is not None and pool["saturation"] >= settings.HEALTH_MAX_POOL_SATURATION:
+        reasons.append("connection pool saturated")
+    return {
+        "status": "ready" if not reasons else "not_ready",
+        "reasons": reasons,
+        "database": {
+            "reachable": state.db_reachable,
+            "latency_ms": state.db_latency_ms,
+            "migration_head": state.migration_head,
+            "checked_at": state.checked_at_wall,
+        },
+        "pool": pool,
+    }
+
+
+def dispose() -> None:
+    if _probe_engine is not None:
+        _probe_engine.dispose()
@@ -0,0 +1,243 @@
+"""
+Очередь фоновых задач в PostgreSQL (таблица jobs).
+
+Тяжелая работа уходит из запроса: эндпоинт кладет задачу в очередь
+(enqueue) в своей транзакции и сразу отвечает, а выполняет ее отдельный
+процесс `python -m app.worker` (см. app/worker.py). Задача попадает в
+очередь только вместе с коммитом данных, ради которых создана, - без
+брокера и без рассогласования между ним и базой.
+
+Воркеры забирают готовые задачи (run_at <= now) через
+``FOR UPDATE SKIP LOCKED``: несколько воркеров не ждут друг друга и не
+берут одну задачу дважды. Упавшая задача повторяется с экспоненциальной
+отсрочкой (JOBS_RETRY_BASE_SECONDS * 2^n, со случайным разбросом), пока не
+исчерпаны попытки. Задачи воркера, переставшего обновлять heartbeat,
+возвращаются в очередь через JOBS_STALE_SECONDS, поэтому задачи должны
+быть идемпотентными.
+
+Завершение задачи проверяет locked_by: воркер, у которого задачу уже
+забрали как зависшую, не перезапишет результат нового исполнителя.
+"""
+
+import logging
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models.jobs import Job
+from app.services.tasks import TASKS
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATUSES = (SUCCEEDED, FAILED, CANCELLED)
+
+# Событие остановки воркера (в процессах пула задает app/worker.py)
+_stop_event = None
+
+
+class Retry(Exception):
+    """Повторить задачу позже, не расходуя попытку (например, воркер останавливается)"""
+
+    def __init__(self, delay: float = 0):
+        super().__init__(delay)
+        self.delay = delay
+
+
+def set_stop_event(event) -> None:
+    global _stop_event
+    _stop_event = event
+
+
+def stopping() -> bool:
+    """Длинные задачи проверяют это на границе порции и отдают задачу через Retry"""
+    return _stop_event is not None and _stop_event.is_set()
+
+
+def backoff(attempt: int) -> float:
+    """Отсрочка перед повтором после попытки номер ``attempt`` (с 1)"""
+    delay = min(settings.JOBS_RETRY_MAX_SECONDS, settings.JOBS_RETRY_BASE_SECONDS * 2 ** (attempt - 1))
+    # Разброс, чтобы задачи, упавшие вместе, не повторялись вместе
+    return delay * random.uniform(0.5, 1.0)
+
+
+def enqueue(
+    db: Session,
+    kind: str,
+    payload: Optional[Dict] = None,
+    *,
+    delay: float = 0,
+    max_attempts: Optional[int] = None,
+    created_by: Optional[UUID] = None,
+) -> Job:
+    """Добавить задачу в сессию; коммит за вызывающим.
+
+    Число попыток по умолчанию - из реестра задач (Task.max_attempts),
+    затем JOBS_MAX_ATTEMPTS.
+    """
+    now = datetime.utcnow()
+    task = TASKS.get(kind)
+    if max_attempts is None and task is not None:
+        max_attempts = task.max_attempts
+    job = Job(
+        kind=kind,
+        payload=payload or {},
+        status=QUEUED,
+        attempts=0,
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+        run_at=now + timedelta(seconds=delay),
+        created_by=created_by,
+        created_at=now,
+    )
+    db.add(job)
+    return job
+
+
+def claim(db: Session, worker: str, limit: int) -> List[Job]:
+    """Забрать до ``limit`` готовых задач; коммит за вызывающим"""
+    now = datetime.utcnow()
+    ready = (
+        select(Job.id)
+        .where(Job.status == QUEUED, Job.run_at <= now)
+        .order_by(Job.run_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    claimed = db.scalars(
+        update(Job)
+        .where(Job.id.in_(ready.scalar_subquery()))
+        .values(status=RUNNING, attempts=Job.attempts + 1, locked_by=worker, started_at=now, heartbeat_at=now)
+        .returning(Job)
+        .execution_options(synchronize_session=False)
+    ).all()
+    return sorted(claimed, key=lambda job: job.run_at)
+
+
+def heartbeat(db: Session, worker: str, job_ids: Sequence[UUID]) -> None:
+    if job_ids:
+        db.execute(
+            update(Job)
+            .where(Job.id.in_(job_ids), Job.status == RUNNING, Job.locked_by == worker)
+            .values(heartbeat_at=datetime.utcnow())
+        )
+
+
+def _owned(db: Session, job_id: UUID, worker: str) -> Optional[Job]:
+    job = db.get(Job, job_id, with_for_update=True, populate_existing=True)
+    if job is None or job.status != RUNNING or job.locked_by != worker:
+        logger.warning(f"Job {job_id} is no longer owned by {worker}")
+        return None
+    return job
+
+
+def complete(db: Session, job_id: UUID, worker: str, result=None) -> None:
+    job = _owned(db, job_id, worker)
+    if job is not None:
+        job.status = SUCCEEDED
+        job.result = result
+        job.error = None
+        job.locked_by = None
+        job.finished_at = datetime.utcnow()
+
+
+def fail(
+    db: Session, job_id: UUID, worker: str, error: str, retry_in: Optional[float] = None, permanent: bool = False
+) -> None:
+    """
+    Ошибка попытки: повтор с отсрочкой или failed, если попытки исчерпаны
+    (или ``permanent``). ``retry_in`` - повтор через заданное время без
+    расхода попытки (Retry).
+    """
+    job = _owned(db, job_id, worker)
+    if job is None:
+        return
+    now = datetime.utcnow()
+    job.error = error[:2000]
+    job.locked_by = None
+    if retry_in is not None:
+        job.status = QUEUED
+        job.attempts -= 1
+        job.run_at = now + timedelta(seconds=retry_in)
+    elif job.attempts < job.max_attempts and not permanent:
+        job.status = QUEUED
+        job.run_at = now + timedelta(seconds=backoff(job.attempts))
+        logger.warning(f"Job {job.id} ({job.kind}) attempt {job.attempts} failed, retry at {job.run_at}: {error}")
+    else:
+        job.status = FAILED
+        job.finished_at = now
+        logger.error(f"Job {job.id} ({job.kind}) failed after {job.attempts} attempts: {error}")
+
+
+def requeue_stale(db: Session) -> int:
+    """Вернуть в очередь задачи воркеров без heartbeat; коммит за вызывающим"""
+    now = datetime.utcnow()
+    stale = (Job.status == RUNNING, Job.heartbeat_at < now - timedelta(seconds=settings.JOBS_STALE_SECONDS))
+    error = "Worker lost (no heartbeat)"
+    requeued = db.execute(
+        update(Job)
+        .where(*stale, Job.attempts < Job.max_attempts)
+        .values(status=QUEUED, run_at=now, locked_by=None, error=error)
+    ).rowcount
+    failed = db.execute(
+        update(Job)
+        .where(*stale, Job.attempts >= Job.max_attempts)
+        .values(status=FAILED, finished_at=now, locked_by=None, error=error)
+    ).rowcount
+    if requeued or failed:
+        logger.warning(f"Stale jobs: {requeued} requeued, {failed} failed")
+    return requeued + failed
+
+
+def purge(db: Session) -> int:
+    """Удалить завершенные задачи старше JOBS_RETENTION_DAYS; коммит за вызывающим"""
+    cutoff = datetime.utcnow() - timedelta(days=settings.JOBS_RETENTION_DAYS)
+    return db.execute(
+        delete(Job).where(Job.status.in_(FINISHED_STATUSES), Job.finished_at < cutoff)
+    ).rowcount
+
+
+def cancel(db: Session, job: Job) -> bool:
+    """Отменить задачу в очереди; выполняемую прервать нельзя"""
+    cancelled = db.execute(
+        update(Job)
+        .where(Job.id == job.id, Job.status == QUEUED)
+        .values(status=CANCELLED, finished_at=datetime.utcnow())
+    ).rowcount
+    db.commit()
+    db.refresh(job)
+    return bool(cancelled)
+
+
+def retry(db: Session, job: Job) -> bool:
+    """Запустить упавшую или отмененную задачу заново с полным запасом попыток"""
+    retried = db.execute(
+        update(Job)
+        .where(Job.id == job.id, Job.status.in_((FAILED, CANCELLED)))
+        .values(status=QUEUED, attempts=0, run_at=datetime.utcnow(), finished_at=None)
+    ).rowcount
+    db.commit()
+    db.refresh(job)
+    return bool(retried)
+
+
+def stats(db: Session) -> Dict:
+    """Число задач по типу и статусу и возраст самой старой готовой задачи"""
+    counts: Dict[str, Dict[str, int]] = {}
+    for kind, status, count in db.execute(select(Job.kind, Job.status, func.count()).group_by(Job.kind, Job.status)):
+        counts.setdefault(kind, {})[status] = count
+    now = datetime.utcnow()
+    oldest = db.scalar(select(func.min(Job.run_at)).where(Job.status == QUEUED, Job.run_at <= now))
+    return {
+        "counts": counts,
+        "oldest_ready_seconds": (now - oldest).total_seconds() if oldest is not None else 0.0,
+    }
@@ -0,0 +1,191 @@
+"""
+Ключи подписи JWT.
+
+JWT_SIGNING_KEYS - PEM-файлы через запятую. Первый закрытый ключ подписывает
+новые токены, остальные (закрытые или только открытые) принимаются при
+проверке - так проходит ротация:
+
+1. добавить новый ключ в конец списка: он публикуется в JWKS, и клиенты
+   успевают его закешировать;
+2. переставить его первым: им подписываются новые токены;
+3. через REFRESH_TOKEN_EXPIRE_DAYS убрать старый ключ.
+
+kid - отпечаток открытого ключа (RFC 7638), поэтому он не зависит от имени
+файла и одинаков во всех воркерах. Алгоритм определяется типом ключа: RSA -
+RS256, EC P-256 - ES256 (EdDSA python-jose не поддерживает).
+
+Без JWT_SIGNING_KEYS токены подписываются SECRET_KEY (HS256), как раньше;
+JWKS тогда пуст. При заданных ключах токены без kid проверяются SECRET_KEY
+только в переходное окно (переход с HS256 без повторного входа): до
+JWT_LEGACY_HS256_UNTIL или, явно и бессрочно, при JWT_ACCEPT_LEGACY_HS256.
+По умолчанию окна нет - старые токены отклоняются.
+
+Ключи разбираются один раз на процесс (get_key_manager).
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import sys
+import logging
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Члены JWK, входящие в отпечаток (RFC 7638)
+_THUMBPRINT_MEMBERS = {"RSA": ("e", "kty", "n"), "EC": ("crv", "kty", "x", "y")}
+
+
+def _algorithm(pem: bytes) -> str:
+    from cryptography.hazmat.primitives.asymmetric import ec, rsa
+    from cryptography.hazmat.primitives.serialization import load_pem_private_key, load_pem_public_key
+
+    try:
+        key = load_pem_private_key(pem, password=None)
+    except ValueError:
+        key = load_pem_public_key(pem)
+    if isinstance(key, (rsa.RSAPrivateKey, rsa.RSAPublicKey)):
+        return "RS256"
+    if isinstance(key, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey)) and key.curve.name == "secp256r1":
+        return "ES256"
+    raise ValueError(f"Unsupported key type: {type(key).__name__} (need RSA or EC P-256)")
+
+
+def _thumbprint(public_jwk: Dict) -> str:
+    members = {name: public_jwk[name] for name in _THUMBPRINT_MEMBERS[public_jwk["kty"]]}
+    canonical = json.dumps(members, separators=(",", ":"), sort_keys=True).encode()
+    return base64.urlsafe_b64encode(hashlib.sha256(canonical).digest()).rstrip(b"=").decode()[:16]
+
+
+class SigningKey:
+    """Разобранный ключ: объекты jose для подписи и проверки, открытая часть для JWKS"""
+
+    def __init__(self, pem: bytes):
+        from jose import jwk
+
+        self.algorithm = _algorithm(pem)
+        self.key = jwk.construct(pem, self.algorithm)
+        self.can_sign = self.key.is_public() is False
+        # EC-ключ jose проверяет подпись только открытой частью
+        self.public_key = self.key.public_key() if self.can_sign else self.key
+        self.public_jwk = {
+            k: (v.decode() if isinstance(v, bytes) else v) for k, v in self.public_key.to_dict().items()
+        }
+        self.kid = _thumbprint(self.public_jwk)
+        self.public_jwk.update(kid=self.kid, use="sig", alg=self.algorithm)
+
+
+class KeyManager:
+    def __init__(
+        self,
+        paths: List[str],
+        secret: str,
+        secret_algorithm: str,
+        legacy_hs256: bool,
+        legacy_until: Optional[datetime] = None,
+    ):
+        from jose import jwk
+
+        self.keys: Dict[str, SigningKey] = {}
+        self.active: Optional[SigningKey] = None
+        for path in paths:
+            key = SigningKey(Path(path).read_bytes())
+            self.keys[key.kid] = key
+            if self.active is None and key.can_sign:
+                self.active = key
+        if self.keys and self.active is None:
+            raise ValueError("JWT_SIGNING_KEYS has no private key to sign with")
+        # Общий секрет (ALGORITHM, HS256): основной режим без ключей или старые токены без kid
+        self.secret_algorithm = secret_algorithm
+        accept_legacy = legacy_hs256 or legacy_until is not None or not self.keys
+        self.legacy = jwk.construct(secret, secret_algorithm) if accept_legacy else None
+        # Срок окна (naive UTC, как datetime.utcnow); None - без срока
+        if legacy_until is not None and legacy_until.tzinfo is not None:
+            legacy_until = legacy_until.astimezone(timezone.utc).replace(tzinfo=None)
+        self.legacy_until = legacy_until if self.keys and not legacy_hs256 else None
+        if self.keys and legacy_hs256:
+            logger.warning("JWT_ACCEPT_LEGACY_HS256 is on: tokens signed with SECRET_KEY are accepted indefinitely")
+        self._jwks = json.dumps({"keys": [key.public_jwk for key in self.keys.values()]}).encode()
+
+    def encode(self, claims: Dict) -> str:
+        from jose import jwt
+
+        if self.active is None:
+            return jwt.encode(claims, self.legacy, algorithm=self.secret_algorithm)
+        return jwt.encode(claims, self.active.key, algorithm=self.active.algorithm, headers={"kid": self.active.kid})
+
+    def decode(self, token: str) -> Dict:
+        """Проверка подписи ключом из kid; JWTError, если ключ неизвестен"""
+        from jose import JWTError, jwt
+
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid is None:
+            if self.legacy is None or (self.legacy_until is not None and datetime.utcnow() >= self.legacy_until):
+                raise JWTError("Token without kid")
+            return jwt.decode(token, self.legacy, algorithms=[self.secret_algorithm])
+        key = self.keys.get(kid)
+        if key is None:
+            raise JWTError("Unknown signing key")
+        # Алгоритм задает ключ, а не заголовок токена
+        return jwt.decode(token, key.public_key, algorithms=[key.algorithm])
+
+    def jwks(self) -> bytes:
+        """JWKS (RFC 7517) с открытыми ключами, готовый к отдаче"""
+        return self._jwks
+
+
+@lru_cache(maxsize=None)
+def get_key_manager() -> KeyManager:
+    paths = [path.strip() for path in settings.JWT_SIGNING_KEYS.split(",") if path.strip()]
+    return KeyManager(
+        paths, settings.SECRET_KEY, settings.ALGORITHM, settings.JWT_ACCEPT_LEGACY_HS256, settings.JWT_LEGACY_HS256_UNTIL
+    )
+
+
+def generate(algorithm: str) -> bytes:
+    """Новый закрытый ключ в PEM"""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, rsa
+
+    if algorithm == "RS256":
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    elif algorithm == "ES256":
+        key = ec.generate_private_key(ec.SECP256R1())
+    else:
+        raise ValueError(f"Unsupported algorithm: {algorithm}")
+    return key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Ключи подписи JWT")
+    commands = parser.add_subparsers(dest="command", required=True)
+    gen = commands.add_parser("generate", help="создать закрытый ключ и вывести его kid")
+    gen.add_argument("--alg", choices=("ES256", "RS256"), default="ES256")
+    gen.add_argument("--out", required=True, help="файл PEM")
+    commands.add_parser("jwks", help="вывести JWKS для текущих JWT_SIGNING_KEYS")
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        out = Path(args.out)
+        if out.exists():
+            print(f"{out} already exists", file=sys.stderr)
+            return 1
+        pem = generate(args.alg)
+        out.touch(mode=0o600)
+        out.write_bytes(pem)
+        print(SigningKey(pem).kid)
+    else:
+        print(get_key_manager().jwks().decode())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""
+Профилирование отдельных запросов.
+
+Статистический семплер раз в PROFILING_SAMPLE_INTERVAL_MS снимает стеки всех
+потоков через sys._current_frames() и оставляет только стеки с кадрами из
+пакета app (так отсекаются простаивающие потоки threadpool). Результат
+сохраняется в collapsed-формате ("кадр;кадр;кадр N"), который понимают
+flamegraph.pl и speedscope.
+
+Семплер общий для процесса: если одновременно профилируется несколько
+запросов, их стеки попадают в профили друг друга. Для разбора выбросов p99
+этого достаточно, а накладные расходы не зависят от числа запросов.
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+
+_APP_DIR = str(Path(__file__).resolve().parent.parent)
+_MAX_STACK_DEPTH = 64
+
+
+class SqlCapture:
+    """SQL запросы одного HTTP запроса с таймингами"""
+
+    __slots__ = ("statements", "dropped")
+
+    def __init__(self):
+        self.statements: List[Dict] = []
+        self.dropped = 0
+
+    def add(self, statement: str, duration: float) -> None:
+        if len(self.statements) >= settings.PROFILING_MAX_STATEMENTS:
+            self.dropped += 1
+            return
+        self.statements.append({"statement": statement, "duration_ms": round(duration * 1000, 3)})
+
+
+sql_capture: ContextVar[Optional[SqlCapture]] = ContextVar("sql_capture", default=None)
+
+
+def record_statement(statement: str, duration: float) -> None:
+    capture = sql_capture.get()
+    if capture is not None:
+        capture.add(statement, duration)
+
+
+class StackSampler:
+    """Общий для процесса семплер стеков; работает, пока есть хотя бы одна сессия"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._sessions: List[Counter] = []
+        self._thread: Optional[threading.Thread] = None
+
+    def start_session(self) -> Counter:
+        samples: Counter = Counter()
+        with self._lock:
+            self._sessions.append(samples)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+                self._thread.start()
+        return samples
+
+    def stop_session(self, samples: Counter) -> None:
+        with self._lock:
+            self._sessions.remove(samples)
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while True:
+            stacks = []
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = _collapse(frame)
+                if stack is not None:
+                    stacks.append(stack)
+            with self._lock:
+                if not self._sessions:
+                    self._thread = None
+                    return
+                # Обновляем под блокировкой: после stop_session сессия больше не меняется
+                for samples in self._sessions:
+                    samples.update(stacks)
+            time.sleep(self.interval)
+
+
+def _collapse(frame) -> Optional[str]:
+    frames = []
+    has_app_frame = False
+    while frame is not None and len(frames) < _MAX_STACK_DEPTH:
+        code = frame.f_code
+        if code.co_filename.startswith(_APP_DIR):
+            has_app_frame = True
+        frames.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+        frame = frame.f_back
+    if not has_app_frame:
+        return None
+    return ";".join(reversed(frames))
+
+
+sampler = StackSampler(settings.PROFILING_SAMPLE_INTERVAL_MS / 1000)
+
+
+def write_report(report: Dict) -> Path:
+    """Сохранить отчет и удалить самые старые, если их больше PROFILING_MAX_FILES"""
+    directory = Path(settings.PROFILING_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    # request_id может прийти из заголовка клиента - оставляем только безопасные символы
+    safe_id = re.sub(r"[^A-Za-z0-9_-]", "", str(report["request_id"]))[:64]
+    path = directory / f"{time.strftime('%Y%m%d-%H%M%S')}-{safe_id}.json"
+    path.write_text(json.dumps(report, ensure_ascii=False, default=str))
+
+    reports = sorted(directory.glob("*.json"), key=lambda p: p.stat().st_mtime)
+    for old in reports[:-settings.PROFILING_MAX_FILES]:
+        old.unlink(missing_ok=True)
+    return path
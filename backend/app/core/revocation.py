@@ -0,0 +1,198 @@
+"""
+Отзыв токенов без обращения к базе на каждом запросе.
+
+Отозванные jti (и семейства refresh-токенов) пишутся в revoked_tokens, а
+каждый воркер держит их копию в памяти:
+
+- фильтр Блума фиксированного размера - быстрый отрицательный ответ для
+  подавляющего большинства (неотозванных) токенов;
+- точное множество id -> срок, ограниченное REVOCATION_EXACT_MAX, снимает
+  ложные срабатывания фильтра. Если отозванных больше лимита, положительный
+  ответ фильтра считается отзывом (ошибка в безопасную сторону).
+
+Фоновая задача каждые REVOCATION_POLL_SECONDS дочитывает новые строки
+(отзывы в других воркерах), а раз в REVOCATION_REBUILD_SECONDS
+перестраивает структуры целиком: истекшие записи из фильтра не удалить
+иначе, заодно удаляются и истекшие строки таблицы.
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import delete, event, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db.dialect import insert
+from app.db.models.revoked_tokens import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+# Запас при инкрементальном опросе: строка, закоммиченная позже своего
+# revoked_at, все равно попадет в следующий опрос
+_POLL_OVERLAP = timedelta(seconds=60)
+
+
+class BloomFilter:
+    """Фильтр Блума на bytearray; позиции - двойное хеширование blake2b"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(1, capacity)
+        self.bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self._array = bytearray((self.bits + 7) // 8)
+
+    def _positions(self, key: str) -> Iterable[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.bits for i in range(self.hashes))
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._array[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._array[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class Denylist:
+    """Отозванные id в памяти воркера: проверка O(1) без базы"""
+
+    def __init__(self, capacity: int, error_rate: float, exact_max: int):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.exact_max = exact_max
+        self._lock = threading.Lock()
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._exact: Dict[str, datetime] = {}
+        self._complete = True  # все отозванные id есть в _exact
+        self.last_seen: Optional[datetime] = None
+        self.rebuilt_at: Optional[datetime] = None
+
+    def add(self, key: str, expires_at: datetime) -> None:
+        with self._lock:
+            self._bloom.add(key)
+            if len(self._exact) < self.exact_max:
+                self._exact[key] = expires_at
+            elif key not in self._exact:
+                self._complete = False
+
+    def is_revoked(self, *keys: Optional[str]) -> bool:
+        bloom, exact, complete = self._bloom, self._exact, self._complete
+        now = None
+        for key in keys:
+            if key is None or key not in bloom:
+                continue
+            if not complete:
+                return True
+            expires_at = exact.get(key)
+            if expires_at is not None:
+                now = now or datetime.utcnow()
+                if expires_at > now:
+                    return True
+        return False
+
+    def rebuild(self, entries: Dict[str, datetime], last_seen: Optional[datetime]) -> None:
+        """Заменить содержимое целиком (истекшие записи уже отброшены)"""
+        bloom = BloomFilter(max(self.capacity, len(entries)), self.error_rate)
+        exact: Dict[str, datetime] = {}
+        for key, expires_at in entries.items():
+            bloom.add(key)
+            if len(exact) < self.exact_max:
+                exact[key] = expires_at
+        with self._lock:
+            self._bloom, self._exact = bloom, exact
+            self._complete = len(entries) <= self.exact_max
+            self.last_seen = last_seen
+            self.rebuilt_at = datetime.utcnow()
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+
+denylist = Denylist(
+    capacity=settings.REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.REVOCATION_BLOOM_ERROR_RATE,
+    exact_max=settings.REVOCATION_EXACT_MAX,
+)
+
+
+_PENDING_KEY = "revoked_pending"
+
+
+def revoke(db: Session, key: str, expires_at: datetime) -> bool:
+    """
+    Отозвать jti или семейство; False - уже был отозван (для ротации это
+    признак повторного использования refresh-токена). Коммит за вызывающим:
+    в denylist воркера id попадает только после коммита, откат его отбрасывает.
+    """
+    stmt = insert(db, RevokedToken).values(
+        id=key, expires_at=expires_at, revoked_at=datetime.utcnow()
+    ).on_conflict_do_nothing(index_elements=[RevokedToken.id]).returning(RevokedToken.id)
+    inserted = db.execute(stmt).first() is not None
+    db.info.setdefault(_PENDING_KEY, {})[key] = expires_at
+    return inserted
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(db: Session) -> None:
+    for key, expires_at in db.info.pop(_PENDING_KEY, {}).items():
+        denylist.add(key, expires_at)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(db: Session) -> None:
+    db.info.pop(_PENDING_KEY, None)
+
+
+def is_revoked_in_db(db: Session, *keys: Optional[str]) -> bool:
+    """Точная проверка по таблице - для редких операций (ротация), не для каждого запроса"""
+    keys = [key for key in keys if key is not None]
+    if not keys:
+        return False
+    return db.scalar(
+        select(RevokedToken.id).where(RevokedToken.id.in_(keys), RevokedToken.expires_at > datetime.utcnow()).limit(1)
+    ) is not None
+
+
+def sync_denylist(full: bool = False) -> None:
+    """Дочитать новые отзывы из базы (full=True - перестроить и почистить таблицу)"""
+    from app.db.session import SessionLocal
+
+    now = datetime.utcnow()
+    with SessionLocal() as db:
+        if full or denylist.last_seen is None:
+            db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+            db.commit()
+            rows = db.execute(select(RevokedToken.id, RevokedToken.expires_at, RevokedToken.revoked_at)).all()
+            last_seen = max((row.revoked_at for row in rows), default=now)
+            denylist.rebuild({row.id: row.expires_at for row in rows}, last_seen)
+            logger.info(f"Token denylist rebuilt: {len(rows)} entries")
+            return
+        rows = db.execute(
+            select(RevokedToken.id, RevokedToken.expires_at, RevokedToken.revoked_at)
+            .where(RevokedToken.revoked_at > denylist.last_seen - _POLL_OVERLAP, RevokedToken.expires_at > now)
+        ).all()
+    for row in rows:
+        denylist.add(row.id, row.expires_at)
+        denylist.last_seen = max(denylist.last_seen, row.revoked_at)
+
+
+async def refresh_loop() -> None:
+    while True:
+        rebuild = (
+            denylist.rebuilt_at is None
+            or datetime.utcnow() - denylist.rebuilt_at >= timedelta(seconds=settings.REVOCATION_REBUILD_SECONDS)
+        )
+        try:
+            await run_in_threadpool(sync_denylist, rebuild)
+        except Exception as e:
+            logger.error(f"Token denylist sync failed: {str(e)}")
+        await asyncio.sleep(settings.REVOCATION_POLL_SECONDS)
@@ -0,0 +1,41 @@
+"""
+Шаблон маршрута запроса: метка метрик, ключ семплирования логов
+(LOG_ROUTE_SAMPLE_RATES) и поле отчетов профилировщика.
+
+FastAPI 0.14x кладет в scope["route"] исходный маршрут роутера, его path
+без префикса include_router ("/tests/{test_id}" вместо
+"/api/v1/tests/{test_id}"), и маршруты разных роутеров совпадали бы.
+Полный шаблон берется из таблицы маршрутов приложения, собранной один раз.
+"""
+
+from typing import Dict
+
+from starlette.requests import Request
+
+try:
+    from fastapi.routing import iter_route_contexts
+except ImportError:  # старые версии копируют маршруты с префиксом: route.path уже полный
+    iter_route_contexts = None
+
+UNMATCHED = "unmatched"
+
+
+def _templates(app) -> Dict[int, str]:
+    templates = getattr(app.state, "route_templates", None)
+    if templates is None:
+        templates = {}
+        if iter_route_contexts is not None:
+            for context in iter_route_contexts(app.routes):
+                path = getattr(context, "path_format", None) or context.path
+                if path:
+                    templates.setdefault(id(context.original_route), path)
+        app.state.route_templates = templates
+    return templates
+
+
+def route_template(request: Request) -> str:
+    """Полный шаблон маршрута ("/api/v1/tests/{test_id}") или "unmatched" """
+    route = request.scope.get("route")
+    if route is None:
+        return UNMATCHED
+    return _templates(request.app).get(id(route)) or getattr(route, "path", None) or UNMATCHED
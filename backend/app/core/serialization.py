@@ -0,0 +1,49 @@
+"""
+Быстрый путь сериализации ответов.
+
+Вместо цепочки response_model -> jsonable_encoder -> json.dumps модель
+валидируется один раз из ORM объекта и сразу превращается в байты
+средствами pydantic-core. Эндпоинт возвращает готовый Response, поэтому
+FastAPI не валидирует ответ повторно.
+"""
+
+from functools import lru_cache
+from typing import Any, List
+
+import orjson
+from fastapi.responses import JSONResponse, Response
+from pydantic import TypeAdapter
+
+from app.schemas.test import TestCreate
+
+
+class FastJSONResponse(JSONResponse):
+    """Ответ по умолчанию: orjson вместо json.dumps"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+class RawJSONResponse(Response):
+    """Ответ из уже сериализованных JSON байтов"""
+
+    media_type = "application/json"
+
+
+@lru_cache(maxsize=None)
+def _adapter(schema) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+def dump_model(schema, obj: Any) -> bytes:
+    """ORM объект -> JSON байты через схему pydantic (одна валидация, без промежуточного dict)"""
+    adapter = _adapter(schema)
+    return adapter.dump_json(adapter.validate_python(obj, from_attributes=True))
+
+
+def dump_test(test) -> bytes:
+    return dump_model(TestCreate, test)
+
+
+def dump_tests(tests) -> bytes:
+    return dump_model(List[TestCreate], tests)
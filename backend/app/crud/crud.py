@@ -1,27 +1,40 @@
 from fastapi import HTTPException, status
+from sqlalchemy import literal, select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 import logging
+from datetime import datetime
+from typing import Optional
 from uuid import UUID
-from app.db.models.questions import Question
 from app.db.models.test import Test
 from app.db.models.test_attempts import TestAttempt
+from app.db.models.active_attempts import ActiveAttempt
+from app.db.dialect import insert
+from app.db.ids import uuid7
+from app.schemas.bulk_job import BulkJobCreate
 from app.schemas.test import TestCreate
+from app.services.bulk import create_job, delete_tests
+from app.services.versions import publish
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
 
 def delete_test_by_id(db: Session, test_id: UUID):
     try:
-        test = db.query(Test).filter(Test.id == test_id).first()
-        if not test:
+        if db.get(Test, test_id) is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Тест не найден!!!"
             )
-        db.delete(test)
+        # Попытки и ответы удаляются явно: каскады ORM грузили бы их в память
+        if delete_tests(db, [test_id]):
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Тест сейчас проходят, удаление невозможно"
+            )
         db.commit()
-        return{"message": f"Задача {test.id} удалена!"}
+        return{"message": f"Задача {test_id} удалена!"}
     except SQLAlchemyError as e:
         db.rollback()
         raise HTTPException(
@@ -29,21 +42,14 @@ def delete_test_by_id(db: Session, test_id: UUID):
             detail=f"Ошибка базы данных: {str(e)}"
         )
 
-def delete_all_tests(db: Session):
-    try:
-        db.query(Question).delete()
-        deleted_count = db.query(Test).delete()
-        db.commit()
-        return {
-            "message": "Все тесты удалены",
-            "deleted_tests": deleted_count
-        }        
-    except SQLAlchemyError as e:
-        db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Ошибка базы данных: {str(e)}"            
-        )
+def delete_all_tests(db: Session, user_id: Optional[UUID] = None):
+    """Удаление всех тестов - фоновая массовая операция порциями (см. app/services/bulk.py)"""
+    job = create_job(db, BulkJobCreate(action="delete"), user_id)
+    return {
+        "message": "Удаление тестов запущено",
+        "job_id": str(job.id),
+        "total_tests": job.total
+    }
 
 def get_tests(db: Session, skip: int = 0, limit: int = 10):
     """Получение списка тестов с пагинацией"""
@@ -55,8 +61,6 @@ def create_test(db: Session, test_data: TestCreate):
     
     # Валидация вопросов
     for i, question in enumerate(test_data.questions):
-        logger.info(f"Validating question {i+1}: type={question.question_type}, has_options={question.options is not None}, correct_answers={question.correct_answers}")
-        
         # Для вопросов с выбором проверяем индексы
         if question.question_type in ["single_choice", "multiple_choice"]:
             if not question.options:
@@ -86,33 +90,22 @@ def create_test(db: Session, test_data: TestCreate):
                     detail=f"Вопрос {i+1}: для открытых вопросов не должно быть вариантов ответа"
                 )
     
-    logger.info("All questions validated successfully")
-    
     try:
         # Создаем тест
         test_obj = Test(
             title=test_data.title,
             description=test_data.description,
             duration=test_data.duration,
-            is_active=test_data.is_active
+            is_active=test_data.is_active,
+            scoring_policy=test_data.scoring_policy,
+            pause_budget_seconds=test_data.pause_budget_seconds,
+            max_pauses=test_data.max_pauses
         )
         db.add(test_obj)
         db.flush()  # Получаем ID без коммита
-        logger.info(f"Test object created with ID: {test_obj.id}")
-        
-        # Создаем вопросы
-        questions = [
-            Question(
-                test_id=test_obj.id,
-                question_text=q.question_text,
-                options=q.options,
-                correct_answers=q.correct_answers,
-                question_type=q.question_type
-            )
-            for i, q in enumerate(test_data.questions)
-        ]
         
-        db.bulk_save_objects(questions)
+        # Вопросы - первая опубликованная версия теста
+        publish(db, test_obj, [q.model_dump() for q in test_data.questions])
         db.commit()
         db.refresh(test_obj)  # Обновляем объект после коммита
         logger.info(f"Test and questions saved successfully")
@@ -153,9 +146,7 @@ def get_test_by_id(db: Session, test_id: UUID):
             detail="Тест не найден"
         )
     
-    # Явная загрузка вопросов
-    test.questions = db.query(Question).filter(Question.test_id == test_id).all()
-    
+    # test.questions - вопросы текущей версии
     return test
 
 def update_test(db: Session, test_id: UUID, test_data: TestCreate):
@@ -163,8 +154,8 @@ def update_test(db: Session, test_id: UUID, test_data: TestCreate):
     logger.info(f"Starting test update for ID: {test_id}")
     
     try:
-        # Находим существующий тест
-        test = db.query(Test).filter(Test.id == test_id).first()
+        # Находим существующий тест; блокировка сериализует публикации версий
+        test = db.query(Test).filter(Test.id == test_id).with_for_update().first()
         if not test:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -176,11 +167,11 @@ def update_test(db: Session, test_id: UUID, test_data: TestCreate):
         test.description = test_data.description
         test.duration = test_data.duration
         test.is_active = test_data.is_active
+        test.scoring_policy = test_data.scoring_policy
+        test.pause_budget_seconds = test_data.pause_budget_seconds
+        test.max_pauses = test_data.max_pauses
         
-        # Удаляем старые вопросы
-        db.query(Question).filter(Question.test_id == test_id).delete()
-        
-        # Валидация и создание новых вопросов
+        # Валидация новых вопросов
         for i, question in enumerate(test_data.questions):
             if question.question_type in ["single_choice", "multiple_choice"]:
                 if not question.options:
@@ -199,19 +190,9 @@ def update_test(db: Session, test_id: UUID, test_data: TestCreate):
                             detail=f"Вопрос {i+1}: недопустимые индексы ответов {invalid_indices}"
                         )
         
-        # Создаем новые вопросы
-        questions = [
-            Question(
-                test_id=test_id,
-                question_text=q.question_text,
-                options=q.options,
-                correct_answers=q.correct_answers,
-                question_type=q.question_type
-            )
-            for q in test_data.questions
-        ]
-        
-        db.bulk_save_objects(questions)
+        # Новая версия: старые вопросы не трогаем, начатые попытки
+        # дорабатывают и проверяются по своей версии
+        publish(db, test, [q.model_dump() for q in test_data.questions])
         db.commit()
         db.refresh(test)
         
@@ -235,16 +216,54 @@ def update_test(db: Session, test_id: UUID, test_data: TestCreate):
             detail=f"Непредвиденная ошибка: {str(e)}"
         )
 def create_test_attempt(db: Session, test_id: UUID, user_id: UUID):
-    """Создание записи о прохождении теста"""
+    """
+    Начать прохождение теста или вернуть уже начатую попытку.
+
+    Заявка INSERT ... SELECT из tests (тест должен существовать и быть
+    активным) в active_attempts с ON CONFLICT по первичному ключу
+    (user_id, test_id) возвращает id незавершенной попытки - новой или уже
+    существующей. Новая попытка вставляется в той же транзакции на текущей
+    версии теста, существующая читается по id (с отсечением секций) и
+    остается на своей версии. Если тест деактивировали во время
+    прохождения, INSERT ничего не выбирает - тогда начатая попытка ищется
+    по заявке: отказ получают только новые попытки. Возвращает (попытка,
+    создана ли).
+    """
+    now = datetime.utcnow()
+    new_id = uuid7(now)
+    source = select(
+        literal(user_id, ActiveAttempt.user_id.type),
+        Test.id,
+        literal(new_id, ActiveAttempt.attempt_id.type),
+    ).where(Test.id == test_id, Test.is_active.is_(True))
+
+    claim = insert(db, ActiveAttempt).from_select(["user_id", "test_id", "attempt_id"], source)
+    claim = claim.on_conflict_do_update(
+        index_elements=[ActiveAttempt.user_id, ActiveAttempt.test_id],
+        # no-op обновление, чтобы RETURNING вернул существующую заявку
+        set_={"attempt_id": ActiveAttempt.__table__.c.attempt_id},
+    ).returning(ActiveAttempt.attempt_id)
+
     try:
-        test_attempt = TestAttempt(
-            test_id=test_id,
-            user_id=user_id
-        )
-        db.add(test_attempt)
+        attempt_id = db.execute(claim).scalar()
+        if attempt_id is None:
+            attempt_id = db.scalar(
+                select(ActiveAttempt.attempt_id)
+                .where(ActiveAttempt.user_id == user_id, ActiveAttempt.test_id == test_id)
+            )
+        if attempt_id is None:
+            test_attempt = None
+        elif attempt_id == new_id:
+            version_id = db.scalar(select(Test.current_version_id).where(Test.id == test_id))
+            test_attempt = TestAttempt(
+                id=new_id, user_id=user_id, test_id=test_id, test_version_id=version_id,
+                started_at=now, status="in_progress"
+            )
+            db.add(test_attempt)
+            db.flush()
+        else:
+            test_attempt = db.get(TestAttempt, attempt_id, populate_existing=True)
         db.commit()
-        db.refresh(test_attempt)
-        return test_attempt
     except SQLAlchemyError as e:
         db.rollback()
         logger.error(f"SQLAlchemy error during test attempt creation: {str(e)}")
@@ -253,6 +272,13 @@ def create_test_attempt(db: Session, test_id: UUID, user_id: UUID):
             detail=f"Ошибка базы данных: {str(e)}"
         )
 
+    if test_attempt is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Тест не найден или неактивен"
+        )
+    return test_attempt, test_attempt.id == new_id
+
 def get_user_attempts(db: Session, user_id: UUID):
     """Получение всех попыток прохождения тестов для пользователя"""
     return db.query(TestAttempt).filter(TestAttempt.user_id == user_id).all() 
\ No newline at end of file
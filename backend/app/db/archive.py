@@ -0,0 +1,499 @@
+"""
+Архив завершенных попыток: сжатые колоночные файлы (Parquet, zstd).
+
+Попытки, завершенные раньше окна хранения (ARCHIVE_RETENTION_DAYS),
+переносятся из test_attempts/user_answers в пары файлов
+``<метка>.attempts.parquet`` и ``<метка>.answers.parquet``. Строки
+отсортированы по тесту, одна группа строк (row group) - один тест, так что
+аналитика по тесту читает только свою группу, а статистика min/max по id
+позволяет пропускать остальные.
+
+Группы по тесту не помогают искать по пользователю: его попытки разбросаны
+по всем группам всех файлов. Поэтому к паре пишется индекс
+``<метка>.users.parquet`` - строки (user_id, test_id, attempt_id),
+отсортированные по пользователю, мелкими группами. Воркер держит в памяти
+только user_id -> метки пачек и дочитывает индексы новых пачек; история
+пользователя открывает лишь его пачки и читает группы его тестов.
+
+Чтение идет через memory-map: страницы файла подгружает ОС, процесс не
+держит архив в памяти.
+
+Обслуживание (cron, раз в сутки):
+
+    python -m app.db.archive run                       # окно из настроек
+    python -m app.db.archive run --older-than-days 730 --dir /var/backups/archive
+    python -m app.db.archive stats --test-id <uuid>
+    python -m app.db.archive index                     # индексы для пачек, записанных до них
+
+pyarrow нужен только здесь и импортируется при первом обращении.
+"""
+
+import argparse
+import logging
+import sys
+import threading
+from datetime import datetime, timedelta
+from itertools import groupby
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.db.models.test_attempts import TestAttempt
+from app.db.models.user_answers import UserAnswer
+
+logger = logging.getLogger(__name__)
+
+# Завершенные состояния (см. app/services/attempts.py)
+FINISHED_STATUSES = ("completed", "abandoned", "expired")
+
+ATTEMPTS_SUFFIX = ".attempts.parquet"
+ANSWERS_SUFFIX = ".answers.parquet"
+USERS_SUFFIX = ".users.parquet"
+
+# Строк в группе индекса: статистика min/max по user_id отсекает остальные
+_INDEX_GROUP_ROWS = 4096
+
+# Размер IN-списка при выборке ответов пачки
+_IN_CHUNK = 1000
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.parquet
+    except ImportError as e:
+        raise RuntimeError("Для архива нужен pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def _schemas():
+    pa = _pyarrow()
+    uuid_type = pa.string()  # строкой: статистика min/max совпадает с порядком UUID
+    timestamp = pa.timestamp("us")
+    attempts = pa.schema([
+        ("id", uuid_type),
+        ("user_id", uuid_type),
+        ("test_id", uuid_type),
+        ("test_version_id", uuid_type),  # нет в файлах до версий тестов
+        ("started_at", timestamp),
+        ("completed_at", timestamp),
+        ("score", pa.float64()),  # int32 в файлах до частичных баллов
+        ("max_score", pa.int32()),
+        ("status", pa.string()),
+        ("version", pa.int32()),
+        ("paused_seconds", pa.int32()),
+    ])
+    answers = pa.schema([
+        ("id", uuid_type),
+        ("attempt_id", uuid_type),
+        ("test_id", uuid_type),
+        ("user_id", uuid_type),
+        ("question_id", uuid_type),
+        ("selected_options", pa.list_(pa.int32())),
+        ("text_answer", pa.string()),
+        ("is_correct", pa.bool_()),
+        ("points_earned", pa.float64()),  # int32 в файлах до частичных баллов
+        ("answered_at", timestamp),
+    ])
+    return attempts, answers
+
+
+def _index_schema():
+    pa = _pyarrow()
+    return pa.schema([("user_id", pa.string()), ("test_id", pa.string()), ("attempt_id", pa.string())])
+
+
+# --- Запись ------------------------------------------------------------------
+
+def _attempt_row(attempt: TestAttempt) -> Dict:
+    return {
+        "id": str(attempt.id),
+        "user_id": str(attempt.user_id),
+        "test_id": str(attempt.test_id),
+        "test_version_id": str(attempt.test_version_id),
+        "started_at": attempt.started_at,
+        "completed_at": attempt.completed_at,
+        "score": attempt.score,
+        "max_score": attempt.max_score,
+        "status": attempt.status,
+        "version": attempt.version,
+        "paused_seconds": attempt.paused_seconds,
+    }
+
+
+def _answer_row(answer: UserAnswer, attempt: TestAttempt) -> Dict:
+    return {
+        "id": str(answer.id),
+        "attempt_id": str(answer.attempt_id),
+        "test_id": str(attempt.test_id),
+        "user_id": str(attempt.user_id),
+        "question_id": str(answer.question_id),
+        "selected_options": answer.selected_options,
+        "text_answer": answer.text_answer,
+        "is_correct": answer.is_correct,
+        "points_earned": answer.points_earned,
+        "answered_at": answer.answered_at,
+    }
+
+
+def _load_answers(db: Session, attempts: Sequence[TestAttempt]) -> Dict[UUID, List[UserAnswer]]:
+    answers: Dict[UUID, List[UserAnswer]] = {attempt.id: [] for attempt in attempts}
+    ids = list(answers)
+    for start in range(0, len(ids), _IN_CHUNK):
+        rows = db.scalars(
+            select(UserAnswer)
+            .where(UserAnswer.attempt_id.in_(ids[start:start + _IN_CHUNK]))
+            .order_by(UserAnswer.attempt_id, UserAnswer.answered_at)
+        )
+        for answer in rows:
+            answers[answer.attempt_id].append(answer)
+    return answers
+
+
+def _write_index(path: Path, rows: List[Dict]) -> None:
+    """Индекс пачки по пользователю: (user_id, test_id, attempt_id) по возрастанию"""
+    pa = _pyarrow()
+    rows.sort(key=lambda row: (row["user_id"], row["test_id"]))
+    pa.parquet.write_table(
+        pa.Table.from_pylist(rows, schema=_index_schema()), path,
+        row_group_size=_INDEX_GROUP_ROWS, compression="zstd", write_statistics=True,
+    )
+
+
+def _write_batch(directory: Path, stem: str, attempts: Sequence[TestAttempt],
+                 answers: Dict[UUID, List[UserAnswer]]) -> Tuple[Path, Path, Path]:
+    """Пара файлов и индекс во временных именах; одна группа строк на тест"""
+    pa = _pyarrow()
+    attempts_schema, answers_schema = _schemas()
+    paths = (
+        directory / f"{stem}{ATTEMPTS_SUFFIX}.tmp",
+        directory / f"{stem}{ANSWERS_SUFFIX}.tmp",
+        directory / f"{stem}{USERS_SUFFIX}.tmp",
+    )
+    options = {"compression": "zstd", "write_statistics": True}
+    with pa.parquet.ParquetWriter(paths[0], attempts_schema, **options) as attempts_writer, \
+            pa.parquet.ParquetWriter(paths[1], answers_schema, **options) as answers_writer:
+        for _, group in groupby(attempts, key=lambda attempt: attempt.test_id):
+            group = list(group)
+            rows = [_attempt_row(attempt) for attempt in group]
+            attempts_writer.write_table(
+                pa.Table.from_pylist(rows, schema=attempts_schema), row_group_size=len(rows)
+            )
+            answer_rows = [_answer_row(answer, attempt) for attempt in group for answer in answers[attempt.id]]
+            if answer_rows:
+                answers_writer.write_table(
+                    pa.Table.from_pylist(answer_rows, schema=answers_schema), row_group_size=len(answer_rows)
+                )
+    _write_index(paths[2], [
+        {"user_id": str(attempt.user_id), "test_id": str(attempt.test_id), "attempt_id": str(attempt.id)}
+        for attempt in attempts
+    ])
+    return paths
+
+
+def archive_attempts(
+    engine: Engine,
+    directory: Path,
+    completed_before: datetime,
+    batch_size: int = 5000,
+    id_range: Optional[Tuple[UUID, UUID]] = None,
+) -> List[Path]:
+    """
+    Перенести завершенные до ``completed_before`` попытки и их ответы в архив.
+
+    Каждая пачка - одна транзакция: строки блокируются (SKIP LOCKED, чтобы
+    параллельный запуск взял другие), файлы пишутся и переименовываются до
+    коммита удаления; при ошибке файлы пачки удаляются, строки остаются.
+    ``id_range`` ограничивает попытки диапазоном id (секцией месяца).
+    """
+    _pyarrow()
+    directory.mkdir(parents=True, exist_ok=True)
+    finished_at = func.coalesce(TestAttempt.completed_at, TestAttempt.started_at)
+    query = select(TestAttempt).where(
+        TestAttempt.status.in_(FINISHED_STATUSES), finished_at < completed_before
+    )
+    if id_range is not None:
+        query = query.where(TestAttempt.id >= id_range[0], TestAttempt.id < id_range[1])
+    query = query.order_by(TestAttempt.test_id, TestAttempt.id).limit(batch_size).with_for_update(skip_locked=True)
+
+    written: List[Path] = []
+    batch_no = 0
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    while True:
+        with Session(engine) as db:
+            attempts = db.scalars(query).all()
+            if not attempts:
+                break
+            answers = _load_answers(db, attempts)
+            stem = f"{stamp}-{batch_no:05d}"
+            tmp_paths = _write_batch(directory, stem, attempts, answers)
+            # Индекс переименовывается последним: пачка без индекса читается полным просмотром
+            final_paths = [path.with_suffix("") for path in tmp_paths]
+            try:
+                ids = [attempt.id for attempt in attempts]
+                for start in range(0, len(ids), _IN_CHUNK):
+                    chunk = ids[start:start + _IN_CHUNK]
+                    db.execute(delete(UserAnswer).where(UserAnswer.attempt_id.in_(chunk)))
+                    db.execute(delete(TestAttempt).where(TestAttempt.id.in_(chunk)))
+                for tmp_path, path in zip(tmp_paths, final_paths):
+                    tmp_path.rename(path)
+                db.commit()
+            except Exception:
+                db.rollback()
+                for path in (*tmp_paths, *final_paths):
+                    path.unlink(missing_ok=True)
+                raise
+        answers_count = sum(len(rows) for rows in answers.values())
+        logger.info(f"Archived {len(attempts)} attempts and {answers_count} answers to {final_paths[0].name}")
+        written.extend(final_paths)
+        batch_no += 1
+    return written
+
+
+# --- Чтение ------------------------------------------------------------------
+
+def _files(directory: Path, suffix: str) -> List[Path]:
+    return sorted(directory.glob(f"*{suffix}")) if directory.is_dir() else []
+
+
+def _open(path: Path):
+    return _pyarrow().parquet.ParquetFile(path, memory_map=True)
+
+
+def _row_groups(parquet_file, column: str, value: str) -> Iterator[int]:
+    """Группы строк, в которые ``value`` может попасть по статистике min/max"""
+    index = parquet_file.schema_arrow.get_field_index(column)
+    for group in range(parquet_file.num_row_groups):
+        stats = parquet_file.metadata.row_group(group).column(index).statistics
+        if stats is None or not stats.has_min_max or stats.min <= value <= stats.max:
+            yield group
+
+
+def _scan(directory: Path, suffix: str, column: str, value: str,
+          paths: Optional[Sequence[Path]] = None) -> List[Dict]:
+    """Строки архива с ``column == value``; лишние группы пропускаются по статистике"""
+    paths = _files(directory, suffix) if paths is None else paths
+    if not paths:
+        return []
+    pa = _pyarrow()
+    rows: List[Dict] = []
+    for path in paths:
+        parquet_file = _open(path)
+        for group in _row_groups(parquet_file, column, value):
+            table = parquet_file.read_row_group(group)
+            matched = table.filter(pa.compute.equal(table[column], value))
+            rows.extend(matched.to_pylist())
+    return rows
+
+
+def _stem(path: Path, suffix: str) -> str:
+    return path.name[:-len(suffix)]
+
+
+class UserIndex:
+    """
+    user_id -> метки пачек с его попытками, по индексам всех пачек каталога.
+    Новые индексы дочитываются, когда меняется mtime каталога (архивация
+    переименовывает файлы в него); пачки без индекса перечислены отдельно.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._mtime: Optional[int] = None
+        self._loaded: Set[str] = set()
+        self._users: Dict[str, Set[str]] = {}
+        self.unindexed: List[str] = []
+
+    def _refresh(self) -> None:
+        if not self.directory.is_dir():
+            return
+        mtime = self.directory.stat().st_mtime_ns
+        if mtime == self._mtime:
+            return
+        pa = _pyarrow()
+        indexed = {_stem(path, USERS_SUFFIX): path for path in _files(self.directory, USERS_SUFFIX)}
+        for stem, path in indexed.items():
+            if stem in self._loaded:
+                continue
+            users = _open(path).read(columns=["user_id"]).column("user_id")
+            for user_id in pa.compute.unique(users).to_pylist():
+                self._users.setdefault(user_id, set()).add(stem)
+            self._loaded.add(stem)
+        self.unindexed = [
+            stem for stem in (_stem(path, ATTEMPTS_SUFFIX) for path in _files(self.directory, ATTEMPTS_SUFFIX))
+            if stem not in indexed
+        ]
+        self._mtime = mtime
+
+    def stems(self, user_id: str) -> Tuple[List[str], List[str]]:
+        """(пачки с попытками пользователя, пачки без индекса)"""
+        with self._lock:
+            self._refresh()
+            return sorted(self._users.get(user_id, ())), list(self.unindexed)
+
+
+_indexes: Dict[Path, UserIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def _user_index(directory: Path) -> UserIndex:
+    with _indexes_lock:
+        index = _indexes.get(directory)
+        if index is None:
+            index = _indexes[directory] = UserIndex(directory)
+        return index
+
+
+def _user_entries(directory: Path, stem: str, user_id: str) -> List[Dict]:
+    """Строки индекса пачки для пользователя: test_id и attempt_id его попыток"""
+    path = directory / f"{stem}{USERS_SUFFIX}"
+    if not path.exists():
+        return []
+    return _scan(directory, USERS_SUFFIX, "user_id", user_id, [path])
+
+
+def _read_by_test(path: Path, column: str, entries: List[Dict]) -> List[Dict]:
+    """Строки файла с ``column`` из attempt_id записей; читаются только группы их тестов"""
+    if not entries or not path.exists():
+        return []
+    pa = _pyarrow()
+    parquet_file = _open(path)
+    by_test: Dict[str, List[str]] = {}
+    for entry in entries:
+        by_test.setdefault(entry["test_id"], []).append(entry["attempt_id"])
+    rows: List[Dict] = []
+    for test_id, attempt_ids in by_test.items():
+        for group in _row_groups(parquet_file, "test_id", test_id):
+            table = parquet_file.read_row_group(group)
+            matched = table.filter(pa.compute.is_in(table[column], value_set=pa.array(attempt_ids)))
+            rows.extend(matched.to_pylist())
+    return rows
+
+
+def read_user_attempts(directory: Path, user_id: UUID) -> List[Dict]:
+    """Архивные попытки пользователя (история результатов): только его пачки по индексу"""
+    if not _files(directory, ATTEMPTS_SUFFIX):
+        return []
+    value = str(user_id)
+    stems, unindexed = _user_index(directory).stems(value)
+    rows: List[Dict] = []
+    for stem in stems:
+        entries = _user_entries(directory, stem, value)
+        rows.extend(_read_by_test(directory / f"{stem}{ATTEMPTS_SUFFIX}", "id", entries))
+    if unindexed:
+        paths = [directory / f"{stem}{ATTEMPTS_SUFFIX}" for stem in unindexed]
+        rows.extend(_scan(directory, ATTEMPTS_SUFFIX, "user_id", value, paths))
+    return rows
+
+
+def read_attempt_answers(directory: Path, attempt_id: UUID, user_id: UUID) -> Optional[List[Dict]]:
+    """Ответы архивной попытки пользователя; None - такой попытки у него в архиве нет"""
+    if not _files(directory, ATTEMPTS_SUFFIX):
+        return None
+    value, user = str(attempt_id), str(user_id)
+    stems, unindexed = _user_index(directory).stems(user)
+    for stem in stems:
+        entries = [entry for entry in _user_entries(directory, stem, user) if entry["attempt_id"] == value]
+        if entries:
+            return _read_by_test(directory / f"{stem}{ANSWERS_SUFFIX}", "attempt_id", entries)
+    for stem in unindexed:
+        path = directory / f"{stem}{ATTEMPTS_SUFFIX}"
+        if any(row["user_id"] == user for row in _scan(directory, ATTEMPTS_SUFFIX, "id", value, [path])):
+            return _scan(directory, ANSWERS_SUFFIX, "attempt_id", value, [directory / f"{stem}{ANSWERS_SUFFIX}"])
+    return None
+
+
+def build_missing_indexes(directory: Path) -> List[Path]:
+    """Индексы для пачек, записанных без них"""
+    written: List[Path] = []
+    for path in _files(directory, ATTEMPTS_SUFFIX):
+        index_path = directory / f"{_stem(path, ATTEMPTS_SUFFIX)}{USERS_SUFFIX}"
+        if index_path.exists():
+            continue
+        rows = _open(path).read(columns=["user_id", "test_id", "id"]).to_pylist()
+        tmp_path = index_path.with_name(index_path.name + ".tmp")
+        _write_index(tmp_path, [
+            {"user_id": row["user_id"], "test_id": row["test_id"], "attempt_id": row["id"]} for row in rows
+        ])
+        tmp_path.rename(index_path)
+        written.append(index_path)
+    return written
+
+
+def test_summary(directory: Path, test_id: UUID) -> Dict:
+    """Сводка по тесту из архива: попытки по статусам, средний балл, доля верных ответов"""
+    pa = _pyarrow()
+    value = str(test_id)
+    by_status: Dict[str, int] = {}
+    scores: List[float] = []
+    for row in _scan(directory, ATTEMPTS_SUFFIX, "test_id", value):
+        by_status[row["status"]] = by_status.get(row["status"], 0) + 1
+        if row["status"] == "completed" and row["max_score"]:
+            scores.append(row["score"] / row["max_score"])
+
+    answers = correct = 0
+    for path in _files(directory, ANSWERS_SUFFIX):
+        parquet_file = _open(path)
+        for group in _row_groups(parquet_file, "test_id", value):
+            table = parquet_file.read_row_group(group, columns=["test_id", "is_correct"])
+            mask = pa.compute.equal(table["test_id"], value)
+            answers += pa.compute.sum(mask.cast(pa.int64())).as_py() or 0
+            correct += pa.compute.sum(
+                pa.compute.and_kleene(mask, table["is_correct"]).cast(pa.int64())
+            ).as_py() or 0
+
+    return {
+        "test_id": value,
+        "attempts": sum(by_status.values()),
+        "by_status": by_status,
+        "average_score_ratio": round(sum(scores) / len(scores), 4) if scores else None,
+        "answers": answers,
+        "correct_ratio": round(correct / answers, 4) if answers else None,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.db.archive", description="Архив завершенных попыток")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="перенести старые завершенные попытки в архив")
+    run.add_argument("--older-than-days", type=int, help="окно хранения (по умолчанию ARCHIVE_RETENTION_DAYS)")
+    run.add_argument("--batch-size", type=int, help="попыток в паре файлов (по умолчанию ARCHIVE_BATCH_SIZE)")
+    run.add_argument("--dir", type=Path, help="каталог архива (по умолчанию ARCHIVE_DIR)")
+    stats = commands.add_parser("stats", help="сводка по тесту из архива")
+    stats.add_argument("--test-id", type=UUID, required=True)
+    stats.add_argument("--dir", type=Path, help="каталог архива (по умолчанию ARCHIVE_DIR)")
+    index = commands.add_parser("index", help="записать индексы по пользователю для старых пачек")
+    index.add_argument("--dir", type=Path, help="каталог архива (по умолчанию ARCHIVE_DIR)")
+    args = parser.parse_args()
+
+    from app.core.config import settings
+    from app.core.logging import setup_logging
+
+    setup_logging()
+    directory = args.dir or Path(settings.ARCHIVE_DIR)
+    if args.command == "stats":
+        print(test_summary(directory, args.test_id))
+        return 0
+    if args.command == "index":
+        for path in build_missing_indexes(directory):
+            print(f"indexed {path}")
+        return 0
+
+    from app.db.session import engine
+
+    days = args.older_than_days if args.older_than_days is not None else settings.ARCHIVE_RETENTION_DAYS
+    batch_size = args.batch_size or settings.ARCHIVE_BATCH_SIZE
+    paths = archive_attempts(engine, directory, datetime.utcnow() - timedelta(days=days), batch_size)
+    for path in paths:
+        print(f"archived {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
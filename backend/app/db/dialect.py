@@ -0,0 +1,14 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+
+def insert(db: Session, entity):
+    """
+    INSERT с поддержкой ON CONFLICT для диалекта текущей сессии.
+
+    В продакшене это всегда PostgreSQL; SQLite поддерживается для
+    одноразовых баз бенчмарков (см. backend/benchmarks).
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite.insert(entity)
+    return postgresql.insert(entity)
@@ -0,0 +1,38 @@
+"""
+Упорядоченные по времени идентификаторы (UUIDv7, RFC 9562).
+
+Старшие 48 бит - миллисекунды Unix-времени, поэтому диапазон id за месяц
+непрерывен: по нему секционированы test_attempts и user_answers, и запрос
+по attempt_id сам отсекает лишние секции.
+"""
+
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _millis(moment: datetime) -> int:
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return int((moment - _EPOCH).total_seconds() * 1000)
+
+
+def uuid7(moment: Optional[datetime] = None) -> uuid.UUID:
+    """UUIDv7 для момента ``moment`` (naive UTC, как datetime.utcnow())"""
+    millis = _millis(moment or datetime.utcnow())
+    rand_a = int.from_bytes(os.urandom(2), "big") & 0xFFF
+    rand_b = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+    return uuid.UUID(int=(millis << 80) | (0x7 << 76) | (rand_a << 64) | (0b10 << 62) | rand_b)
+
+
+def uuid7_lower_bound(moment: datetime) -> uuid.UUID:
+    """Наименьший UUIDv7 для момента: граница секции"""
+    return uuid.UUID(int=_millis(moment) << 80)
+
+
+def uuid7_time(value: uuid.UUID) -> datetime:
+    """Момент, закодированный в UUIDv7 (naive UTC)"""
+    return _EPOCH + timedelta(milliseconds=value.int >> 80)
@@ -1,15 +1,29 @@
 from .base import Base
 from .user import User
 from .test import Test
+from .test_versions import TestVersion
+from .question_bank import BankQuestion
 from .questions import Question
 from .test_attempts import TestAttempt
 from .user_answers import UserAnswer
+from .active_attempts import ActiveAttempt
+from .attempt_id_aliases import AttemptIdAlias
+from .revoked_tokens import RevokedToken
+from .bulk_jobs import BulkJob
+from .jobs import Job
 
 __all__ = [
     "Base", 
     "User", 
     "Test", 
+    "TestVersion",
+    "BankQuestion",
     "Question", 
     "TestAttempt", 
-    "UserAnswer"
+    "UserAnswer",
+    "ActiveAttempt",
+    "AttemptIdAlias",
+    "RevokedToken",
+    "BulkJob",
+    "Job"
 ]
\ No newline at end of file
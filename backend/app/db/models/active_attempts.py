@@ -0,0 +1,23 @@
+from sqlalchemy import Column, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from .base import Base
+
+class ActiveAttempt(Base):
+    """
+    Незавершенная (in_progress или paused) попытка пары (пользователь, тест).
+
+    Первичный ключ гарантирует одну такую попытку на пару: на него опирается
+    INSERT ... ON CONFLICT в start_test. Строка удаляется при переходе
+    попытки в завершенное состояние.
+    """
+    __tablename__ = 'active_attempts'
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    test_id = Column(UUID(as_uuid=True), ForeignKey("tests.id", ondelete="CASCADE"), primary_key=True)
+    # Отложенная проверка: строка-заявка вставляется раньше самой попытки
+    attempt_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("test_attempts.id", ondelete="CASCADE", deferrable=True, initially="DEFERRED"),
+        nullable=False,
+        unique=True,
+    )
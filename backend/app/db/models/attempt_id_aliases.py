@@ -0,0 +1,16 @@
+from sqlalchemy import Column
+from sqlalchemy.dialects.postgresql import UUID
+from .base import Base
+
+class AttemptIdAlias(Base):
+    """
+    Прежний id попытки -> id после перехода на секции (миграция 71ca18f3c58a).
+
+    Попытки со случайными (uuid4) id получили новые UUIDv7; по этой таблице
+    API принимает старые id из ссылок и закладок клиентов. Внешних ключей
+    нет: попытка может уйти в архив.
+    """
+    __tablename__ = 'attempt_id_aliases'
+
+    old_id = Column(UUID(as_uuid=True), primary_key=True)
+    new_id = Column(UUID(as_uuid=True), nullable=False, unique=True)
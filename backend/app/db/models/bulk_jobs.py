@@ -0,0 +1,35 @@
+from datetime import datetime
+from sqlalchemy import JSON, Boolean, Column, DateTime, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.dialects.postgresql import UUID
+from .base import Base
+from ..ids import uuid7
+
+class BulkJob(Base):
+    """
+    Массовая операция администратора над тестами (см. app/services/bulk.py).
+
+    Выполняется порциями по возрастанию id теста; cursor - последний
+    обработанный id, он коммитится вместе с порцией, поэтому прерванная
+    задача продолжается с того же места.
+    """
+    __tablename__ = 'bulk_jobs'
+    __table_args__ = (
+        # Поиск задачи для исполнителя: ожидающие и зависшие
+        Index('ix_bulk_jobs_status_created_at', 'status', 'created_at'),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    action = Column(String(20), nullable=False)  # activate, deactivate, delete, duplicate, regrade
+    filter = Column(JSON, nullable=False, default=dict)
+    status = Column(String(20), nullable=False, default='pending')  # pending, running, completed, cancelled, failed
+    cancel_requested = Column(Boolean, nullable=False, default=False, server_default='false')
+    cursor = Column(UUID(as_uuid=True), nullable=True)
+    total = Column(Integer, nullable=True)
+    processed = Column(Integer, nullable=False, default=0, server_default='0')
+    skipped = Column(Integer, nullable=False, default=0, server_default='0')  # например, тест сейчас проходят
+    error = Column(Text, nullable=True)
+    created_by = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)  # обновляется каждой порцией
+    finished_at = Column(DateTime, nullable=True)
@@ -0,0 +1,37 @@
+from datetime import datetime
+from sqlalchemy import JSON, Column, DateTime, ForeignKey, Index, Integer, String, Text, text
+from sqlalchemy.dialects.postgresql import UUID
+from .base import Base
+from ..ids import uuid7
+
+class Job(Base):
+    """
+    Задача фоновой очереди (см. app/core/jobs.py, app/worker.py).
+
+    queued -> running -> succeeded; при ошибке задача возвращается в queued
+    с отложенным run_at, пока не исчерпаны попытки, затем failed.
+    """
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        # Выборка готовых задач воркером: только очередь, без завершенных
+        Index('ix_jobs_queued_run_at', 'run_at', postgresql_where=text("status = 'queued'")),
+        # Поиск задач упавших воркеров
+        Index('ix_jobs_running_heartbeat_at', 'heartbeat_at', postgresql_where=text("status = 'running'")),
+        Index('ix_jobs_finished_at', 'finished_at'),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    kind = Column(String(50), nullable=False)  # имя из app/services/tasks.py
+    payload = Column(JSON, nullable=False, default=dict)
+    status = Column(String(20), nullable=False, default='queued')  # queued, running, succeeded, failed, cancelled
+    attempts = Column(Integer, nullable=False, default=0, server_default='0')
+    max_attempts = Column(Integer, nullable=False)
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # не раньше (отсрочка повтора)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)  # последняя ошибка
+    locked_by = Column(String(100), nullable=True)  # воркер, выполняющий задачу
+    created_by = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)  # начало последней попытки
+    heartbeat_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
@@ -0,0 +1,24 @@
+from datetime import datetime
+from sqlalchemy import JSON, Column, DateTime, String, Text
+from sqlalchemy.dialects.postgresql import UUID
+from .base import Base
+from ..ids import uuid7
+
+class BankQuestion(Base):
+    """
+    Каноничный вопрос банка (см. app/services/question_bank.py).
+
+    Адресуется содержимым: content_hash - sha256 от нормализованных типа,
+    текста и вариантов, поэтому одинаковый вопрос хранится один раз, сколько
+    бы тестов и версий его ни использовали. Строки questions ссылаются на
+    него и хранят только то, что зависит от теста: правильные ответы, баллы
+    и порядок.
+    """
+    __tablename__ = 'question_bank'
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    content_hash = Column(String(64), nullable=False, unique=True)
+    question_text = Column(Text, nullable=False)  # текст первого импорта; остальные совпадают после нормализации
+    options = Column(JSON)
+    question_type = Column(String(50), nullable=False, default='multiple_choice')
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -1,21 +1,37 @@
-from sqlalchemy import Column, String, ForeignKey, Text, Integer
+from sqlalchemy import Column, ForeignKey, Integer, Index
 from sqlalchemy.dialects.postgresql import UUID, JSON
+from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.orm import relationship
 import uuid
 from .base import Base
 
 class Question(Base):
+    """Вопрос в версии теста: ссылка на вопрос банка и то, что зависит от теста"""
     __tablename__ = 'questions'
+    __table_args__ = (
+        # Вопросы теста по порядку; заменяет одиночный индекс по test_id
+        Index('ix_questions_test_id_order_index', 'test_id', 'order_index'),
+        # Вопросы версии по порядку (снимок и max_score попытки)
+        Index('ix_questions_version_id_order_index', 'version_id', 'order_index'),
+        # Аналитика по вопросу банка во всех тестах
+        Index('ix_questions_bank_question_id', 'bank_question_id'),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    test_id = Column(UUID(as_uuid=True), ForeignKey('tests.id'), nullable=False, index=True)
-    question_text = Column(Text, nullable=False)
-    options = Column(JSON)  # Храним как JSON для списков
+    test_id = Column(UUID(as_uuid=True), ForeignKey('tests.id'), nullable=False)
+    version_id = Column(UUID(as_uuid=True), ForeignKey('test_versions.id'), nullable=False)  # вопрос неизменяем после публикации
+    bank_question_id = Column(UUID(as_uuid=True), ForeignKey('question_bank.id'), nullable=False)
     correct_answers = Column(JSON)  # Храним как JSON для списков
-    question_type = Column(String(50), default='multiple_choice')
-    points = Column(Integer, default=1)  # Баллы за вопрос
+    points = Column(Integer, default=1)  # Баллы за вопрос (вес)
     order_index = Column(Integer, default=0)  # Порядок вопроса в тесте
 
     # Relationships
-    test = relationship("Test", back_populates="questions")
-    user_answers = relationship("UserAnswer", back_populates="question", cascade="all, delete-orphan")
\ No newline at end of file
+    # Текст и варианты нужны почти всегда вместе с вопросом - один JOIN
+    bank_question = relationship("BankQuestion", lazy="joined", innerjoin=True)
+    test = relationship("Test")
+    user_answers = relationship("UserAnswer", back_populates="question", cascade="all, delete-orphan")
+
+    # Содержимое вопроса хранится в банке (только чтение)
+    question_text = association_proxy("bank_question", "question_text")
+    options = association_proxy("bank_question", "options")
+    question_type = association_proxy("bank_question", "question_type")
@@ -0,0 +1,16 @@
+from datetime import datetime
+from sqlalchemy import Column, DateTime, String
+from .base import Base
+
+class RevokedToken(Base):
+    """
+    Отозванный jti токена или целое семейство refresh-токенов (fam).
+
+    Строка нужна только до истечения срока самого токена: позже он и так
+    не пройдет проверку подписи, поэтому такие строки удаляются.
+    """
+    __tablename__ = 'revoked_tokens'
+
+    id = Column(String(64), primary_key=True)  # jti или fam
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)  # для инкрементального опроса
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, Boolean
+from sqlalchemy import Column, String, Integer, DateTime, Boolean, Index
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from datetime import datetime
@@ -7,6 +7,11 @@ from .base import Base
 
 class Test(Base):
     __tablename__ = 'tests'
+    __table_args__ = (
+        # Список тестов: ORDER BY created_at DESC LIMIT и отбор активных
+        Index('ix_tests_created_at', 'created_at'),
+        Index('ix_tests_is_active_created_at', 'is_active', 'created_at'),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title = Column(String(255), nullable=False)
@@ -14,7 +19,21 @@ class Test(Base):
     duration = Column(Integer, nullable=False)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Текущая опубликованная версия; без внешнего ключа, иначе ссылки
+    # tests <-> test_versions образуют цикл (см. app/services/versions.py)
+    current_version_id = Column(UUID(as_uuid=True), nullable=True)
+    # Политика оценивания (app/services/grading.py); действует с публикации версии
+    scoring_policy = Column(String(20), nullable=False, default='all_or_nothing', server_default='all_or_nothing')
+    # Пауза попытки: сколько секунд не идет в срок и сколько раз можно (app/services/attempts.py)
+    pause_budget_seconds = Column(Integer, nullable=False, default=600, server_default='600')
+    max_pauses = Column(Integer, nullable=False, default=3, server_default='3')
 
     # Relationships
-    questions = relationship("Question", back_populates="test", cascade="all, delete-orphan")
+    # Вопросы текущей версии; меняются только публикацией новой версии
+    questions = relationship(
+        "Question",
+        primaryjoin="and_(Test.id == foreign(Question.test_id), Test.current_version_id == foreign(Question.version_id))",
+        order_by="Question.order_index",
+        viewonly=True,
+    )
     attempts = relationship("TestAttempt", back_populates="test", cascade="all, delete-orphan")
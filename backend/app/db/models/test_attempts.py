@@ -1,21 +1,36 @@
-from sqlalchemy import Column, ForeignKey, Integer, DateTime, String
+from sqlalchemy import Column, ForeignKey, Index, Integer, DateTime, Numeric, String
 from sqlalchemy.dialects.postgresql import UUID
-import uuid
 from datetime import datetime
 from sqlalchemy.orm import relationship
 from .base import Base
+from ..ids import uuid7
 
 class TestAttempt(Base):
     __tablename__ = 'test_attempts'
+    __table_args__ = (
+        # Попытки пользователя, в том числе по тесту и статусу; заменяет
+        # одиночный индекс по user_id
+        Index('ix_test_attempts_user_test_status', 'user_id', 'test_id', 'status'),
+        # Помесячные секции по UUIDv7 (см. app/db/partitions.py). Уникальность
+        # незавершенной попытки на секционированной таблице не выразить
+        # индексом - она в active_attempts
+        {'postgresql_partition_by': 'RANGE (id)'},
+    )
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True) # Ссылется на пользователя по ID
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)  # Время в id совпадает со started_at
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False) # Ссылется на пользователя по ID
     test_id = Column(UUID(as_uuid=True), ForeignKey("tests.id"), nullable=False, index=True) # Ссылется на тест по ID
+    test_version_id = Column(UUID(as_uuid=True), ForeignKey("test_versions.id"), nullable=False)  # Версия на момент старта: по ней проверяются ответы
     started_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     completed_at = Column(DateTime, nullable=True)
-    score = Column(Integer, nullable=True)
+    score = Column(Numeric(10, 2, asdecimal=False), nullable=True)  # Частичные баллы - до сотых; при negative_marking может быть < 0
     max_score = Column(Integer, nullable=True)
-    status = Column(String(20), default='in_progress')  # in_progress, completed, abandoned
+    status = Column(String(20), default='in_progress')  # in_progress, paused, completed, abandoned, expired
+    version = Column(Integer, nullable=False, default=1, server_default='1')  # Для compare-and-swap переходов
+    paused_at = Column(DateTime, nullable=True)
+    paused_seconds = Column(Integer, nullable=False, default=0, server_default='0')  # Всего на паузе; в срок не входит не больше бюджета версии
+    pause_count = Column(Integer, nullable=False, default=0, server_default='0')
+    client_seq = Column(Integer, nullable=False, default=0, server_default='0')  # Последний принятый номер синхронизации клиента
 
     # Relationships
     user = relationship("User", back_populates="test_attempts")
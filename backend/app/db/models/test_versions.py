@@ -0,0 +1,32 @@
+from datetime import datetime
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, LargeBinary, String, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from .base import Base
+from ..ids import uuid7
+
+class TestVersion(Base):
+    """
+    Опубликованная версия теста - неизменяемый снимок (см. app/services/versions.py).
+
+    Вопросы версии - строки questions с этим version_id: на них ссылаются
+    ответы и по ним считаются агрегаты. snapshot - та же версия одним
+    JSON-блобом для кеша и отдачи клиенту. После публикации строки не меняются.
+    """
+    __tablename__ = 'test_versions'
+    __table_args__ = (
+        UniqueConstraint('test_id', 'version', name='uq_test_versions_test_id_version'),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    test_id = Column(UUID(as_uuid=True), ForeignKey('tests.id'), nullable=False)
+    version = Column(Integer, nullable=False)  # 1, 2, ... в пределах теста
+    title = Column(String(255), nullable=False)
+    description = Column(String(500), nullable=True)
+    duration = Column(Integer, nullable=False)
+    scoring_policy = Column(String(20), nullable=False, default='all_or_nothing', server_default='all_or_nothing')
+    pause_budget_seconds = Column(Integer, nullable=False, default=600, server_default='600')
+    max_pauses = Column(Integer, nullable=False, default=3, server_default='3')
+    max_score = Column(Integer, nullable=False, default=0, server_default='0')  # Сумма весов вопросов: завершение попытки не суммирует вопросы
+    content_hash = Column(String(64), nullable=True)  # публикация без изменений не создает версию
+    snapshot = Column(LargeBinary, nullable=True)  # NULL - версия из миграции, собирается при первом чтении
+    published_at = Column(DateTime, default=datetime.utcnow, nullable=False)
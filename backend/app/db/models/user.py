@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Boolean, Column, DateTime, String
+from sqlalchemy import Boolean, Column, DateTime, Integer, String
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -13,7 +13,8 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     name = Column(String(255), nullable=True)
     is_active = Column(Boolean, default=True)
-    role = Column(String(20), default='student')  # student, admin
+    role = Column(String(20), default='student', nullable=False)  # student, admin
+    token_version = Column(Integer, default=0, server_default='0', nullable=False)  # +1 делает все выданные токены недействительными
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     # Relationships
@@ -1,4 +1,4 @@
-from sqlalchemy import JSON, Boolean, Column, ForeignKey, DateTime, Integer, Text
+from sqlalchemy import JSON, Boolean, Column, ForeignKey, DateTime, Numeric, Text, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from datetime import datetime
@@ -7,14 +7,22 @@ from .base import Base
 
 class UserAnswer(Base):
     __tablename__ = 'user_answers'
+    __table_args__ = (
+        # Один ответ на вопрос в попытке: повторная отправка - конфликт вставки.
+        # Индекс ограничения также обслуживает выборки по attempt_id
+        UniqueConstraint('attempt_id', 'question_id', name='uq_user_answers_attempt_question'),
+        # Секции совпадают с секциями test_attempts: ответы лежат рядом с попыткой
+        {'postgresql_partition_by': 'RANGE (attempt_id)'},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    attempt_id = Column(UUID(as_uuid=True), ForeignKey("test_attempts.id"), nullable=False, index=True)
+    # Ключ секционирования обязан входить в первичный ключ
+    attempt_id = Column(UUID(as_uuid=True), ForeignKey("test_attempts.id"), primary_key=True)
     question_id = Column(UUID(as_uuid=True), ForeignKey("questions.id"), nullable=False, index=True)
     selected_options = Column(JSON, nullable=True)  # Индексы выбранных вариантов [0, 2]
     text_answer = Column(Text, nullable=True)  # Для текстовых ответов
     is_correct = Column(Boolean, nullable=True)
-    points_earned = Column(Integer, default=0)
+    points_earned = Column(Numeric(8, 2, asdecimal=False), default=0)  # По политике оценивания теста, до сотых
     answered_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     # Relationships
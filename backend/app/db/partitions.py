@@ -0,0 +1,188 @@
+"""
+Помесячные секции test_attempts и user_answers.
+
+Обе таблицы секционированы RANGE по идентификатору попытки (UUIDv7, см.
+app/db/ids.py): test_attempts по id, user_answers по attempt_id. Секция
+месяца содержит попытки, начатые в этом месяце, и все ответы на них, так что
+ответы попытки всегда лежат рядом с ней, а запросы по attempt_id отсекают
+остальные секции.
+
+Обслуживание (cron, раз в сутки):
+
+    python -m app.db.partitions ensure --ahead 3     # то же делает старт воркера
+    python -m app.db.partitions archive --older-than 12 --dir /var/backups/archive
+"""
+
+import argparse
+import logging
+import sys
+from datetime import date, datetime
+from pathlib import Path
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from app.db.archive import archive_attempts
+from app.db.ids import uuid7_lower_bound
+
+logger = logging.getLogger(__name__)
+
+# Порядок важен: ответы ссылаются на попытки, поэтому при архивации
+# секция ответов отсоединяется первой
+PARTITIONED_TABLES = ("test_attempts", "user_answers")
+
+# Ключ блокировки, чтобы воркеры не создавали секции одновременно
+_ADVISORY_LOCK_KEY = 0x5EC7
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+
+def _parse_month(name: str) -> date:
+    suffix = name.rsplit("_y", 1)[1]
+    year, month = suffix.split("m")
+    return date(int(year), int(month), 1)
+
+
+def list_partitions(conn: Connection, table: str) -> List[str]:
+    return list(conn.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :table
+        ORDER BY child.relname
+    """), {"table": table}).scalars())
+
+
+def create_partitions(conn: Connection, first: date, last: date) -> List[str]:
+    """Создать недостающие секции обеих таблиц для месяцев [first, last]"""
+    conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+    created = []
+    month = month_start(first)
+    while month <= last:
+        lower = uuid7_lower_bound(datetime(month.year, month.month, 1))
+        next_month = add_months(month, 1)
+        upper = uuid7_lower_bound(datetime(next_month.year, next_month.month, 1))
+        for table in PARTITIONED_TABLES:
+            name = partition_name(table, month)
+            exists = conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar()
+            if exists is None:
+                conn.execute(text(
+                    f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM ('{lower}') TO ('{upper}')"
+                ))
+                created.append(name)
+        month = next_month
+    return created
+
+
+def ensure_partitions(engine: Engine, ahead: int = 3) -> List[str]:
+    """Секции текущего месяца и ``ahead`` следующих (PostgreSQL, иначе ничего)"""
+    if engine.dialect.name != "postgresql":
+        return []
+    today = date.today()
+    with engine.begin() as conn:
+        created = create_partitions(conn, today, add_months(month_start(today), ahead))
+    for name in created:
+        logger.info(f"Created partition {name}")
+    return created
+
+
+def archive_partitions(engine: Engine, older_than: int, directory: Path) -> List[Path]:
+    """
+    Перенести секции старше ``older_than`` месяцев в архив (app/db/archive.py) и удалить.
+
+    Незавершенные попытки в архивируемых секциях помечаются expired, их
+    записи в active_attempts удаляются - иначе внешний ключ не даст
+    отсоединить секцию. Опустевшие секции отсоединяются и удаляются.
+    """
+    cutoff = add_months(month_start(date.today()), -older_than)
+    archived = []
+
+    with engine.connect() as conn:
+        months = sorted({
+            _parse_month(name) for name in list_partitions(conn, "test_attempts")
+            if _parse_month(name) < cutoff
+        })
+        conn.rollback()
+
+    for month in months:
+        attempts = partition_name("test_attempts", month)
+        next_month = add_months(month, 1)
+        id_range = (
+            uuid7_lower_bound(datetime(month.year, month.month, 1)),
+            uuid7_lower_bound(datetime(next_month.year, next_month.month, 1)),
+        )
+        with engine.begin() as conn:
+            conn.execute(text(
+                f"DELETE FROM active_attempts WHERE attempt_id IN (SELECT id FROM {attempts})"
+            ))
+            conn.execute(text(
+                f"UPDATE {attempts} SET status = 'expired', version = version + 1 "
+                f"WHERE status IN ('in_progress', 'paused')"
+            ))
+        archived.extend(archive_attempts(engine, directory, datetime.utcnow(), id_range=id_range))
+
+        with engine.connect() as conn:
+            left = conn.execute(text(f"SELECT count(*) FROM {attempts}")).scalar()
+        if left:
+            # Строки, заблокированные другой транзакцией, уйдут при следующем запуске
+            logger.warning(f"Partition {attempts} still has {left} attempts, not dropped")
+            continue
+
+        for table in reversed(PARTITIONED_TABLES):
+            name = partition_name(table, month)
+            # DETACH ... CONCURRENTLY не блокирует родительскую таблицу, но
+            # не работает внутри транзакции
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                if conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is None:
+                    continue
+                if name in list_partitions(conn, table):
+                    conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name} CONCURRENTLY"))
+                conn.execute(text(f"DROP TABLE {name}"))
+            logger.info(f"Dropped archived partition {name}")
+    return archived
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.db.partitions", description="Обслуживание секций")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ensure = commands.add_parser("ensure", help="создать секции на будущие месяцы")
+    ensure.add_argument("--ahead", type=int, help="месяцев вперед (по умолчанию PARTITIONS_AHEAD_MONTHS)")
+    archive = commands.add_parser("archive", help="перенести старые секции в архив и удалить")
+    archive.add_argument("--older-than", type=int, default=12, help="возраст секции в месяцах")
+    archive.add_argument("--dir", type=Path, help="каталог архива (по умолчанию ARCHIVE_DIR)")
+    args = parser.parse_args()
+
+    from app.core.config import settings
+    from app.core.logging import setup_logging
+    from app.db.session import engine
+
+    setup_logging()
+    if engine.dialect.name != "postgresql":
+        print("Секционирование поддерживается только в PostgreSQL")
+        return 2
+    if args.command == "ensure":
+        ahead = args.ahead if args.ahead is not None else settings.PARTITIONS_AHEAD_MONTHS
+        for name in ensure_partitions(engine, ahead):
+            print(f"created {name}")
+    else:
+        directory = args.dir or Path(settings.ARCHIVE_DIR)
+        for path in archive_partitions(engine, args.older_than, directory):
+            print(f"archived {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
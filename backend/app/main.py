@@ -1,26 +1,68 @@
-from fastapi import FastAPI, Depends, Request, HTTPException
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.openapi.docs import get_swagger_ui_html
-from sqlalchemy.orm import Session
-from app.db import get_db
-from app.api.endpoints import tests_questions, auth, search
+from starlette.concurrency import run_in_threadpool
+from app.db import SessionLocal
+from app.db.partitions import ensure_partitions
+from app.db.session import engine
+from app.api.endpoints import tests_questions, auth, search, test_system, monitoring, admin, jobs
 from app.middleware.rate_limit import RateLimitMiddleware
 from app.middleware.auth import AuthMiddleware
 from app.middleware.logging import LoggingMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.compression import CompressionMiddleware
 from app.exceptions import NotFoundException, ValidationException, UnauthorizedException, ForbiddenException
 from app.core.config import settings
+from app.core import metrics, health, revocation
+from app.core.events import broker
+from app.core.keys import get_key_manager
+from app.core.logging import setup_logging
+from app.core.serialization import FastJSONResponse
+from app.services.test_service import warm_test_cache
 import logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+
+setup_logging()
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Старт воркера: прогреваем кеш популярных тестов
+    try:
+        def warm():
+            with SessionLocal() as db:
+                return warm_test_cache(db, settings.CACHE_WARM_TESTS)
+
+        warmed = await run_in_threadpool(warm)
+        logger.info(f"Test cache warmed: {warmed} tests")
+    except Exception as e:
+        logger.warning(f"Cache warm-up failed: {str(e)}")
+    # Страховка на случай, если cron с `python -m app.db.partitions ensure` не отработал
+    try:
+        await run_in_threadpool(ensure_partitions, engine, settings.PARTITIONS_AHEAD_MONTHS)
+    except Exception as e:
+        logger.error(f"Partition maintenance failed: {str(e)}")
+    await broker.start()
+    health_task = asyncio.create_task(health.refresh_loop())
+    revocation_task = asyncio.create_task(revocation.refresh_loop())
+    yield
+    # Остановка воркера: закрываем соединения пула
+    health_task.cancel()
+    revocation_task.cancel()
+    await broker.stop()
+    health.dispose()
+    engine.dispose()
+    logger.info("Database engine disposed")
+
 app = FastAPI(
     title="Medical Tests API", 
     version="1.1.0",
-    description="API для медицинских тестов"
+    description="API для медицинских тестов",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan,
 )
 
 @app.exception_handler(NotFoundException)
@@ -73,9 +115,12 @@ async def custom_swagger_ui_html():
     )
 
 # Middleware stack (порядок важен - от последнего к первому)
-app.add_middleware(LoggingMiddleware)  # Логирование всех запросов
+app.add_middleware(CompressionMiddleware)  # gzip/brotli (заранее сжатые ответы пропускает)
+app.add_middleware(ProfilingMiddleware)  # Отчеты по медленным запросам (после auth: нужен request.state.user)
 app.add_middleware(AuthMiddleware)     # Аутентификация пользователей
 app.add_middleware(RateLimitMiddleware, requests_per_minute=settings.RATE_LIMIT_PER_MINUTE)  # Ограничение скорости
+app.add_middleware(MetricsMiddleware)  # Метрики Prometheus (латентность, SQL на запрос)
+app.add_middleware(LoggingMiddleware)  # Логирование всех запросов, X-Request-ID
 app.add_middleware(
     CORSMiddleware,  # CORS для кросс-доменных запросов
     allow_origins=settings.allowed_origins_list,
@@ -87,21 +132,46 @@ app.add_middleware(
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["authentication"])
 app.include_router(tests_questions.router, prefix="/api/v1", tags=["tests"])
 app.include_router(search.router, prefix="/api/v1", tags=["search"])
+app.include_router(test_system.router, prefix="/api/v1", tags=["test-system"])
+app.include_router(monitoring.router, prefix="/api/v1", tags=["monitoring"])
+app.include_router(admin.router, prefix="/api/v1/admin", tags=["admin"])
+app.include_router(jobs.router, prefix="/api/v1", tags=["jobs"])
 
 @app.get("/")
-def read_root(db: Session = Depends(get_db)):
-    return {"message": "Hello, Database is connected!"}
+def read_root():
+    return {"message": "Medical Tests API"}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint():
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
 
 @app.get("/health")
 def health_check():
     return {"status": "healthy", "message": "API is running"}
 
+@app.get("/.well-known/jwks.json")
+def jwks():
+    """Открытые ключи подписи: фронтенд и другие сервисы проверяют токены сами"""
+    return Response(
+        content=get_key_manager().jwks(),
+        media_type="application/json",
+        headers={"Cache-Control": f"public, max-age={settings.JWKS_CACHE_SECONDS}"},
+    )
+
+@app.get("/health/live")
+def liveness():
+    """Процесс жив и обслуживает event loop"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+def readiness():
+    """Готовность по кешированному состоянию: без обращения к базе"""
+    report = health.readiness()
+    return JSONResponse(status_code=200 if report["status"] == "ready" else 503, content=report)
+
 @app.get("/health/db")
-def health_check_db(db: Session = Depends(get_db)):
-    try:
-        # Простая проверка подключения к БД
-        db.execute("SELECT 1")
-        return {"status": "healthy", "database": "connected"}
-    except Exception as e:
-        logger.error(f"Database health check failed: {str(e)}")
-        raise HTTPException(status_code=503, detail="Database connection failed")
\ No newline at end of file
+def health_check_db():
+    report = health.readiness()["database"]
+    if not report["reachable"]:
+        raise HTTPException(status_code=503, detail="Database connection failed")
+    return {"status": "healthy", "database": "connected", "latency_ms": report["latency_ms"]}
\ No newline at end of file
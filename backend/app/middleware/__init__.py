@@ -1,3 +1,6 @@
 from .auth import AuthMiddleware
 from .rate_limit import RateLimitMiddleware
-from .logging import LoggingMiddleware
\ No newline at end of file
+from .logging import LoggingMiddleware
+from .metrics import MetricsMiddleware
+from .profiling import ProfilingMiddleware
+from .compression import CompressionMiddleware
\ No newline at end of file
@@ -1,7 +1,8 @@
 from fastapi import Request
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.base import BaseHTTPMiddleware
-from app.core.auth import get_current_user_from_token
+from app.core.auth import cached_token_version_current, decode_principal, is_token_version_current
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,11 +15,16 @@ class AuthMiddleware(BaseHTTPMiddleware):
             "/api/v1/auth/register", 
             "/api/v1/auth/token",
             "/api/v1/auth/token/json",
+            "/api/v1/auth/refresh",
             "/docs", 
             "/openapi.json",
             "/redoc",
             "/health",
-            "/health/db"
+            "/health/db",
+            "/health/live",
+            "/health/ready",
+            "/metrics",
+            "/.well-known/jwks.json"
         ]
         
         if request.url.path in public_endpoints:
@@ -34,11 +40,16 @@ class AuthMiddleware(BaseHTTPMiddleware):
         
         try:
             token = auth_header.split(" ")[1]
-            from app.db.session import SessionLocal
-            with SessionLocal() as db:
-                user = get_current_user_from_token(token, db)
+            # Principal из claims; база - только при промахе кеша token_version,
+            # и тогда в пуле потоков, чтобы синхронный запрос не останавливал цикл событий
+            user = decode_principal(token)
+            current = cached_token_version_current(user.id, user.token_version)
+            if current is None:
+                current = await run_in_threadpool(is_token_version_current, user.id, user.token_version)
+            if not current:
+                raise ValueError("Token version is outdated or user is inactive")
             request.state.user = user
-            logger.info(f"Authenticated user: {user.email}")
+            logger.debug("Authenticated user: %s", user.id)
         except Exception as e:
             logger.warning(f"Authentication failed: {str(e)}")
             return JSONResponse(
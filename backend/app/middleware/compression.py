@@ -0,0 +1,38 @@
+from fastapi import Request
+from fastapi.responses import Response
+from starlette.middleware.base import BaseHTTPMiddleware
+from app.core.compression import COMPRESSIBLE_TYPES, compress, negotiate
+from app.core.config import settings
+
+
+class CompressionMiddleware(BaseHTTPMiddleware):
+    """
+    gzip/brotli для ответов больше COMPRESSION_MIN_SIZE.
+    Ответы с уже выставленным Content-Encoding (заранее сжатые из кеша)
+    и потоковые ответы (text/event-stream) пропускаются без изменений.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        encoding = negotiate(request.headers.get("accept-encoding", ""))
+        response = await call_next(request)
+        if encoding is None or "content-encoding" in response.headers:
+            return response
+
+        content_type = response.headers.get("content-type", "")
+        if not content_type.startswith(COMPRESSIBLE_TYPES) or content_type.startswith("text/event-stream"):
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        compressed = len(body) >= settings.COMPRESSION_MIN_SIZE
+        if compressed:
+            body = compress(body, encoding)
+
+        new_response = Response(body, status_code=response.status_code, background=response.background)
+        # raw_headers, чтобы не потерять повторяющиеся заголовки (Set-Cookie)
+        new_response.raw_headers = [
+            (name, value) for name, value in response.raw_headers if name != b"content-length"
+        ] + [(b"content-length", str(len(body)).encode())]
+        if compressed:
+            new_response.headers["Content-Encoding"] = encoding
+            new_response.headers.append("Vary", "Accept-Encoding")
+        return new_response
\ No newline at end of file
@@ -1,18 +1,38 @@
 import time
+import uuid
 import logging
 from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware
+from app.core.logging import request_id_var
+from app.core.routes import route_template
 
 logger = logging.getLogger(__name__)
 
+REQUEST_ID_HEADER = "X-Request-ID"
+
 class LoggingMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        logger.info(f"Request: {request.method} {request.url.path}")
-        
-        response = await call_next(request)
-        
-        process_time = time.time() - start_time
-        logger.info(f"Response: {response.status_code} - {process_time:.4f}s")
-        
-        return response
\ No newline at end of file
+        request_id = request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        start_time = time.perf_counter()
+        try:
+            response = await call_next(request)
+            
+            process_time = time.perf_counter() - start_time
+            route = route_template(request)
+            # Одна строка на запрос; семплируется по шаблону маршрута (см. RouteSamplingFilter)
+            logger.info(
+                "%s %s -> %s (%.4fs)", request.method, request.url.path, response.status_code, process_time,
+                extra={
+                    "route": route,
+                    "method": request.method,
+                    "path": request.url.path,
+                    "status": response.status_code,
+                    "duration_ms": round(process_time * 1000, 2),
+                },
+            )
+            response.headers[REQUEST_ID_HEADER] = request_id
+            
+            return response
+        finally:
+            request_id_var.reset(token)
\ No newline at end of file
@@ -0,0 +1,31 @@
+import time
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+from app.core.metrics import (
+    REQUEST_LATENCY,
+    DB_QUERIES_PER_REQUEST,
+    DB_TIME_PER_REQUEST,
+    RequestDbStats,
+    request_db_stats,
+)
+from app.core.routes import route_template
+
+
+class MetricsMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        stats = RequestDbStats()
+        token = request_db_stats.set(stats)
+        start_time = time.perf_counter()
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            elapsed = time.perf_counter() - start_time
+            request_db_stats.reset(token)
+            # Шаблон маршрута вместо фактического пути, чтобы UUID не раздували кардинальность
+            route_path = route_template(request)
+            REQUEST_LATENCY.observe(elapsed, method=request.method, route=route_path, status=str(status_code))
+            DB_QUERIES_PER_REQUEST.observe(stats.queries, route=route_path)
+            DB_TIME_PER_REQUEST.observe(stats.duration, route=route_path)
@@ -0,0 +1,78 @@
+import random
+import time
+import logging
+from fastapi import Request
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.base import BaseHTTPMiddleware
+from app.core.config import settings
+from app.core.logging import request_id_var
+from app.core.profiling import SqlCapture, sampler, sql_capture, write_report
+from app.core.routes import route_template
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+
+class ProfilingMiddleware(BaseHTTPMiddleware):
+    """
+    Сохраняет SQL запросы с таймингами (и профиль стеков, если он снимался)
+    для запросов дольше PROFILING_SLOW_REQUEST_MS или с заголовком X-Profile
+    от администратора. Должен стоять после AuthMiddleware.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        if not settings.PROFILING_ENABLED:
+            return await call_next(request)
+
+        user = getattr(request.state, "user", None)
+        forced = (
+            request.headers.get(PROFILE_HEADER) == "1"
+            and user is not None
+            and getattr(user, "role", None) == "admin"
+        )
+        samples = None
+        if forced or random.random() < settings.PROFILING_SAMPLE_RATE:
+            samples = sampler.start_session()
+
+        capture = SqlCapture()
+        token = sql_capture.set(capture)
+        start_time = time.perf_counter()
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            elapsed = time.perf_counter() - start_time
+            sql_capture.reset(token)
+            if samples is not None:
+                sampler.stop_session(samples)
+
+            if forced or elapsed * 1000 >= settings.PROFILING_SLOW_REQUEST_MS:
+                route = route_template(request)
+                report = {
+                    "request_id": request_id_var.get() or "unknown",
+                    "method": request.method,
+                    "path": request.url.path,
+                    "route": route,
+                    "status": status_code,
+                    "duration_ms": round(elapsed * 1000, 2),
+                    "forced": forced,
+                    "user_id": getattr(user, "id", None),
+                    "sql": {
+                        "count": len(capture.statements) + capture.dropped,
+                        "total_ms": round(sum(s["duration_ms"] for s in capture.statements), 3),
+                        "dropped": capture.dropped,
+                        "statements": capture.statements,
+                    },
+                    "profile": {
+                        "interval_ms": settings.PROFILING_SAMPLE_INTERVAL_MS,
+                        "stacks": [f"{stack} {count}" for stack, count in samples.most_common()],
+                    } if samples is not None else None,
+                }
+                try:
+                    path = await run_in_threadpool(write_report, report)
+                    logger.warning("Slow request %s %s (%.0f ms), report: %s",
+                                   request.method, route, elapsed * 1000, path)
+                except OSError as e:
+                    logger.error(f"Failed to write profiling report: {str(e)}")
\ No newline at end of file
@@ -16,6 +16,10 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         public_endpoints = [
             "/health", 
             "/health/db",
+            "/health/live",
+            "/health/ready",
+            "/metrics",
+            "/.well-known/jwks.json",
             "/api/v1/auth/login", 
             "/api/v1/auth/register", 
             "/docs", 
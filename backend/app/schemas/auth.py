@@ -1,6 +1,7 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from typing import Literal, Optional
 from datetime import datetime
+from uuid import UUID
 
 class UserCreate(BaseModel):
     email: EmailStr
@@ -12,11 +13,17 @@ class UserResponse(BaseModel):
     email: str
     name: Optional[str] = None
     is_active: bool
-    is_admin: bool
+    role: str
+    is_admin: bool  # role == "admin", для старых клиентов
     created_at: datetime
     class Config:
         from_attributes = True
 
+class UserAccessUpdate(BaseModel):
+    """Изменение доступа администратором; любое изменение отзывает токены пользователя"""
+    role: Optional[Literal["student", "admin"]] = None
+    is_active: Optional[bool] = None
+
 class UserLogin:
     email: EmailStr
     password: str
@@ -24,9 +31,24 @@ class UserLogin:
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None  # срок access_token в секундах
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class Principal(BaseModel):
+    """Пользователь запроса по claims токена - без загрузки строки users"""
+    id: UUID
+    email: str
+    role: str
+    token_version: int = 0
+
+    model_config = {"frozen": True}
 
-class TokenData(BaseModel):
-    email: Optional[str] = None  
+    @property
+    def is_admin(self) -> bool:
+        return self.role == "admin"
 
 class LoginData(BaseModel):
     email: str
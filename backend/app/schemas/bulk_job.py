@@ -0,0 +1,36 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import List, Literal, Optional
+from uuid import UUID
+
+BulkAction = Literal["activate", "deactivate", "delete", "duplicate", "regrade"]
+
+class BulkFilter(BaseModel):
+    """Отбор тестов; пустой фильтр - все тесты, созданные до постановки задачи"""
+    test_ids: Optional[List[UUID]] = Field(None, max_length=10000)
+    title_contains: Optional[str] = Field(None, min_length=1, max_length=255)
+    is_active: Optional[bool] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+class BulkJobCreate(BaseModel):
+    action: BulkAction
+    filter: BulkFilter = Field(default_factory=BulkFilter)
+
+class BulkJobResponse(BaseModel):
+    id: UUID
+    action: str
+    filter: dict
+    status: str
+    cancel_requested: bool
+    total: Optional[int] = None
+    processed: int
+    skipped: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,34 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Any, Dict, Literal, Optional
+from uuid import UUID
+
+# Задачи, которые администратор ставит вручную; bulk.run ставят массовые операции
+JobKind = Literal["archive.run", "partitions.ensure"]
+
+class JobCreate(BaseModel):
+    kind: JobKind
+    payload: Dict[str, Any] = Field(default_factory=dict)
+    delay_seconds: float = Field(0, ge=0, le=86400)
+
+class JobResponse(BaseModel):
+    id: UUID
+    kind: str
+    payload: dict
+    status: str
+    attempts: int
+    max_attempts: int
+    run_at: datetime
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class JobStats(BaseModel):
+    counts: Dict[str, Dict[str, int]]  # тип -> статус -> число задач
+    oldest_ready_seconds: float  # сколько ждет самая старая готовая задача
@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+from uuid import UUID
+
+class BankQuestionResponse(BaseModel):
+    id: UUID
+    question_text: str
+    options: Optional[List[str]] = None
+    question_type: str
+    created_at: datetime
+    tests: int  # тестов, в версиях которых есть вопрос
+
+class BankQuestionStats(BankQuestionResponse):
+    current_tests: int  # тестов, где вопрос в текущей версии
+    answers: int
+    correct: int
+    correct_rate: Optional[float] = None
+    avg_points: float
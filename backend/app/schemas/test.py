@@ -8,6 +8,7 @@ class QuestionCreate(BaseModel):
     options: Optional[List[str]] = Field(None, description="List of answer options")
     correct_answers: Optional[List[int]] = Field(None, description="Indices of correct answers")
     question_type: str = Field("multiple_choice", description="Type of question")
+    points: int = Field(1, ge=1, le=100, description="Question weight in points")
     
     @validator('question_type')
     def validate_question_type(cls, v):
@@ -21,8 +22,18 @@ class TestCreate(BaseModel):
     description: Optional[str] = Field(None, max_length=500, description="Test description")
     duration: int = Field(..., gt=0, le=480, description="Test duration in minutes (1-480)")
     is_active: bool = Field(True, description="Test active status")
+    scoring_policy: str = Field("all_or_nothing", description="all_or_nothing, partial_credit or negative_marking")
+    pause_budget_seconds: int = Field(600, ge=0, le=86400, description="Total pause time not counted against the duration")
+    max_pauses: int = Field(3, ge=0, le=50, description="How many times an attempt can be paused")
     questions: List[QuestionCreate] = Field(..., min_items=1, max_items=100, description="List of questions")
     
+    @validator('scoring_policy')
+    def validate_scoring_policy(cls, v):
+        allowed_policies = ['all_or_nothing', 'partial_credit', 'negative_marking']
+        if v not in allowed_policies:
+            raise ValueError(f'scoring_policy must be one of {allowed_policies}')
+        return v
+    
     @validator('questions')
     def validate_questions(cls, v):
         if not v:
@@ -36,20 +47,63 @@ class TestResponse(BaseModel):
     duration: int
     is_active: bool
     created_at: datetime
+    scoring_policy: str = "all_or_nothing"
+    pause_budget_seconds: int = 600
+    max_pauses: int = 3
     questions: List[QuestionCreate]
     
     class Config:
         from_attributes = True
 
+class VersionQuestionResponse(BaseModel):
+    id: UUID
+    question_text: str
+    options: Optional[List[str]] = None
+    correct_answers: Optional[List[int]] = None
+    question_type: str
+    points: int = 1
+    order_index: int = 0
+
+    class Config:
+        from_attributes = True
+
+class TestVersionResponse(BaseModel):
+    """Неизменяемый снимок опубликованной версии теста"""
+    id: UUID
+    test_id: UUID
+    version: int
+    title: str
+    description: Optional[str]
+    duration: int
+    scoring_policy: str = "all_or_nothing"  # нет в блобах версий до политик оценивания
+    pause_budget_seconds: int = 600  # и до лимитов пауз
+    max_pauses: int = 3
+    published_at: datetime
+    questions: List[VersionQuestionResponse]
+
+    class Config:
+        from_attributes = True
+
+class TestVersionSummary(BaseModel):
+    id: UUID
+    version: int
+    title: str
+    published_at: datetime
+    is_current: bool
+
 class QuestionUpdate(BaseModel):
     id: Optional[UUID] = None  # None для новых вопросов
     question_text: Optional[str] = None
     options: Optional[List[str]] = None
     correct_answers: Optional[List[int]] = None
     question_type: Optional[str] = None
+    points: Optional[int] = None
 
 class TestUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
     duration: Optional[int] = None
+    scoring_policy: Optional[str] = None
+    pause_budget_seconds: Optional[int] = None
+    max_pauses: Optional[int] = None
     questions: Optional[List[QuestionUpdate]] = None
\ No newline at end of file
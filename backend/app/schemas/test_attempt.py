@@ -9,12 +9,17 @@ class TestAttemptCreate(BaseModel):
 class TestAttemptResponse(BaseModel):
     id: UUID
     test_id: UUID
+    test_version_id: Optional[UUID] = None  # в архивных попытках до версий нет
     user_id: UUID
     started_at: datetime
     completed_at: Optional[datetime]
-    score: Optional[int]
+    score: Optional[float]
     max_score: Optional[int]
     status: str
+    version: int
+    paused_at: Optional[datetime] = None
+    paused_seconds: int = 0
+    pause_count: int = 0
     
     class Config:
         from_attributes = True
@@ -24,6 +29,29 @@ class UserAnswerCreate(BaseModel):
     selected_options: Optional[List[int]] = None
     text_answer: Optional[str] = None
 
+class AttemptSync(BaseModel):
+    """Пакет синхронизации: ответы, измененные с последнего подтвержденного seq"""
+    seq: int = Field(..., ge=1)
+    answers: List[UserAnswerCreate] = Field(default_factory=list, max_length=1000)
+
+class AttemptSyncAck(BaseModel):
+    ack_seq: int
+    applied: int  # сколько ответов реально изменилось
+
+class SyncedAnswer(BaseModel):
+    question_id: UUID
+    selected_options: Optional[List[int]] = None
+    text_answer: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class AttemptSyncState(BaseModel):
+    ack_seq: int
+    status: str
+    version: int
+    answers: List[SyncedAnswer]
+
 class UserAnswerResponse(BaseModel):
     id: UUID
     attempt_id: UUID
@@ -31,7 +59,7 @@ class UserAnswerResponse(BaseModel):
     selected_options: Optional[List[int]] = None
     text_answer: Optional[str] = None
     is_correct: Optional[bool] = None
-    points_earned: int
+    points_earned: float
     answered_at: datetime
     
     class Config:
@@ -39,7 +67,7 @@ class UserAnswerResponse(BaseModel):
 
 class TestResult(BaseModel):
     attempt_id: UUID
-    score: int
+    score: float
     max_score: int
     percentage: float
     correct_answers: int
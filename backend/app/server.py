@@ -0,0 +1,87 @@
+"""
+Продакшен-запуск: gunicorn master + N воркеров uvicorn.
+
+    python -m app.server
+
+- число воркеров: WEB_CONCURRENCY или CPU * WORKERS_PER_CORE (не больше MAX_WORKERS);
+- preload_app: приложение импортируется один раз в master, воркеры получают
+  его через fork (copy-on-write, быстрый рестарт воркеров);
+- SIGTERM: master перестает принимать соединения, воркеры дообрабатывают
+  начатые запросы (в том числе отправку ответов) в пределах GRACEFUL_TIMEOUT;
+- воркер перезапускается после WORKER_MAX_REQUESTS (+ случайный jitter),
+  чтобы ограничить рост памяти;
+- прогрев кешей и закрытие пула соединений - в lifespan приложения (app/main.py).
+"""
+
+import logging
+import os
+
+from gunicorn.app.base import BaseApplication
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def worker_count() -> int:
+    if settings.WEB_CONCURRENCY > 0:
+        return settings.WEB_CONCURRENCY
+    workers = int((os.cpu_count() or 1) * settings.WORKERS_PER_CORE)
+    return max(2, min(workers, settings.MAX_WORKERS))
+
+
+def post_fork(server, worker):
+    # Соединения пула, открытые в master при preload, не должны использоваться
+    # несколькими процессами: отбрасываем их без закрытия сокетов родителя
+    from app.db.session import engine
+    engine.dispose(close=False)
+
+
+def worker_int(worker):
+    logger.warning(f"Worker {worker.pid} interrupted")
+
+
+def gunicorn_options() -> dict:
+    return {
+        "bind": f"{settings.HOST}:{settings.PORT}",
+        "workers": worker_count(),
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": True,
+        "max_requests": settings.WORKER_MAX_REQUESTS,
+        "max_requests_jitter": settings.WORKER_MAX_REQUESTS_JITTER,
+        "graceful_timeout": settings.GRACEFUL_TIMEOUT,
+        "timeout": settings.WORKER_TIMEOUT,
+        "keepalive": settings.KEEPALIVE,
+        # access-лог пишет LoggingMiddleware
+        "accesslog": None,
+        "errorlog": "-",
+        "loglevel": settings.LOG_LEVEL.lower(),
+        "post_fork": post_fork,
+        "worker_int": worker_int,
+    }
+
+
+class Server(BaseApplication):
+    def __init__(self, app_uri: str, options: dict):
+        self.app_uri = app_uri
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key, value)
+
+    def load(self):
+        from app.main import app
+        return app
+
+
+def main():
+    options = gunicorn_options()
+    logger.info(f"Starting {options['workers']} workers on {options['bind']}")
+    Server("app.main:app", options).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Запись ответов попытки: идемпотентный upsert по (attempt_id, question_id).
+
+Измененный ответ перезаписывается и проверяется заново; повтор того же
+ответа строку не трогает (ON CONFLICT DO UPDATE ... WHERE значения
+отличаются), поэтому ретраи клиента не порождают записей в базе.
+Используется submit-answer и синхронизацией клиента (POST .../sync).
+Вопросы проверяются по снимку версии, на которой начата попытка
+(app/services/versions.py), без запроса к базе, и по ее политике
+оценивания (app/services/grading.py).
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+from uuid import UUID, uuid4
+
+from fastapi import HTTPException, status
+from sqlalchemy import Text, cast, or_
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.db.dialect import insert
+from app.db.models.test_attempts import TestAttempt
+from app.db.models.user_answers import UserAnswer
+from app.schemas.test_attempt import UserAnswerCreate
+from app.services.attempts import IN_PROGRESS, AttemptLimits, is_overdue
+from app.services.grading import grade_answer
+from app.services.versions import QuestionSnapshot, get_snapshot
+
+# Колонки, которые перезаписывает измененный ответ
+_UPDATED_COLUMNS = ("selected_options", "text_answer", "is_correct", "points_earned", "answered_at")
+
+
+def ensure_accepting_answers(attempt: TestAttempt, limits: AttemptLimits) -> None:
+    """Ответы принимаются только в незавершенной и непросроченной попытке"""
+    if is_overdue(attempt, limits):
+        # Статус expired запишет следующий переход (finish/pause)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Attempt time is over"
+        )
+    if attempt.status != IN_PROGRESS:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Attempt is {attempt.status}"
+        )
+
+
+def load_questions(
+    db: Session, version_id: UUID, question_ids: Iterable[UUID]
+) -> Tuple[str, Dict[UUID, QuestionSnapshot]]:
+    """
+    Политика оценивания версии теста и ее вопросы по id из снимка в кеше;
+    чужой или несуществующий вопрос - 404
+    """
+    snapshot = get_snapshot(db, version_id)
+    questions = {}
+    for question_id in question_ids:
+        question = snapshot.questions.get(question_id)
+        if question is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Question not found or not related to this test"
+            )
+        questions[question_id] = question
+    return snapshot.scoring_policy, questions
+
+
+def upsert_answers(
+    db: Session,
+    attempt_id: UUID,
+    scoring_policy: str,
+    questions: Dict[UUID, QuestionSnapshot],
+    answers: Iterable[UserAnswerCreate],
+) -> List[Row]:
+    """
+    Записать ответы (по одному на вопрос) одним INSERT ... ON CONFLICT.
+    Возвращает только вставленные или измененные строки.
+    """
+    now = datetime.utcnow()
+    values = []
+    for answer in answers:
+        is_correct, points_earned = grade_answer(
+            questions[answer.question_id], answer.selected_options, answer.text_answer, scoring_policy
+        )
+        values.append({
+            "id": uuid4(),
+            "attempt_id": attempt_id,
+            "question_id": answer.question_id,
+            "selected_options": answer.selected_options,
+            "text_answer": answer.text_answer,
+            "is_correct": is_correct,
+            "points_earned": points_earned,
+            "answered_at": now,
+        })
+    if not values:
+        return []
+
+    stmt = insert(db, UserAnswer).values(values)
+    excluded = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserAnswer.attempt_id, UserAnswer.question_id],
+        set_={column: excluded[column] for column in _UPDATED_COLUMNS},
+        # У json в PostgreSQL нет оператора равенства: сравниваем текст,
+        # обе стороны сериализованы одинаково
+        where=or_(
+            cast(UserAnswer.selected_options, Text).is_distinct_from(cast(excluded.selected_options, Text)),
+            UserAnswer.text_answer.is_distinct_from(excluded.text_answer),
+        ),
+    ).returning(*UserAnswer.__table__.c)
+    return db.execute(stmt).all()
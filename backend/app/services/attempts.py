@@ -0,0 +1,231 @@
+"""
+Машина состояний попытки прохождения теста.
+
+    in_progress -> paused -> in_progress
+    in_progress | paused -> completed | abandoned | expired
+
+Каждый переход - один UPDATE ... WHERE id = :id AND version = :version
+AND status IN (:допустимые) RETURNING (compare-and-swap). Если строку успел
+изменить параллельный запрос, UPDATE ничего не вернет, и клиент получит 409.
+
+Паузы ограничены версией теста: не больше max_pauses раз и не больше
+pause_budget_seconds в сумме. Пауза сверх бюджета идет в срок попытки, так
+что и попытка на паузе может истечь.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, NamedTuple, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app.db.models.active_attempts import ActiveAttempt
+from app.db.models.test_versions import TestVersion
+from app.db.models.test_attempts import TestAttempt
+from app.db.models.user_answers import UserAnswer
+from app.services import monitoring
+
+IN_PROGRESS = "in_progress"
+PAUSED = "paused"
+COMPLETED = "completed"
+ABANDONED = "abandoned"
+EXPIRED = "expired"
+
+# Незавершенные состояния: такая попытка записана в active_attempts
+ACTIVE_STATUSES = (IN_PROGRESS, PAUSED)
+
+# действие -> (из каких состояний, в какое)
+TRANSITIONS: Dict[str, Tuple[Tuple[str, ...], str]] = {
+    "pause": ((IN_PROGRESS,), PAUSED),
+    "resume": ((PAUSED,), IN_PROGRESS),
+    "finish": (ACTIVE_STATUSES, COMPLETED),
+    "abandon": (ACTIVE_STATUSES, ABANDONED),
+    "expire": (ACTIVE_STATUSES, EXPIRED),
+}
+
+
+class AttemptLimits(NamedTuple):
+    """Ограничения версии теста, на которой идет попытка"""
+    duration: int  # минуты
+    pause_budget_seconds: int
+    max_pauses: int
+
+
+def paused_credit(attempt: TestAttempt, limits: AttemptLimits, now: datetime) -> float:
+    """Секунды паузы (прошлых и текущей), не входящие в срок: не больше бюджета"""
+    paused = attempt.paused_seconds or 0
+    if attempt.status == PAUSED and attempt.paused_at is not None:
+        paused += max((now - attempt.paused_at).total_seconds(), 0)
+    return min(paused, limits.pause_budget_seconds)
+
+
+def deadline(attempt: TestAttempt, limits: AttemptLimits, now: Optional[datetime] = None) -> datetime:
+    """Срок попытки: пауза в пределах бюджета не учитывается"""
+    credit = paused_credit(attempt, limits, now or datetime.utcnow())
+    return attempt.started_at + timedelta(minutes=limits.duration, seconds=credit)
+
+
+def is_overdue(attempt: TestAttempt, limits: AttemptLimits, now: Optional[datetime] = None) -> bool:
+    now = now or datetime.utcnow()
+    return attempt.status in ACTIVE_STATUSES and now > deadline(attempt, limits, now)
+
+
+def get_attempt_for_update(
+    db: Session, attempt_id: UUID, user_id: UUID, shared: bool = False
+) -> Tuple[TestAttempt, AttemptLimits]:
+    """
+    Попытка пользователя и ограничения ее версии теста одним запросом.
+
+    Переходы блокируют строку FOR UPDATE. Прием ответа берет FOR SHARE: он не
+    дает завершить попытку, пока ответ не записан, но не блокирует параллельные
+    ответы на другие вопросы. Под FOR SHARE строку попытки менять нельзя -
+    два запроса, повышающие блокировку, взаимно заблокируются.
+    """
+    row = db.execute(
+        select(TestAttempt, TestVersion.duration, TestVersion.pause_budget_seconds, TestVersion.max_pauses)
+        .join(TestVersion, TestVersion.id == TestAttempt.test_version_id)
+        .where(TestAttempt.id == attempt_id, TestAttempt.user_id == user_id)
+        .with_for_update(read=shared, of=TestAttempt)
+    ).first()
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Attempt not found or not yours"
+        )
+    return row[0], AttemptLimits(*row[1:])
+
+
+def _compare_and_swap(db: Session, attempt: TestAttempt, action: str, expected_version: int, **values) -> TestAttempt:
+    sources, target = TRANSITIONS[action]
+    stmt = (
+        update(TestAttempt)
+        .where(
+            TestAttempt.id == attempt.id,
+            TestAttempt.version == expected_version,
+            TestAttempt.status.in_(sources),
+        )
+        .values(status=target, version=TestAttempt.version + 1, **values)
+        .returning(TestAttempt)
+    )
+    updated = db.scalars(
+        stmt, execution_options={"synchronize_session": False, "populate_existing": True}
+    ).first()
+    if updated is None:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Cannot {action} attempt: it was modified concurrently or is {attempt.status}"
+        )
+    if target not in ACTIVE_STATUSES:
+        # Завершенная попытка освобождает место для новой
+        db.execute(delete(ActiveAttempt).where(ActiveAttempt.attempt_id == updated.id))
+    return updated
+
+
+def _commit(db: Session, attempt: TestAttempt) -> TestAttempt:
+    """Коммит перехода и событие для мониторинга (откаченный переход не публикуется)"""
+    event = monitoring.attempt_event(attempt)
+    db.commit()
+    monitoring.publish(event)
+    return attempt
+
+
+def _check_transition(attempt: TestAttempt, action: str, expected_version: Optional[int]) -> int:
+    sources, _ = TRANSITIONS[action]
+    if attempt.status not in sources:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Cannot {action} attempt in status {attempt.status}"
+        )
+    if expected_version is not None and expected_version != attempt.version:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Attempt version is {attempt.version}, expected {expected_version}"
+        )
+    return attempt.version
+
+
+def expire_if_overdue(db: Session, attempt: TestAttempt, limits: AttemptLimits) -> None:
+    """Ленивая проверка срока: просроченная попытка переводится в expired"""
+    if not is_overdue(attempt, limits):
+        return
+    _commit(db, _compare_and_swap(db, attempt, "expire", attempt.version, completed_at=datetime.utcnow()))
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Attempt time is over"
+    )
+
+
+def pause_attempt(db: Session, attempt_id: UUID, user_id: UUID, expected_version: Optional[int] = None) -> TestAttempt:
+    attempt, limits = get_attempt_for_update(db, attempt_id, user_id)
+    expire_if_overdue(db, attempt, limits)
+    version = _check_transition(attempt, "pause", expected_version)
+    if (attempt.pause_count or 0) >= limits.max_pauses:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Pause limit reached ({limits.max_pauses})"
+        )
+    if (attempt.paused_seconds or 0) >= limits.pause_budget_seconds:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Pause time budget is exhausted"
+        )
+    attempt = _compare_and_swap(
+        db, attempt, "pause", version,
+        paused_at=datetime.utcnow(),
+        pause_count=TestAttempt.pause_count + 1,
+    )
+    return _commit(db, attempt)
+
+
+def resume_attempt(db: Session, attempt_id: UUID, user_id: UUID, expected_version: Optional[int] = None) -> TestAttempt:
+    attempt, limits = get_attempt_for_update(db, attempt_id, user_id)
+    # Пауза сверх бюджета шла в срок: время могло кончиться
+    expire_if_overdue(db, attempt, limits)
+    version = _check_transition(attempt, "resume", expected_version)
+    # paused_at не мог измениться: CAS по версии это гарантирует
+    paused_for = int((datetime.utcnow() - attempt.paused_at).total_seconds()) if attempt.paused_at else 0
+    attempt = _compare_and_swap(
+        db, attempt, "resume", version,
+        paused_at=None,
+        paused_seconds=TestAttempt.paused_seconds + paused_for,
+    )
+    return _commit(db, attempt)
+
+
+def score_values(attempt_id, version_id) -> Dict:
+    """
+    score/max_score подзапросами-агрегатами для UPDATE test_attempts.
+    Принимает значения или столбцы (пересчет многих попыток одним UPDATE).
+    Политика оценивания уже учтена в points_earned при проверке ответа,
+    max_score посчитан при публикации версии (сумма весов вопросов).
+    """
+    score = (
+        select(func.coalesce(func.sum(UserAnswer.points_earned), 0))
+        .where(UserAnswer.attempt_id == attempt_id)
+        .scalar_subquery()
+    )
+    max_score = select(TestVersion.max_score).where(TestVersion.id == version_id).scalar_subquery()
+    return {"score": score, "max_score": max_score}
+
+
+def finish_attempt(db: Session, attempt_id: UUID, user_id: UUID, expected_version: Optional[int] = None) -> TestAttempt:
+    """Завершить попытку; баллы считаются агрегатами в том же UPDATE"""
+    attempt, limits = get_attempt_for_update(db, attempt_id, user_id)
+    version = _check_transition(attempt, "finish", expected_version)
+    now = datetime.utcnow()
+
+    values = {"completed_at": now, "paused_at": None, **score_values(attempt.id, attempt.test_version_id)}
+    # Завершение после срока фиксирует результат, но со статусом expired
+    action = "expire" if is_overdue(attempt, limits, now) else "finish"
+    attempt = _compare_and_swap(db, attempt, action, version, **values)
+    return _commit(db, attempt)
+
+
+def abandon_attempt(db: Session, attempt_id: UUID, user_id: UUID, expected_version: Optional[int] = None) -> TestAttempt:
+    attempt, _ = get_attempt_for_update(db, attempt_id, user_id)
+    version = _check_transition(attempt, "abandon", expected_version)
+    attempt = _compare_and_swap(db, attempt, "abandon", version, completed_at=datetime.utcnow(), paused_at=None)
+    return _commit(db, attempt)
@@ -0,0 +1,323 @@
+"""
+Массовые операции администратора над тестами.
+
+Задача (bulk_jobs) обрабатывает отобранные фильтром тесты порциями по
+BULK_CHUNK_SIZE в порядке id. Каждая порция - отдельная короткая транзакция
+с lock_timeout, между порциями пауза BULK_CHUNK_PAUSE_SECONDS: экзамены не
+ждут длинных блокировок. Курсор и счетчики коммитятся вместе с порцией,
+поэтому после падения воркера задача продолжается с места остановки, а
+отмена срабатывает на границе порции.
+
+Исполняет задачу очереди bulk.run (app/services/tasks.py) в процессе
+воркера `python -m app.worker`: она забирает ожидающую или зависшую (без
+heartbeat дольше JOBS_STALE_SECONDS) операцию условным UPDATE, так что одну
+операцию выполняет один процесс.
+
+Кеш тел тестов (test_payload_cache) живет в памяти каждого API-воркера, а
+порции выполняются в другом процессе, поэтому сбросить его отсюда нельзя:
+API отдает прежнее тело измененного или удаленного теста до истечения
+TEST_CACHE_TTL_SECONDS.
+"""
+
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import and_, delete, func, or_, select, text, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.core import jobs
+from app.core.config import settings
+from app.db.models.active_attempts import ActiveAttempt
+from app.db.models.bulk_jobs import BulkJob
+from app.db.models.questions import Question
+from app.db.models.test import Test
+from app.db.models.test_versions import TestVersion
+from app.db.models.test_attempts import TestAttempt
+from app.db.models.user_answers import UserAnswer
+from app.schemas.bulk_job import BulkJobCreate
+from app.services.attempts import COMPLETED, EXPIRED, score_values
+from app.services.grading import grade_answer
+from app.services.versions import QUESTION_FIELDS, publish
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "completed"
+CANCELLED = "cancelled"
+FAILED = "failed"
+
+
+def _test_clauses(job: BulkJob) -> List:
+    """Условия отбора; тесты, созданные после постановки задачи (в том числе ее копии), не входят"""
+    f = job.filter or {}
+    clauses = [Test.created_at <= job.created_at]
+    if f.get("test_ids") is not None:
+        clauses.append(Test.id.in_([UUID(str(test_id)) for test_id in f["test_ids"]]))
+    if f.get("title_contains"):
+        clauses.append(Test.title.icontains(f["title_contains"], autoescape=True))
+    if f.get("is_active") is not None:
+        clauses.append(Test.is_active.is_(f["is_active"]))
+    if f.get("created_after"):
+        clauses.append(Test.created_at >= datetime.fromisoformat(f["created_after"]))
+    if f.get("created_before"):
+        clauses.append(Test.created_at < datetime.fromisoformat(f["created_before"]))
+    return clauses
+
+
+def create_job(db: Session, data: BulkJobCreate, user_id: Optional[UUID]) -> BulkJob:
+    job = BulkJob(
+        action=data.action,
+        filter=data.filter.model_dump(mode="json", exclude_none=True),
+        status=PENDING,
+        created_by=user_id,
+        created_at=datetime.utcnow(),
+    )
+    job.total = db.scalar(select(func.count()).select_from(Test).where(*_test_clauses(job)))
+    db.add(job)
+    db.flush()
+    jobs.enqueue(db, "bulk.run", {"bulk_job_id": str(job.id)}, created_by=user_id)
+    db.commit()
+    db.refresh(job)
+    logger.info(f"Bulk job {job.id} created: {job.action}, {job.total} tests")
+    return job
+
+
+def cancel_job(db: Session, job: BulkJob) -> BulkJob:
+    """Ожидающая задача отменяется сразу, выполняемая - на границе порции"""
+    if job.status == PENDING:
+        job.status = CANCELLED
+        job.finished_at = datetime.utcnow()
+    elif job.status == RUNNING:
+        job.cancel_requested = True
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def resume_job(db: Session, job: BulkJob) -> BulkJob:
+    """Отмененная или упавшая задача продолжается с сохраненного курсора"""
+    if job.status in (CANCELLED, FAILED):
+        job.status = PENDING
+        job.cancel_requested = False
+        job.error = None
+        job.finished_at = None
+        jobs.enqueue(db, "bulk.run", {"bulk_job_id": str(job.id)}, created_by=job.created_by)
+        db.commit()
+        db.refresh(job)
+    return job
+
+
+# --- Действия над порцией тестов; возвращают число пропущенных ---
+
+def _set_active(value: bool) -> Callable[[Session, List[UUID]], int]:
+    def apply(db: Session, test_ids: List[UUID]) -> int:
+        db.execute(update(Test).where(Test.id.in_(test_ids)).values(is_active=value))
+        return 0
+    return apply
+
+
+def delete_tests(db: Session, test_ids: List[UUID]) -> List[UUID]:
+    """
+    Удалить тесты с версиями, вопросами, попытками и ответами явными DELETE (без
+    загрузки объектов). Тесты, которые сейчас проходят, не трогаются;
+    возвращает их id. Коммит за вызывающим.
+    """
+    # FOR UPDATE ждет начатые start_test (их вставка держит FOR KEY SHARE на тесте)
+    locked = db.scalars(select(Test.id).where(Test.id.in_(test_ids)).order_by(Test.id).with_for_update()).all()
+    busy = set(db.scalars(select(ActiveAttempt.test_id).where(ActiveAttempt.test_id.in_(locked)).distinct()))
+    deletable = [test_id for test_id in locked if test_id not in busy]
+    if deletable:
+        attempt_ids = select(TestAttempt.id).where(TestAttempt.test_id.in_(deletable))
+        db.execute(delete(UserAnswer).where(UserAnswer.attempt_id.in_(attempt_ids)))
+        db.execute(delete(TestAttempt).where(TestAttempt.test_id.in_(deletable)))
+        db.execute(delete(Question).where(Question.test_id.in_(deletable)))
+        db.execute(delete(TestVersion).where(TestVersion.test_id.in_(deletable)))
+        db.execute(delete(Test).where(Test.id.in_(deletable)))
+    return sorted(busy)
+
+
+def _delete(db: Session, test_ids: List[UUID]) -> int:
+    return len(delete_tests(db, test_ids))
+
+
+def _duplicate(db: Session, test_ids: List[UUID]) -> int:
+    """Копия текущей версии теста; копия создается неактивной, чтобы ее проверили перед публикацией"""
+    tests = db.scalars(select(Test).where(Test.id.in_(test_ids))).all()
+    for test in tests:
+        copy = Test(
+            id=uuid4(),
+            title=f"{test.title} (копия)"[:255],
+            description=test.description,
+            duration=test.duration,
+            scoring_policy=test.scoring_policy,
+            pause_budget_seconds=test.pause_budget_seconds,
+            max_pauses=test.max_pauses,
+            is_active=False,
+            created_at=datetime.utcnow(),
+        )
+        db.add(copy)
+        questions = db.scalars(
+            select(Question).where(Question.version_id == test.current_version_id).order_by(Question.order_index)
+        ).all()
+        publish(db, copy, [{field: getattr(question, field) for field in QUESTION_FIELDS} for question in questions])
+    return 0
+
+
+def _regrade(db: Session, test_ids: List[UUID]) -> int:
+    """
+    Перепроверить ответы и пересчитать баллы завершенных попыток; каждый
+    ответ ссылается на вопрос своей версии, поэтому проверяется по ней и
+    по ее политике оценивания
+    """
+    for test_id in test_ids:
+        questions = {
+            question.id: (question, scoring_policy)
+            for question, scoring_policy in db.execute(
+                select(Question, TestVersion.scoring_policy)
+                .join(TestVersion, TestVersion.id == Question.version_id)
+                .where(Question.test_id == test_id)
+            )
+        }
+        rows = db.execute(
+            select(
+                UserAnswer.id, UserAnswer.attempt_id, UserAnswer.question_id, UserAnswer.selected_options,
+                UserAnswer.text_answer, UserAnswer.is_correct, UserAnswer.points_earned,
+            )
+            .join(TestAttempt, TestAttempt.id == UserAnswer.attempt_id)
+            .where(TestAttempt.test_id == test_id)
+        ).all()
+        for row in rows:
+            if row.question_id not in questions:
+                continue
+            question, scoring_policy = questions[row.question_id]
+            is_correct, points_earned = grade_answer(question, row.selected_options, row.text_answer, scoring_policy)
+            if (is_correct, points_earned) != (row.is_correct, row.points_earned):
+                # attempt_id в условии отсекает лишние секции
+                db.execute(
+                    update(UserAnswer)
+                    .where(UserAnswer.id == row.id, UserAnswer.attempt_id == row.attempt_id)
+                    .values(is_correct=is_correct, points_earned=points_earned)
+                )
+        db.execute(
+            update(TestAttempt)
+            .where(TestAttempt.test_id == test_id, TestAttempt.status.in_((COMPLETED, EXPIRED)))
+            .values(**score_values(TestAttempt.id, TestAttempt.test_version_id))
+        )
+    return 0
+
+
+ACTIONS: Dict[str, Callable[[Session, List[UUID]], int]] = {
+    "activate": _set_active(True),
+    "deactivate": _set_active(False),
+    "delete": _delete,
+    "duplicate": _duplicate,
+    "regrade": _regrade,
+}
+
+
+# --- Исполнение ---
+
+def _finish(db: Session, job: BulkJob, status: str, error: Optional[str] = None) -> None:
+    job.status = status
+    job.error = error
+    job.finished_at = job.heartbeat_at = datetime.utcnow()
+    db.commit()
+    logger.info(f"Bulk job {job.id} {status}: processed {job.processed}, skipped {job.skipped}")
+
+
+def _run_chunk(db: Session, job: BulkJob) -> bool:
+    """Одна порция в одной транзакции; False - задача завершена"""
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text(f"SET LOCAL lock_timeout = {int(settings.BULK_LOCK_TIMEOUT_MS)}"))
+    query = select(Test.id).where(*_test_clauses(job))
+    if job.cursor is not None:
+        query = query.where(Test.id > job.cursor)
+    test_ids = db.scalars(query.order_by(Test.id).limit(settings.BULK_CHUNK_SIZE)).all()
+    if not test_ids:
+        _finish(db, job, DONE)
+        return False
+
+    skipped = ACTIONS[job.action](db, test_ids)
+    job.cursor = test_ids[-1]
+    job.processed += len(test_ids) - skipped
+    job.skipped += skipped
+    job.heartbeat_at = datetime.utcnow()
+    db.commit()
+    return True
+
+
+def run_job(job_id: UUID) -> None:
+    """Выполнять захваченную задачу до конца, отмены или ошибки"""
+    from app.db.session import SessionLocal
+
+    with SessionLocal() as db:
+        retries = 0
+        while True:
+            job = db.get(BulkJob, job_id, populate_existing=True)
+            if job is None or job.status != RUNNING:
+                return
+            if job.cancel_requested:
+                _finish(db, job, CANCELLED)
+                return
+            if jobs.stopping():
+                job.status = PENDING
+                db.commit()
+                logger.info(f"Bulk job {job_id} released on shutdown")
+                raise jobs.Retry()
+            try:
+                if not _run_chunk(db, job):
+                    return
+                retries = 0
+            except OperationalError as e:
+                # Чаще всего lock_timeout: порция откатилась, повторяем позже
+                db.rollback()
+                retries += 1
+                if retries > settings.BULK_CHUNK_RETRIES:
+                    _finish(db, db.get(BulkJob, job_id), FAILED, str(e.orig or e)[:1000])
+                    return
+                logger.warning(f"Bulk job {job_id} chunk retry {retries}: {str(e.orig or e)}")
+                time.sleep(settings.BULK_CHUNK_PAUSE_SECONDS * 2 ** retries)
+                continue
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Bulk job {job_id} failed: {str(e)}")
+                _finish(db, db.get(BulkJob, job_id), FAILED, str(e)[:1000])
+                return
+            time.sleep(settings.BULK_CHUNK_PAUSE_SECONDS)
+
+
+def run(job_id: UUID) -> str:
+    """
+    Задача очереди bulk.run: захватить операцию условным UPDATE и выполнить.
+    Если операцию еще выполняет живой процесс (повторная постановка после
+    resume), задача откладывается; возвращает итоговый статус операции.
+    """
+    from app.db.session import SessionLocal
+
+    now = datetime.utcnow()
+    runnable = or_(
+        BulkJob.status == PENDING,
+        and_(BulkJob.status == RUNNING, BulkJob.heartbeat_at < now - timedelta(seconds=settings.JOBS_STALE_SECONDS)),
+    )
+    with SessionLocal() as db:
+        claimed = db.execute(
+            update(BulkJob)
+            .where(BulkJob.id == job_id, runnable)
+            .values(status=RUNNING, heartbeat_at=now, started_at=func.coalesce(BulkJob.started_at, now))
+        ).rowcount
+        db.commit()
+        if not claimed:
+            status = db.scalar(select(BulkJob.status).where(BulkJob.id == job_id))
+            if status == RUNNING:
+                raise jobs.Retry(settings.JOBS_STALE_SECONDS)
+            return status or "missing"
+
+    logger.info(f"Bulk job {job_id} started")
+    run_job(job_id)
+    with SessionLocal() as db:
+        return db.scalar(select(BulkJob.status).where(BulkJob.id == job_id))
@@ -0,0 +1,54 @@
+"""
+Проверка ответа по политике оценивания теста.
+
+Политика задается тестом (Test.scoring_policy) и замораживается в версии,
+вес вопроса - его points. Баллы за вопрос с выбором:
+- all_or_nothing - все points за точное совпадение, иначе 0;
+- partial_credit - доля points за каждый верный вариант минус штраф за
+  каждый неверный, не меньше 0. Штраф - points / (число неверных
+  вариантов), так что выбор всех вариантов подряд дает 0;
+- negative_marking - то же без нижней границы 0 (до -points): угадывание
+  в среднем ничего не приносит.
+Пропущенный вопрос - 0 при любой политике. Открытые вопросы автоматически
+не проверяются (is_correct = None, 0 баллов).
+
+Баллы округляются до сотых - как хранятся в user_answers.points_earned;
+итог попытки считает один агрегат в UPDATE (attempts.score_values).
+"""
+
+from typing import List, Optional, Tuple
+
+ALL_OR_NOTHING = "all_or_nothing"
+PARTIAL_CREDIT = "partial_credit"
+NEGATIVE_MARKING = "negative_marking"
+SCORING_POLICIES = (ALL_OR_NOTHING, PARTIAL_CREDIT, NEGATIVE_MARKING)
+
+CHOICE_TYPES = ("single_choice", "multiple_choice")
+
+
+def grade_answer(
+    question,
+    selected_options: Optional[List[int]],
+    text_answer: Optional[str],
+    policy: str = ALL_OR_NOTHING,
+) -> Tuple[Optional[bool], float]:
+    """Проверка ответа: возвращает (is_correct, points_earned); question - Question или QuestionSnapshot"""
+    if question.question_type not in CHOICE_TYPES:
+        return None, 0
+    if not selected_options:
+        return False, 0
+
+    selected = set(selected_options)
+    correct = set(question.correct_answers or [])
+    points = question.points or 0
+    is_correct = selected == correct
+    if is_correct or policy == ALL_OR_NOTHING or not correct:
+        return is_correct, points if is_correct else 0
+
+    hits = len(selected & correct)
+    misses = len(selected - correct)
+    wrong_options = max(len(question.options or []) - len(correct), 1)
+    earned = points * (hits / len(correct) - misses / wrong_options)
+    if policy == PARTIAL_CREDIT:
+        earned = max(earned, 0)
+    return False, round(max(earned, -points), 2)
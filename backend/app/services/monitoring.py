@@ -0,0 +1,257 @@
+"""
+Живой мониторинг сессии теста для проктора.
+
+start_test, submit_answer и переходы попытки публикуют события в канал
+теста (app/core/events.py). Подписчик один раз читает снимок незавершенных
+попыток, дальше состояние обновляется только событиями - без запросов к
+test_attempts/user_answers. События одной попытки схлопываются, и клиент
+получает не больше одного обновления за MONITOR_THROTTLE_SECONDS.
+
+События идемпотентны (ответ - пара попытка/вопрос, попытка - ее полное
+состояние с версией), поэтому повтор и гонка со снимком ничего не портят.
+
+Срок и число вопросов у каждой попытки - по ее версии теста, как при
+проверке ответов (attempts.AttemptLimits): после переиздания теста
+начатые попытки остаются на старых ограничениях.
+"""
+
+import time
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional
+from uuid import UUID
+
+import orjson
+from fastapi import Request
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.events import Subscription, broker
+from app.db.models.active_attempts import ActiveAttempt
+from app.db.models.questions import Question
+from app.db.models.test import Test
+from app.db.models.test_attempts import TestAttempt
+from app.db.models.test_versions import TestVersion
+from app.db.models.user import User
+from app.db.models.user_answers import UserAnswer
+from app.db.session import SessionLocal
+
+# Поля попытки в событиях и снимке
+_ATTEMPT_FIELDS = ("user_id", "test_version_id", "status", "version", "started_at", "paused_at", "paused_seconds",
+                  "pause_count", "score", "max_score")
+
+
+def channel(test_id) -> str:
+    return f"test:{test_id}"
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def attempt_event(attempt: TestAttempt, email: Optional[str] = None) -> Dict:
+    """Состояние попытки; строится до коммита, пока атрибуты загружены"""
+    event = {
+        "type": "attempt",
+        "test_id": str(attempt.test_id),
+        "attempt_id": str(attempt.id),
+        "user_id": str(attempt.user_id),
+        "test_version_id": str(attempt.test_version_id) if attempt.test_version_id is not None else None,
+        "status": attempt.status,
+        "version": attempt.version,
+        "started_at": _iso(attempt.started_at),
+        "paused_at": _iso(attempt.paused_at),
+        "paused_seconds": attempt.paused_seconds or 0,
+        "pause_count": attempt.pause_count or 0,
+        "score": attempt.score,
+        "max_score": attempt.max_score,
+    }
+    if email is not None:
+        event["email"] = email
+    return event
+
+
+def answer_event(test_id: UUID, attempt_id: UUID, question_id: UUID) -> Dict:
+    return {
+        "type": "answer",
+        "test_id": str(test_id),
+        "attempt_id": str(attempt_id),
+        "question_id": str(question_id),
+    }
+
+
+def publish(event: Dict) -> None:
+    broker.publish(channel(event["test_id"]), event)
+
+
+def load_snapshot(db: Session, test_id: UUID) -> Optional[Dict]:
+    """Незавершенные попытки теста с отвеченными вопросами и ограничения версий (None - теста нет)"""
+    current_version_id = db.scalar(select(Test.current_version_id).where(Test.id == test_id))
+    if current_version_id is None and db.scalar(select(Test.id).where(Test.id == test_id)) is None:
+        return None
+
+    # Версий у теста единицы: берем все, чтобы знать ограничения любой начатой попытки
+    counts = dict(db.execute(
+        select(Question.version_id, func.count()).where(Question.test_id == test_id).group_by(Question.version_id)
+    ).all())
+    versions = {
+        str(row.id): {
+            "duration": row.duration,
+            "pause_budget_seconds": row.pause_budget_seconds,
+            "questions": counts.get(row.id, 0),
+        }
+        for row in db.execute(
+            select(TestVersion.id, TestVersion.duration, TestVersion.pause_budget_seconds)
+            .where(TestVersion.test_id == test_id)
+        )
+    }
+
+    attempts: Dict[str, Dict] = {}
+    rows = db.execute(
+        select(TestAttempt, User.email)
+        .join(ActiveAttempt, ActiveAttempt.attempt_id == TestAttempt.id)
+        .join(User, User.id == TestAttempt.user_id)
+        .where(ActiveAttempt.test_id == test_id)
+    )
+    for attempt, email in rows:
+        event = attempt_event(attempt, email)
+        event["answered"] = set()
+        attempts[event["attempt_id"]] = event
+
+    answered = db.execute(
+        select(UserAnswer.attempt_id, UserAnswer.question_id)
+        .join(ActiveAttempt, ActiveAttempt.attempt_id == UserAnswer.attempt_id)
+        .where(ActiveAttempt.test_id == test_id)
+    )
+    for attempt_id, question_id in answered:
+        if str(attempt_id) in attempts:
+            attempts[str(attempt_id)]["answered"].add(str(question_id))
+    db.rollback()
+    return {
+        "current_version_id": str(current_version_id) if current_version_id is not None else None,
+        "versions": versions,
+        "attempts": attempts,
+    }
+
+
+class MonitorState:
+    """Состояние сессии у одного подписчика: применяет события, копит измененные попытки"""
+
+    def __init__(self, snapshot: Dict):
+        self.versions: Dict[str, Dict] = snapshot["versions"]
+        self.current = self.versions.get(snapshot["current_version_id"], {})
+        self.attempts: Dict[str, Dict] = snapshot["attempts"]
+        self.dirty = set()
+        # Попытка на версии, опубликованной после снимка: ее ограничения есть только в базе
+        self.needs_reload = False
+
+    def apply(self, event: Dict) -> None:
+        attempt_id = event["attempt_id"]
+        row = self.attempts.get(attempt_id)
+        if event["type"] == "answer":
+            if row is None:
+                # События разных воркеров идут разными соединениями и могут
+                # обогнать друг друга: ответ пришел раньше события попытки
+                row = self.attempts[attempt_id] = {"attempt_id": attempt_id, "answered": set()}
+            row["answered"].add(event["question_id"])
+        elif row is None:
+            row = self.attempts[attempt_id] = dict(event, answered=set())
+        elif event["version"] >= row.get("version", 0):
+            row.update((key, event[key]) for key in (*_ATTEMPT_FIELDS, "email") if key in event)
+        if row.get("test_version_id") is not None and row["test_version_id"] not in self.versions:
+            self.needs_reload = True
+        self.dirty.add(attempt_id)
+
+    def _time_left(self, row: Dict, limits: Optional[Dict], now: datetime) -> Optional[int]:
+        if limits is None or row.get("started_at") is None or row.get("status") not in ("in_progress", "paused"):
+            return None
+        # Как attempts.deadline: пауза идет в срок только сверх бюджета версии
+        paused = row.get("paused_seconds") or 0
+        if row.get("status") == "paused" and row.get("paused_at"):
+            paused += max((now - datetime.fromisoformat(row["paused_at"])).total_seconds(), 0)
+        deadline = datetime.fromisoformat(row["started_at"]) + timedelta(
+            minutes=limits["duration"], seconds=min(paused, limits["pause_budget_seconds"])
+        )
+        return max(0, int((deadline - now).total_seconds()))
+
+    def _render(self, row: Dict, now: datetime) -> Dict:
+        limits = self.versions.get(row.get("test_version_id"))
+        rendered = {key: value for key, value in row.items() if key not in ("type", "test_id", "answered")}
+        rendered["answered"] = len(row["answered"])
+        rendered["questions"] = limits["questions"] if limits is not None else None
+        rendered["time_left_seconds"] = self._time_left(row, limits, now)
+        return rendered
+
+    def snapshot(self) -> Dict:
+        now = datetime.utcnow()
+        return {
+            "server_time": now.isoformat(),
+            "duration_minutes": self.current.get("duration"),
+            "questions": self.current.get("questions"),
+            "attempts": [self._render(row, now) for row in self.attempts.values()],
+        }
+
+    def flush(self) -> Dict:
+        """Измененные попытки; завершенные отправляются последний раз и забываются"""
+        now = datetime.utcnow()
+        changed: List[Dict] = []
+        for attempt_id in self.dirty:
+            row = self.attempts[attempt_id]
+            changed.append(self._render(row, now))
+            if row.get("status") not in (None, "in_progress", "paused"):
+                del self.attempts[attempt_id]
+        self.dirty.clear()
+        return {"server_time": now.isoformat(), "attempts": changed}
+
+
+def _sse(event: str, data: Dict) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+def _reload_snapshot(test_id: UUID) -> Optional[Dict]:
+    with SessionLocal() as db:
+        return load_snapshot(db, test_id)
+
+
+async def stream(request: Request, test_id: UUID, subscription: Subscription, snapshot: Dict) -> AsyncIterator[bytes]:
+    """
+    Поток Server-Sent Events: ``snapshot`` при подключении, затем ``update``
+    с измененными попытками не чаще раза в MONITOR_THROTTLE_SECONDS.
+    """
+    throttle = settings.MONITOR_THROTTLE_SECONDS
+    with subscription:
+        state = MonitorState(snapshot)
+        yield _sse("snapshot", state.snapshot())
+        last_flush = time.monotonic()
+        while True:
+            if subscription.lost or state.needs_reload:
+                # Очередь переполнялась (события потеряны) или появилась новая
+                # версия теста: состояние заново из базы
+                subscription.lost = False
+                while subscription.get_nowait() is not None:
+                    pass
+                snapshot = await run_in_threadpool(_reload_snapshot, test_id)
+                if snapshot is None:
+                    return
+                state = MonitorState(snapshot)
+                yield _sse("snapshot", state.snapshot())
+                last_flush = time.monotonic()
+
+            if state.dirty:
+                timeout = max(0.0, last_flush + throttle - time.monotonic())
+            else:
+                timeout = settings.MONITOR_KEEPALIVE_SECONDS
+            event = await subscription.get(timeout)
+            while event is not None:
+                state.apply(event)
+                event = subscription.get_nowait()
+
+            if await request.is_disconnected():
+                return
+            if state.dirty:
+                if time.monotonic() - last_flush >= throttle:
+                    yield _sse("update", state.flush())
+                    last_flush = time.monotonic()
+            elif timeout == settings.MONITOR_KEEPALIVE_SECONDS:
+                yield b": keepalive\n\n"
@@ -0,0 +1,141 @@
+"""
+Банк вопросов: каждый вопрос хранится один раз, тесты ссылаются на него.
+
+Вопрос банка адресуется содержимым - sha256 от типа, текста и вариантов
+после нормализации (NFC, пробелы схлопнуты, края обрезаны). Регистр не
+нормализуется: вопросы с общей строкой банка должны выглядеть одинаково.
+Порядок вариантов входит в ключ - на него ссылаются индексы правильных
+ответов. Правильные ответы, баллы и порядок остаются в строке questions
+(своей у каждой версии теста), поэтому один вопрос банка может по-разному
+оцениваться в разных тестах.
+
+Дедупликация происходит при публикации версии (resolve): новые вопросы
+вставляются одним INSERT ... ON CONFLICT (content_hash) DO NOTHING, так что
+параллельные импорты одного вопроса не создают дублей. Та же нормализация
+повторена в SQL миграции, перенесшей вопросы в банк.
+"""
+
+import hashlib
+import unicodedata
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import distinct, func, select
+from sqlalchemy.orm import Session
+
+from app.db.dialect import insert
+from app.db.ids import uuid7
+from app.db.models.question_bank import BankQuestion
+from app.db.models.questions import Question
+from app.db.models.test import Test
+from app.db.models.user_answers import UserAnswer
+
+# Разделители полей и вариантов в строке для хеша (как в миграции)
+_FIELD_SEPARATOR = "\x1f"
+_OPTION_SEPARATOR = "\x1e"
+
+
+def normalize(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def content_hash(question_text: str, options: Optional[Sequence[str]], question_type: str) -> str:
+    options = options or []
+    key = _FIELD_SEPARATOR.join((
+        question_type,
+        normalize(question_text),
+        str(len(options)),
+        _OPTION_SEPARATOR.join(normalize(option) for option in options),
+    ))
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def resolve(db: Session, questions: Sequence[Dict]) -> List[UUID]:
+    """
+    id вопросов банка для ``questions`` (словари с question_text, options,
+    question_type) в том же порядке; недостающие вставляются. Коммит за
+    вызывающим.
+    """
+    now = datetime.utcnow()
+    hashes = []
+    rows: Dict[str, Dict] = {}
+    for question in questions:
+        digest = content_hash(question["question_text"], question["options"], question["question_type"])
+        hashes.append(digest)
+        rows.setdefault(digest, {
+            "id": uuid7(now),
+            "content_hash": digest,
+            "question_text": question["question_text"],
+            "options": question["options"],
+            "question_type": question["question_type"],
+            "created_at": now,
+        })
+    if not rows:
+        return []
+    db.execute(
+        insert(db, BankQuestion)
+        .values(list(rows.values()))
+        .on_conflict_do_nothing(index_elements=[BankQuestion.content_hash])
+    )
+    ids = dict(db.execute(
+        select(BankQuestion.content_hash, BankQuestion.id).where(BankQuestion.content_hash.in_(list(rows)))
+    ).all())
+    return [ids[digest] for digest in hashes]
+
+
+def list_questions(db: Session, search: Optional[str], limit: int) -> List[Dict]:
+    """Вопросы банка с числом использующих их тестов, самые используемые первыми"""
+    tests = func.count(distinct(Question.test_id)).label("tests")
+    query = (
+        select(BankQuestion, tests)
+        .join(Question, Question.bank_question_id == BankQuestion.id)
+        .group_by(BankQuestion.id)
+        .order_by(tests.desc(), BankQuestion.id)
+        .limit(limit)
+    )
+    if search:
+        query = query.where(BankQuestion.question_text.icontains(search, autoescape=True))
+    return [_describe(question, {"tests": count}) for question, count in db.execute(query)]
+
+
+def question_stats(db: Session, question: BankQuestion) -> Dict:
+    """Статистика ответов на вопрос банка по всем тестам и версиям"""
+    tests, current_tests = db.execute(
+        select(
+            func.count(distinct(Question.test_id)),
+            func.count(distinct(Test.id)),
+        )
+        .select_from(Question)
+        .outerjoin(Test, Test.current_version_id == Question.version_id)
+        .where(Question.bank_question_id == question.id)
+    ).one()
+    answers, correct, points = db.execute(
+        select(
+            func.count(),
+            func.count().filter(UserAnswer.is_correct.is_(True)),
+            func.coalesce(func.avg(UserAnswer.points_earned), 0),
+        )
+        .select_from(UserAnswer)
+        .join(Question, Question.id == UserAnswer.question_id)
+        .where(Question.bank_question_id == question.id)
+    ).one()
+    return _describe(question, {
+        "tests": tests,
+        "current_tests": current_tests,
+        "answers": answers,
+        "correct": correct,
+        "correct_rate": correct / answers if answers else None,
+        "avg_points": float(points),
+    })
+
+
+def _describe(question: BankQuestion, stats: Dict) -> Dict:
+    return {
+        "id": question.id,
+        "question_text": question.question_text,
+        "options": question.options,
+        "question_type": question.question_type,
+        "created_at": question.created_at,
+        **stats,
+    }
@@ -0,0 +1,63 @@
+"""
+Типы фоновых задач очереди (см. app/core/jobs.py).
+
+Функция задачи выполняется в процессе пула воркера (app/worker.py):
+получает payload (JSON), возвращает JSON-результат или бросает
+исключение - тогда задача повторяется с отсрочкой. Задача может быть
+выполнена повторно (воркер упал), поэтому она должна быть идемпотентной.
+Тяжелые зависимости импортируются внутри функций: API импортирует
+реестр только ради списка типов.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+from uuid import UUID
+
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class Task:
+    func: Callable[[Dict], Any]
+    max_attempts: Optional[int] = None  # None - JOBS_MAX_ATTEMPTS
+
+
+def _bulk_run(payload: Dict) -> Dict:
+    from app.services import bulk
+
+    return {"status": bulk.run(UUID(payload["bulk_job_id"]))}
+
+
+def _archive_run(payload: Dict) -> Dict:
+    from app.db.archive import archive_attempts
+    from app.db.session import engine
+
+    days = payload.get("older_than_days", settings.ARCHIVE_RETENTION_DAYS)
+    paths = archive_attempts(
+        engine, Path(settings.ARCHIVE_DIR), datetime.utcnow() - timedelta(days=days), settings.ARCHIVE_BATCH_SIZE
+    )
+    return {"files": [path.name for path in paths]}
+
+
+def _partitions_ensure(payload: Dict) -> Dict:
+    from app.db.partitions import ensure_partitions
+    from app.db.session import engine
+
+    if engine.dialect.name != "postgresql":
+        return {"created": []}
+    return {"created": ensure_partitions(engine, payload.get("ahead", settings.PARTITIONS_AHEAD_MONTHS))}
+
+
+TASKS: Dict[str, Task] = {
+    # Состояние и повторы ведет сама массовая операция (bulk_jobs)
+    "bulk.run": Task(_bulk_run, max_attempts=3),
+    "archive.run": Task(_archive_run),
+    "partitions.ensure": Task(_partitions_ensure),
+}
+
+
+def execute(kind: str, payload: Dict) -> Any:
+    """Точка входа в процессе пула"""
+    return TASKS[kind].func(payload)
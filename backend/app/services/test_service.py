@@ -1,10 +1,15 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
 from app.db.models.test import Test
-from app.db.models.questions import Question
+from app.db.models.test_versions import TestVersion
 from app.schemas.test import TestCreate
 from app.exceptions import NotFoundException
+from app.core.cache import test_payload_cache, version_cache
+from app.core.compression import PrecompressedPayload
+from app.core.serialization import dump_test
+from app.services.versions import Snapshot, publish
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,21 +20,14 @@ def create_test_with_questions(db: Session, payload: TestCreate) -> Test:
             title=payload.title,
             description=payload.description,
             duration=payload.duration,
-            is_active=payload.is_active
+            is_active=payload.is_active,
+            scoring_policy=payload.scoring_policy,
+            pause_budget_seconds=payload.pause_budget_seconds,
+            max_pauses=payload.max_pauses
         )
         db.add(test)
         db.flush()
-        questions = []
-        for q in payload.questions:
-            question = Question(
-                test_id = test.id,
-                question_text = q.question_text,
-                options = q.options,
-                correct_answers = q.correct_answers,
-                question_type = q.question_type
-            )
-            questions.append(question)
-        db.bulk_save_objects(questions)
+        publish(db, test, [q.model_dump() for q in payload.questions])
         db.commit()
         db.refresh(test)
         logger.info(f"Test created successfully: {test.id}")
@@ -76,4 +74,28 @@ def get_test_by_id(db: Session, test_id: str) -> Test:
     test = db.query(Test).filter(Test.id == test_id).first()
     if not test:
         raise NotFoundException(f"Тест с ID {test_id} не найден")
-    return test
\ No newline at end of file
+    return test
+
+def warm_test_cache(db: Session, limit: int) -> int:
+    """
+    Загрузить последние активные тесты в кеш ответов GET /tests/{test_id}
+    и снимки их текущих версий (по ним проверяются ответы)
+    """
+    tests = (
+        db.query(Test)
+        .options(selectinload(Test.questions))
+        .filter(Test.is_active.is_(True))
+        .order_by(Test.created_at.desc())
+        .limit(limit)
+        .all()
+    )
+    for test in tests:
+        test_payload_cache.set(test.id, PrecompressedPayload(dump_test(test)))
+    versions = [test.current_version_id for test in tests if test.current_version_id is not None]
+    # Версии из миграции без блоба соберет первое чтение
+    for version_id, blob in db.execute(
+        select(TestVersion.id, TestVersion.snapshot)
+        .where(TestVersion.id.in_(versions), TestVersion.snapshot.is_not(None))
+    ):
+        version_cache.set(version_id, Snapshot(blob))
+    return len(tests)
\ No newline at end of file
@@ -0,0 +1,217 @@
+"""
+Версии тестов: публикация замораживает неизменяемый снимок.
+
+Каждое сохранение теста (создание, update_test, копирование) публикует
+новую версию: строку test_versions и новые строки questions с ее
+version_id. Старые вопросы не удаляются и не меняются, поэтому попытка,
+начатая на версии N (test_attempts.test_version_id), проверяется и
+считается по версии N, даже если тест успели отредактировать.
+
+Версия хранится дважды:
+- нормализованно - строки questions: на них ссылаются ответы; текст и
+  варианты - в банке вопросов (app/services/question_bank.py), сумма
+  весов - в test_versions.max_score (для attempts.score_values);
+- одним JSON-блобом (test_versions.snapshot) - для кеша и отдачи клиенту.
+
+Снимок неизменяем, поэтому лежит в version_cache без TTL и без
+инвалидации: прием ответа берет вопросы из памяти, без запроса к базе.
+У версий, созданных миграцией, блоба нет - его соберет и сохранит первое
+чтение. Повторная публикация без изменений (тот же content_hash) новую
+версию не создает. Политика оценивания (app/services/grading.py) и лимиты
+пауз входят в версию: их смена - новая версия, начатые попытки живут по старой.
+"""
+
+import hashlib
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+from uuid import UUID, uuid4
+
+import orjson
+from fastapi import HTTPException, status
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.cache import version_cache
+from app.core.compression import PrecompressedPayload
+from app.core.serialization import dump_model
+from app.db.ids import uuid7
+from app.db.models.questions import Question
+from app.db.models.test import Test
+from app.db.models.test_versions import TestVersion
+from app.schemas.test import TestVersionResponse
+from app.services import question_bank
+from app.services.grading import ALL_OR_NOTHING
+
+logger = logging.getLogger(__name__)
+
+# Поля теста и вопроса, из которых состоит версия (и ее content_hash)
+VERSION_FIELDS = ("title", "description", "duration", "scoring_policy", "pause_budget_seconds", "max_pauses")
+QUESTION_FIELDS = ("question_text", "options", "correct_answers", "question_type", "points")
+
+
+class QuestionSnapshot(NamedTuple):
+    """Вопрос версии в кеше; атрибуты совпадают с Question для grade_answer"""
+    id: UUID
+    question_text: str
+    options: Optional[List[str]]
+    correct_answers: Any
+    question_type: str
+    points: int
+    order_index: int
+
+
+class Snapshot:
+    """Версия в памяти: готовый ответ клиенту и вопросы по id для проверки ответов"""
+
+    __slots__ = ("id", "test_id", "duration", "scoring_policy", "questions", "payload", "etag")
+
+    def __init__(self, blob: bytes):
+        data = orjson.loads(blob)
+        self.id = UUID(data["id"])
+        self.test_id = UUID(data["test_id"])
+        self.duration: int = data["duration"]
+        self.scoring_policy: str = data.get("scoring_policy", ALL_OR_NOTHING)
+        self.questions: Dict[UUID, QuestionSnapshot] = {}
+        for question in data["questions"]:
+            question_id = UUID(question["id"])
+            self.questions[question_id] = QuestionSnapshot(**{**question, "id": question_id})
+        self.payload = PrecompressedPayload(blob)
+        # Версия неизменяема: id достаточно для валидатора кеша клиента.
+        # Слабый - тело зависит от Content-Encoding
+        self.etag = f'W/"{self.id}"'
+
+
+def _question_values(question: Dict) -> Dict:
+    values = {field: question.get(field) for field in QUESTION_FIELDS}
+    if values["points"] is None:
+        values["points"] = 1
+    if values["question_type"] is None:
+        values["question_type"] = "multiple_choice"
+    return values
+
+
+def content_hash(fields: Dict, questions: Sequence[Dict]) -> str:
+    content = {**fields, "questions": questions}
+    return hashlib.sha256(orjson.dumps(content, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+def _dump(version: TestVersion, questions: Sequence) -> bytes:
+    return dump_model(TestVersionResponse, {
+        "id": version.id,
+        "test_id": version.test_id,
+        "version": version.version,
+        **{field: getattr(version, field) for field in VERSION_FIELDS},
+        "published_at": version.published_at,
+        "questions": questions,
+    })
+
+
+def publish(db: Session, test: Test, questions: Sequence[Dict]) -> TestVersion:
+    """
+    Опубликовать текущие поля ``test`` и ``questions`` (словари полей
+    QuestionCreate) новой версией и сделать ее текущей. Коммит за
+    вызывающим; параллельные публикации одного теста сериализует
+    блокировка строки теста у вызывающего (или уникальность номера версии).
+    """
+    db.flush()  # строка теста нужна до версии (внешний ключ)
+    values = [_question_values(question) for question in questions]
+    fields = {field: getattr(test, field) for field in VERSION_FIELDS}
+    digest = content_hash(fields, values)
+    if test.current_version_id is not None:
+        current = db.get(TestVersion, test.current_version_id)
+        if current is not None and current.content_hash == digest:
+            return current
+
+    number = db.scalar(select(func.coalesce(func.max(TestVersion.version), 0)).where(TestVersion.test_id == test.id))
+    version = TestVersion(
+        id=uuid7(),
+        test_id=test.id,
+        version=number + 1,
+        **fields,
+        max_score=sum(question["points"] for question in values),
+        content_hash=digest,
+        published_at=datetime.utcnow(),
+    )
+    bank_ids = question_bank.resolve(db, values)
+    rows = [
+        Question(
+            id=uuid4(),
+            test_id=test.id,
+            version_id=version.id,
+            bank_question_id=bank_id,
+            correct_answers=question["correct_answers"],
+            points=question["points"],
+            order_index=i,
+        )
+        for i, (question, bank_id) in enumerate(zip(values, bank_ids))
+    ]
+    version.snapshot = _dump(version, [
+        {**question, "id": row.id, "order_index": row.order_index} for question, row in zip(values, rows)
+    ])
+    db.add(version)
+    db.flush()  # вопросы ссылаются на версию
+    db.bulk_save_objects(rows)
+    test.current_version_id = version.id
+    logger.info(f"Test {test.id} published as version {version.version}")
+    return version
+
+
+def _materialize(db: Session, version_id: UUID) -> Optional[bytes]:
+    """Собрать блоб версии из строк (версии из миграции) и сохранить его"""
+    version = db.get(TestVersion, version_id)
+    if version is None:
+        return None
+    rows = db.scalars(
+        select(Question).where(Question.version_id == version_id).order_by(Question.order_index)
+    ).all()
+    blob = _dump(version, rows)
+    try:
+        # Отдельной транзакцией: запрос, прочитавший версию, мог ничего не писать
+        with Session(bind=db.get_bind()) as session:
+            session.execute(
+                update(TestVersion)
+                .where(TestVersion.id == version_id, TestVersion.snapshot.is_(None))
+                .values(snapshot=blob)
+            )
+            session.commit()
+    except Exception as e:
+        # Не страшно: блоб соберется заново при следующем промахе кеша
+        logger.warning(f"Snapshot of test version {version_id} not saved: {str(e)}")
+    return blob
+
+
+def get_snapshot(db: Session, version_id: UUID) -> Snapshot:
+    """Снимок версии из кеша, при промахе - из базы; нет версии - 404"""
+    snapshot = version_cache.get(version_id)
+    if snapshot is not None:
+        return snapshot
+    blob = db.scalar(select(TestVersion.snapshot).where(TestVersion.id == version_id))
+    if blob is None:
+        blob = _materialize(db, version_id)
+    if blob is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Test version not found"
+        )
+    snapshot = Snapshot(blob)
+    version_cache.set(version_id, snapshot)
+    return snapshot
+
+
+def list_versions(db: Session, test: Test) -> List[Dict]:
+    versions = db.execute(
+        select(TestVersion.id, TestVersion.version, TestVersion.title, TestVersion.published_at)
+        .where(TestVersion.test_id == test.id)
+        .order_by(TestVersion.version.desc())
+    ).all()
+    return [
+        {
+            "id": version.id,
+            "version": version.version,
+            "title": version.title,
+            "published_at": version.published_at,
+            "is_current": version.id == test.current_version_id,
+        }
+        for version in versions
+    ]
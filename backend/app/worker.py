@@ -0,0 +1,206 @@
+"""
+Воркер фоновых задач: отдельный процесс рядом с API.
+
+    python -m app.worker                  # процессов - JOBS_PROCESSES или по CPU
+    python -m app.worker --processes 2
+
+Главный процесс забирает задачи из очереди (app/core/jobs.py), пока есть
+свободные процессы пула, обновляет их heartbeat и записывает результат.
+Сами задачи (app/services/tasks.py) выполняются в ProcessPoolExecutor:
+тяжелая работа не делит GIL ни с API, ни с опросом очереди. Внешних
+сервисов не нужно - только база (локально подойдет и SQLite, но без SKIP
+LOCKED и только с одним воркером).
+
+- SIGTERM/SIGINT: новые задачи не берутся, начатые дорабатывают в пределах
+  JOBS_SHUTDOWN_SECONDS (длинные отдают задачу через jobs.stopping()),
+  затем процессы пула завершаются, а их задачи вернутся в очередь по heartbeat;
+- если процесс пула умер (OOM, segfault), его задачи получают ошибку попытки,
+  пул пересоздается;
+- раз в JOBS_HEARTBEAT_SECONDS - heartbeat своих задач и возврат в очередь
+  задач упавших воркеров, раз в час - удаление старых завершенных задач.
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+from uuid import UUID
+
+from app.core import jobs
+from app.core.config import settings
+from app.db.session import SessionLocal, engine
+from app.services.tasks import TASKS, execute
+
+logger = logging.getLogger(__name__)
+
+PURGE_INTERVAL_SECONDS = 3600
+
+
+def process_count() -> int:
+    if settings.JOBS_PROCESSES > 0:
+        return settings.JOBS_PROCESSES
+    return os.cpu_count() or 1
+
+
+def _init_process(stop_event) -> None:
+    # Остановкой управляет главный процесс, а Ctrl+C в терминале получает вся группа
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    # Соединения, унаследованные через fork, принадлежат главному процессу
+    engine.dispose(close=False)
+    jobs.set_stop_event(stop_event)
+
+
+def _describe(exc: BaseException) -> str:
+    return f"{type(exc).__name__}: {exc}"
+
+
+class Worker:
+    def __init__(self, processes: int):
+        self.processes = processes
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self.stop = threading.Event()
+        # Видно задачам в процессах пула (jobs.stopping())
+        self.stop_event = multiprocessing.Event()
+        self.running: Dict[Future, UUID] = {}
+        self.pool = self._new_pool()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(self.processes, initializer=_init_process, initargs=(self.stop_event,))
+
+    def shutdown(self, signum=None, frame=None) -> None:
+        if not self.stop.is_set():
+            logger.info(f"Worker {self.name} stopping, {len(self.running)} jobs running")
+        self.stop.set()
+        self.stop_event.set()
+
+    def _claim(self) -> bool:
+        """Заполнить свободные процессы; True - очередь, возможно, не пуста"""
+        free = self.processes - len(self.running)
+        if free <= 0 or self.stop.is_set():
+            return False
+        with SessionLocal() as db:
+            claimed = [(job.id, job.kind, job.payload) for job in jobs.claim(db, self.name, free)]
+            db.commit()
+            for job_id, kind, payload in claimed:
+                if kind not in TASKS:
+                    jobs.fail(db, job_id, self.name, f"Unknown job kind: {kind}", permanent=True)
+                    db.commit()
+                    continue
+                try:
+                    self.running[self.pool.submit(execute, kind, payload)] = job_id
+                except BrokenProcessPool:
+                    self.pool = self._new_pool()
+                    self.running[self.pool.submit(execute, kind, payload)] = job_id
+                logger.info(f"Job {job_id} ({kind}) started")
+        return len(claimed) == free
+
+    def _finish(self, future: Future) -> None:
+        job_id = self.running.pop(future)
+        error: Optional[str] = None
+        retry_in: Optional[float] = None
+        result = None
+        try:
+            result = future.result()
+        except jobs.Retry as e:
+            error, retry_in = "Released for retry", e.delay
+        except BrokenProcessPool as e:
+            error = f"Worker process died: {_describe(e)}"
+        except Exception as e:
+            # В __cause__ - трейсбек из процесса пула
+            logger.error(f"Job {job_id} failed: {_describe(e)}", exc_info=e)
+            error = _describe(e)
+        try:
+            with SessionLocal() as db:
+                if error is None:
+                    jobs.complete(db, job_id, self.name, result)
+                else:
+                    jobs.fail(db, job_id, self.name, error, retry_in)
+                db.commit()
+        except Exception as e:
+            # Задача останется running без heartbeat и вернется в очередь как зависшая
+            logger.error(f"Job {job_id} result not saved: {_describe(e)}")
+            return
+        if error is None:
+            logger.info(f"Job {job_id} succeeded")
+
+    def _maintain(self, purge: bool) -> None:
+        with SessionLocal() as db:
+            jobs.heartbeat(db, self.name, list(self.running.values()))
+            jobs.requeue_stale(db)
+            if purge:
+                purged = jobs.purge(db)
+                if purged:
+                    logger.info(f"Purged {purged} finished jobs")
+            db.commit()
+
+    def _terminate(self) -> None:
+        logger.warning(f"Worker {self.name}: {len(self.running)} jobs still running after shutdown timeout")
+        for process in multiprocessing.active_children():
+            process.terminate()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self.shutdown)
+        signal.signal(signal.SIGINT, self.shutdown)
+        logger.info(f"Worker {self.name} started with {self.processes} processes")
+        next_heartbeat = next_purge = 0.0
+        deadline: Optional[float] = None
+        while True:
+            if self.stop.is_set():
+                if not self.running:
+                    break
+                deadline = deadline or time.monotonic() + settings.JOBS_SHUTDOWN_SECONDS
+                if time.monotonic() >= deadline:
+                    self._terminate()
+                    return
+            more = False
+            try:
+                more = self._claim()
+                now = time.monotonic()
+                if now >= next_heartbeat:
+                    purge = now >= next_purge
+                    self._maintain(purge)
+                    next_heartbeat = now + settings.JOBS_HEARTBEAT_SECONDS
+                    if purge:
+                        next_purge = now + PURGE_INTERVAL_SECONDS
+            except Exception as e:
+                # База недоступна: выполняемые задачи дорабатывают, опрос повторится
+                logger.error(f"Job queue unavailable: {_describe(e)}")
+            # Свободные процессы остались, а очередь не пуста - сразу за следующими
+            timeout = 0 if more and len(self.running) < self.processes else settings.JOBS_POLL_SECONDS
+            if self.running:
+                done, _ = wait(list(self.running), timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._finish(future)
+                if any(isinstance(future.exception(), BrokenProcessPool) for future in done):
+                    self.pool.shutdown(wait=False)
+                    self.pool = self._new_pool()
+            else:
+                self.stop.wait(timeout)
+        self.pool.shutdown()
+        logger.info(f"Worker {self.name} stopped")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.worker", description="Воркер фоновых задач")
+    parser.add_argument("--processes", type=int, help="процессов пула (по умолчанию JOBS_PROCESSES или по CPU)")
+    args = parser.parse_args()
+
+    from app.core.logging import setup_logging
+
+    setup_logging()
+    Worker(args.processes or process_count()).run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
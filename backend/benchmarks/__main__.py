@@ -0,0 +1,89 @@
+import argparse
+import os
+import sys
+import tempfile
+
+
+def _configure_database(args, parser: argparse.ArgumentParser) -> None:
+    """Настройки должны попасть в окружение до первого импорта app.*"""
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if args.base_url and args.suite in ("load", "all") and not url:
+        # Пользователи и тест создаются напрямую в базе: она должна быть базой целевого воркера
+        parser.error("--base-url requires BENCH_DATABASE_URL set to the database of the target server")
+    if not url:
+        path = os.path.join(tempfile.mkdtemp(prefix="bench-"), "bench.sqlite3")
+        url = f"sqlite:///{path}"
+    os.environ["DATABASE_URL"] = url
+    os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "1000000")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    print(f"Database: {url}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Бенчмарки Medical Tests API")
+    parser.add_argument("suite", choices=["micro", "load", "all", "seed"])
+    parser.add_argument("--min-time", type=float, default=1.0, help="секунд на микробенчмарк")
+    parser.add_argument("--users", type=int, default=10, help="виртуальных пользователей")
+    parser.add_argument("--questions", type=int, default=50, help="вопросов в тесте")
+    parser.add_argument("--answers", type=int, default=20, help="ответов за сценарий")
+    parser.add_argument("--iterations", type=int, default=1, help="сценариев на пользователя")
+    parser.add_argument("--base-url", help="URL работающего воркера (нужен BENCH_DATABASE_URL его базы)")
+    parser.add_argument("--output", help="куда сохранить JSON с результатами")
+    parser.add_argument("--compare", help="JSON baseline для сравнения")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="допустимый рост p50 (доля)")
+    parser.add_argument("--scale", type=float, default=0.01, help="seed: множитель объема (1 = продакшен)")
+    parser.add_argument("--seed", type=int, default=42, help="seed: зерно генератора")
+    parser.add_argument("--workers", type=int, default=4, help="seed: параллельных процессов COPY")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="seed: пользователей в чанке")
+    parser.add_argument("--truncate", action="store_true", help="seed: очистить таблицы перед наполнением")
+    args = parser.parse_args()
+
+    _configure_database(args, parser)
+
+    if args.suite == "seed":
+        from app.core.config import settings
+        from benchmarks import dataset
+        stats = dataset.seed_dataset(
+            settings.postgres_url, args.scale, args.seed, args.workers, args.chunk_size, args.truncate
+        )
+        for table, values in stats.items():
+            print(f"{table:<20} " + "  ".join(f"{key}={value}" for key, value in values.items()))
+        return 0
+
+    from benchmarks import common
+
+    results = {"environment": common.environment(), "parameters": vars(args), "suites": {}}
+
+    if args.suite in ("micro", "all"):
+        from benchmarks import micro
+        results["suites"]["micro"] = micro.run(args.min_time)
+        common.print_table("micro", results["suites"]["micro"])
+
+    if args.suite in ("load", "all"):
+        from benchmarks import load
+        load_results = load.run(args.users, args.questions, args.answers, args.iterations, args.base_url)
+        throughput = load_results.pop("throughput")
+        results["suites"]["load"] = load_results
+        results["throughput"] = throughput
+        common.print_table(
+            "load", load_results,
+            f"{throughput['requests_per_sec']} req/s, {throughput['scenarios_per_sec']} scenarios/s, errors: {throughput['errors']}",
+        )
+
+    if args.output:
+        common.write_results(args.output, results)
+        print(f"\nResults saved to {args.output}")
+
+    if args.compare:
+        regressions = common.compare(results, args.compare, args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\nNo regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
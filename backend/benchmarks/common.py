@@ -0,0 +1,98 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """Сводка по выборке длительностей (секунды -> миллисекунды)"""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        index = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+        return ordered[index] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 4),
+        "p50_ms": round(pick(0.50), 4),
+        "p95_ms": round(pick(0.95), 4),
+        "p99_ms": round(pick(0.99), 4),
+        "max_ms": round(ordered[-1] * 1000, 4),
+    }
+
+
+def bench(func: Callable[[], object], min_time: float = 1.0, warmup: int = 10) -> Dict[str, float]:
+    """Вызывать func, пока не наберется min_time секунд; вернуть ops/s и перцентили"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    deadline = time.perf_counter() + min_time
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    result = percentiles(samples)
+    result["ops_per_sec"] = round(len(samples) / sum(samples), 2)
+    return result
+
+
+def environment() -> Dict[str, str]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=False
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": commit or "unknown",
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+    }
+
+
+def write_results(path: str, results: Dict) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+def compare(current: Dict, baseline_path: str, tolerance: float) -> List[str]:
+    """
+    Сравнить p50 с сохраненным baseline. Возвращает список регрессий:
+    бенчмарков, у которых p50 вырос больше чем на tolerance (доля).
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressions = []
+    for suite, benches in current.get("suites", {}).items():
+        for name, result in benches.items():
+            base = baseline.get("suites", {}).get(suite, {}).get(name)
+            if not base or "p50_ms" not in base or "p50_ms" not in result:
+                continue
+            if base["p50_ms"] > 0 and result["p50_ms"] > base["p50_ms"] * (1 + tolerance):
+                regressions.append(
+                    f"{suite}.{name}: p50 {base['p50_ms']:.3f} ms -> {result['p50_ms']:.3f} ms"
+                )
+    return regressions
+
+
+def print_table(suite: str, benches: Dict[str, Dict], extra: Optional[str] = None) -> None:
+    print(f"\n== {suite} ==" + (f" ({extra})" if extra else ""))
+    print(f"{'name':<40}{'count':>8}{'p50 ms':>12}{'p95 ms':>12}{'p99 ms':>12}{'ops/s':>12}")
+    for name, r in benches.items():
+        if not r.get("count"):
+            print(f"{name:<40}{0:>8}")
+            continue
+        ops = f"{r['ops_per_sec']:>12.1f}" if "ops_per_sec" in r else f"{'-':>12}"
+        print(
+            f"{name:<40}{r['count']:>8}{r['p50_ms']:>12.3f}{r['p95_ms']:>12.3f}"
+            f"{r['p99_ms']:>12.3f}{ops}"
+        )
@@ -0,0 +1,394 @@
+"""
+Генератор синтетических данных продакшен-объема.
+
+При --scale 1: 100k пользователей, 20k тестов по 5-100 вопросов (~1M
+вопросов), ~1M попыток и десятки миллионов ответов. Объем линейно
+масштабируется --scale.
+
+Данные детерминированы по --seed и не зависят от числа воркеров и размера
+чанка: идентификаторы вычисляются из (seed, вид сущности, номер) - у
+попыток это UUIDv7 от времени начала, - а у каждого теста и пользователя
+свой генератор случайных чисел. Поэтому
+чанки генерируются независимо, без чтения уже записанных строк.
+
+В PostgreSQL строки пишутся через COPY FROM STDIN параллельно в нескольких
+процессах; на SQLite (база бенчмарков по умолчанию) - INSERT в один поток.
+"""
+
+import json
+import random
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from multiprocessing import get_context
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import JSON, create_engine, inspect, text
+from sqlalchemy.engine import Engine
+
+from app.db.models import (
+    ActiveAttempt, BankQuestion, Base, Question, Test, TestAttempt, TestVersion, User, UserAnswer,
+)
+from app.db.partitions import add_months, create_partitions
+from app.services.question_bank import content_hash
+from benchmarks.load import BENCH_PASSWORD
+
+# Объемы при --scale 1
+BASE_USERS = 100_000
+BASE_TESTS = 20_000
+MIN_QUESTIONS, MAX_QUESTIONS = 5, 100
+MEAN_ATTEMPTS_PER_USER = 10
+MAX_ATTEMPTS_PER_USER = 64
+OPTIONS_PER_QUESTION = 4
+
+# Точка отсчета времени: от нее, а не от now(), чтобы данные не зависели от даты запуска
+EPOCH = datetime(2026, 1, 1)
+HISTORY_DAYS = 365
+
+# Вид сущности в старших битах UUID
+_USER, _TEST, _QUESTION, _ANSWER, _VERSION, _BANK = range(1, 7)
+
+_engines: Dict[str, Engine] = {}
+
+
+def make_id(seed: int, kind: int, index: int) -> uuid.UUID:
+    """
+    UUID вида da7a<seed:8><kind:4><index:16> (hex-цифры).
+
+    Префикс da7a помечает синтетические строки и гарантирует букву в hex:
+    SQLite хранит колонку UUID с числовой аффинностью и превратил бы
+    id из одних цифр в REAL.
+    """
+    return uuid.UUID(int=(0xDA7A << 112) | ((seed & 0xFFFFFFFF) << 80) | (kind << 64) | index)
+
+
+def make_attempt_id(seed: int, index: int, started_at: datetime) -> uuid.UUID:
+    """
+    Детерминированный UUIDv7: время started_at определяет секцию попытки.
+
+    Вместо случайных бит - маркер da7, вариант 0xa и (seed, номер).
+    """
+    millis = int((started_at - datetime(1970, 1, 1)).total_seconds() * 1000)
+    return uuid.UUID(int=(millis << 80) | (0x7DA7 << 64) | (0xA << 60) | ((seed & 0xFFFF) << 44) | index)
+
+
+def sizes(scale: float) -> Tuple[int, int]:
+    return max(1, int(BASE_USERS * scale)), max(1, int(BASE_TESTS * scale))
+
+
+# --- Генерация строк ---------------------------------------------------------
+
+@lru_cache(maxsize=4096)
+def test_spec(seed: int, test_no: int) -> Tuple[int, Tuple[Tuple[uuid.UUID, int, Tuple[int, ...], float], ...]]:
+    """Длительность теста и его вопросы: (id, баллы, правильные варианты, сложность)"""
+    rng = random.Random(f"{seed}:test:{test_no}")
+    duration = rng.choice((15, 30, 45, 60, 90))
+    questions = tuple(
+        (
+            make_id(seed, _QUESTION, test_no * 128 + k),
+            rng.choice((1, 1, 1, 2, 3)),
+            tuple(sorted(rng.sample(range(OPTIONS_PER_QUESTION), rng.choice((1, 1, 2))))),
+            rng.uniform(-0.25, 0.35),
+        )
+        for k in range(rng.randint(MIN_QUESTIONS, MAX_QUESTIONS))
+    )
+    return duration, questions
+
+
+def user_rows(seed: int, start: int, stop: int, password_hash: str) -> Iterator[Dict]:
+    for i in range(start, stop):
+        yield {
+            "id": make_id(seed, _USER, i),
+            "email": f"user{i}.s{seed}@seed.example.com",
+            "hashed_password": password_hash,
+            "name": f"Пользователь {i}",
+            "is_active": True,
+            "role": "admin" if i == 0 else "student",
+            "token_version": 0,
+            "created_at": EPOCH - timedelta(days=HISTORY_DAYS, minutes=i),
+        }
+
+
+def test_rows(seed: int, start: int, stop: int) -> Tuple[List[Dict], List[Dict], List[Dict], List[Dict]]:
+    """Тесты, их версии (одна на тест), вопросы банка и вопросы тестов"""
+    tests, versions, bank, questions = [], [], [], []
+    for t in range(start, stop):
+        duration, spec = test_spec(seed, t)
+        test = {
+            "id": make_id(seed, _TEST, t),
+            "title": f"Тест {t}: клинический разбор",
+            "description": f"Синтетический тест {t}",
+            "duration": duration,
+            "is_active": t % 20 != 0,
+            "created_at": EPOCH - timedelta(days=HISTORY_DAYS) + timedelta(minutes=t),
+            "current_version_id": make_id(seed, _VERSION, t),
+            "scoring_policy": "all_or_nothing",
+            "pause_budget_seconds": 600,
+            "max_pauses": 3,
+        }
+        tests.append(test)
+        # Снимок не заполняется, как после миграции: его соберет первое чтение
+        versions.append({
+            "id": make_id(seed, _VERSION, t),
+            "test_id": test["id"],
+            "version": 1,
+            "title": test["title"],
+            "description": test["description"],
+            "duration": duration,
+            "scoring_policy": test["scoring_policy"],
+            "pause_budget_seconds": test["pause_budget_seconds"],
+            "max_pauses": test["max_pauses"],
+            "max_score": sum(q[1] for q in spec),
+            "published_at": test["created_at"],
+        })
+        for k, (question_id, points, correct, _) in enumerate(spec):
+            # Свой вопрос банка у каждого вопроса: чанки тестов пишутся
+            # параллельно и не могут ссылаться на строки друг друга
+            question_text = f"Вопрос {k + 1} теста {t}"
+            options = [f"Вариант {j + 1}" for j in range(OPTIONS_PER_QUESTION)]
+            bank_question_id = make_id(seed, _BANK, t * 128 + k)
+            bank.append({
+                "id": bank_question_id,
+                "content_hash": content_hash(question_text, options, "multiple_choice"),
+                "question_text": question_text,
+                "options": options,
+                "question_type": "multiple_choice",
+                "created_at": test["created_at"],
+            })
+            questions.append({
+                "id": question_id,
+                "test_id": make_id(seed, _TEST, t),
+                "version_id": make_id(seed, _VERSION, t),
+                "bank_question_id": bank_question_id,
+                "correct_answers": list(correct),
+                "points": points,
+                "order_index": k,
+            })
+    return tests, versions, bank, questions
+
+
+def _final_status(rng: random.Random, is_last: bool) -> str:
+    roll = rng.random()
+    # Незавершенной может быть только последняя попытка пользователя:
+    # уникальный индекс допускает одну активную попытку на (пользователь, тест)
+    if is_last and roll < 0.10:
+        return "in_progress"
+    if is_last and roll < 0.13:
+        return "paused"
+    if roll < 0.90:
+        return "completed"
+    if roll < 0.97:
+        return "abandoned"
+    return "expired"
+
+
+def attempt_rows(seed: int, start: int, stop: int, tests: int) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+    """Попытки пользователей [start, stop), ответы к ним и заявки незавершенных попыток"""
+    attempts, answers, active = [], [], []
+    for u in range(start, stop):
+        rng = random.Random(f"{seed}:user:{u}")
+        ability = rng.betavariate(4, 2)  # средняя доля правильных ~0.67
+        count = min(MAX_ATTEMPTS_PER_USER, int(rng.expovariate(1 / MEAN_ATTEMPTS_PER_USER)))
+        started = sorted(rng.uniform(0, HISTORY_DAYS * 86400) for _ in range(count))
+        for j, offset in enumerate(started):
+            # Популярность тестов неравномерна: первые тесты проходят чаще
+            test_no = int(tests * rng.random() ** 2)
+            duration, spec = test_spec(seed, test_no)
+            status = _final_status(rng, j == count - 1)
+            started_at = EPOCH - timedelta(days=HISTORY_DAYS) + timedelta(seconds=offset)
+            attempt_id = make_attempt_id(seed, u * MAX_ATTEMPTS_PER_USER + j, started_at)
+            answered = len(spec) if status == "completed" else rng.randint(0, len(spec))
+
+            score = 0
+            elapsed = 0.0
+            for k, (question_id, points, correct, difficulty) in enumerate(spec[:answered]):
+                is_correct = rng.random() < min(0.98, max(0.02, ability - difficulty))
+                if is_correct:
+                    selected = list(correct)
+                    score += points
+                else:
+                    selected = [rng.choice([o for o in range(OPTIONS_PER_QUESTION) if o not in correct])]
+                elapsed += rng.uniform(5, duration * 60 / len(spec))
+                answers.append({
+                    "id": make_id(seed, _ANSWER, (u * MAX_ATTEMPTS_PER_USER + j) * 128 + k),
+                    "attempt_id": attempt_id,
+                    "question_id": question_id,
+                    "selected_options": selected,
+                    "text_answer": None,
+                    "is_correct": is_correct,
+                    "points_earned": points if is_correct else 0,
+                    "answered_at": started_at + timedelta(seconds=elapsed),
+                })
+
+            finished = status in ("completed", "abandoned", "expired")
+            attempts.append({
+                "id": attempt_id,
+                "user_id": make_id(seed, _USER, u),
+                "test_id": make_id(seed, _TEST, test_no),
+                "test_version_id": make_id(seed, _VERSION, test_no),
+                "started_at": started_at,
+                "completed_at": started_at + timedelta(seconds=elapsed + 1) if finished else None,
+                "score": score if finished else None,
+                "max_score": sum(q[1] for q in spec) if finished else None,
+                "status": status,
+                "version": 1 if status == "in_progress" else 2,
+                "paused_at": started_at + timedelta(seconds=elapsed + 1) if status == "paused" else None,
+                "paused_seconds": 0,
+                "pause_count": 1 if status == "paused" else 0,
+                "client_seq": 0,
+            })
+            if not finished:
+                active.append({
+                    "user_id": make_id(seed, _USER, u),
+                    "test_id": make_id(seed, _TEST, test_no),
+                    "attempt_id": attempt_id,
+                })
+    return attempts, answers, active
+
+
+# --- Запись ------------------------------------------------------------------
+
+def _engine(url: str) -> Engine:
+    if url not in _engines:
+        _engines[url] = create_engine(url)
+    return _engines[url]
+
+
+_column_cache: Dict[Tuple[str, str], Tuple[str, ...]] = {}
+
+
+def _columns(connection, url: str, table: str) -> Tuple[str, ...]:
+    """Колонки модели, которые реально есть в таблице (история миграций расходится с моделями)"""
+    key = (url, table)
+    if key not in _column_cache:
+        # Через то же соединение: второе соединение SQLite ждало бы блокировку записи
+        existing = {column["name"] for column in inspect(connection).get_columns(table)}
+        model = _MODELS[table].__table__
+        _column_cache[key] = tuple(column.name for column in model.columns if column.name in existing)
+    return _column_cache[key]
+
+
+_MODELS = {
+    model.__tablename__: model
+    for model in (User, Test, TestVersion, BankQuestion, Question, TestAttempt, UserAnswer, ActiveAttempt)
+}
+
+
+def _write(connection, url: str, table: str, rows: Sequence[Dict]) -> int:
+    if not rows:
+        return 0
+    columns = _columns(connection, url, table)
+    if connection.dialect.name != "postgresql":
+        connection.execute(_MODELS[table].__table__.insert(), [{c: row.get(c) for c in columns} for row in rows])
+        return len(rows)
+
+    model_columns = _MODELS[table].__table__.columns
+    json_columns = {c for c in columns if isinstance(model_columns[c].type, JSON)}
+    cursor = connection.connection.driver_connection.cursor()
+    with cursor.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+        for row in rows:
+            copy.write_row([
+                json.dumps(row.get(c)) if c in json_columns and row.get(c) is not None else row.get(c)
+                for c in columns
+            ])
+    cursor.close()
+    return len(rows)
+
+
+def _run_chunk(task: Tuple) -> Dict[str, int]:
+    """Сгенерировать и записать один чанк; выполняется в процессе пула"""
+    url, kind, seed, start, stop, extra = task
+    if kind == "users":
+        batches = [("users", list(user_rows(seed, start, stop, extra)))]
+    elif kind == "tests":
+        tests, versions, bank, questions = test_rows(seed, start, stop)
+        batches = [("tests", tests), ("test_versions", versions), ("question_bank", bank), ("questions", questions)]
+    else:
+        attempts, answers, active = attempt_rows(seed, start, stop, extra)
+        batches = [("test_attempts", attempts), ("user_answers", answers), ("active_attempts", active)]
+
+    written = {}
+    with _engine(url).begin() as connection:
+        for table, rows in batches:
+            written[table] = _write(connection, url, table, rows)
+    return written
+
+
+def _chunks(total: int, size: int) -> Iterator[Tuple[int, int]]:
+    for start in range(0, total, size):
+        yield start, min(total, start + size)
+
+
+def seed_dataset(
+    url: str,
+    scale: float = 0.01,
+    seed: int = 42,
+    workers: int = 4,
+    chunk_size: int = 1000,
+    truncate: bool = False,
+) -> Dict[str, Dict[str, float]]:
+    """Наполнить базу; возвращает число строк по таблицам и общую скорость записи"""
+    from app.core.auth import get_password_hash
+
+    engine = _engine(url)
+    if engine.dialect.name != "postgresql":
+        # Одноразовая база бенчмарков: схема по моделям, запись в один поток
+        Base.metadata.create_all(engine)
+        workers = 1
+    if truncate:
+        with engine.begin() as connection:
+            if engine.dialect.name == "postgresql":
+                connection.execute(text(
+                    "TRUNCATE active_attempts, user_answers, test_attempts, questions, question_bank, test_versions, "
+                    "tests, users CASCADE"
+                ))
+            else:
+                for table in (
+                    "active_attempts", "user_answers", "test_attempts", "questions", "question_bank", "test_versions",
+                    "tests", "users",
+                ):
+                    connection.execute(text(f"DELETE FROM {table}"))
+
+    if engine.dialect.name == "postgresql":
+        # Секции на всю историю попыток и до текущего месяца
+        first = (EPOCH - timedelta(days=HISTORY_DAYS)).date()
+        last = add_months(max(EPOCH.date(), date.today()), 1)
+        with engine.begin() as connection:
+            create_partitions(connection, first, last)
+
+    users, tests = sizes(scale)
+    password_hash = get_password_hash(BENCH_PASSWORD)
+    # Вторая фаза ссылается на строки первой, поэтому фазы идут последовательно
+    phases = [
+        [(url, "users", seed, a, b, password_hash) for a, b in _chunks(users, chunk_size)]
+        + [(url, "tests", seed, a, b, None) for a, b in _chunks(tests, max(1, chunk_size // 10))],
+        [(url, "attempts", seed, a, b, tests) for a, b in _chunks(users, max(1, chunk_size // 10))],
+    ]
+
+    totals: Dict[str, int] = {}
+    started = time.perf_counter()
+    executor: Optional[ProcessPoolExecutor] = (
+        ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) if workers > 1 else None
+    )
+    try:
+        for tasks in phases:
+            results = executor.map(_run_chunk, tasks) if executor else map(_run_chunk, tasks)
+            for written in results:
+                for table, count in written.items():
+                    totals[table] = totals.get(table, 0) + count
+    finally:
+        if executor:
+            executor.shutdown()
+    elapsed = time.perf_counter() - started
+
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            for table in totals:
+                connection.execute(text(f"ANALYZE {table}"))
+
+    total = sum(totals.values())
+    stats: Dict[str, Dict[str, float]] = {table: {"rows": count} for table, count in totals.items()}
+    stats["total"] = {"rows": total, "seconds": round(elapsed, 2), "rows_per_sec": round(total / elapsed, 1)}
+    return stats
@@ -0,0 +1,124 @@
+"""
+Нагрузочный сценарий "начало экзамена":
+login -> start -> fetch test -> N answers -> finish.
+
+Каждый виртуальный пользователь проходит сценарий ``iterations`` раз;
+латентность собирается по шагам, пропускная способность считается по
+общему числу запросов за время прогона.
+"""
+
+import asyncio
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.common import percentiles
+from benchmarks.micro import make_test_payload
+
+BENCH_PASSWORD = "bench-password"
+
+
+def seed(users: int, questions: int) -> Dict:
+    """Создать пользователей и тест в базе, на которую смотрит app.db.session"""
+    from app.core.auth import get_password_hash
+    from app.crud.crud import create_test
+    from app.db.models import Base, User
+    from app.db.partitions import ensure_partitions
+    from app.db.session import SessionLocal, engine
+    from app.schemas.test import TestCreate
+
+    Base.metadata.create_all(engine)
+    ensure_partitions(engine)
+    hashed = get_password_hash(BENCH_PASSWORD)
+    emails = [f"bench-{i}@example.com" for i in range(users)]
+    with SessionLocal() as db:
+        existing = {email for (email,) in db.query(User.email).filter(User.email.in_(emails))}
+        db.add_all(User(email=email, hashed_password=hashed, name="Bench") for email in emails if email not in existing)
+        db.commit()
+        test = create_test(db, TestCreate.model_validate(make_test_payload(questions)))
+        question_ids = [q.id for q in sorted(test.questions, key=lambda q: q.order_index or 0)]
+        return {"emails": emails, "test_id": str(test.id), "question_ids": [str(q) for q in question_ids]}
+
+
+class Recorder:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.requests = 0
+
+    async def call(self, step: str, client: httpx.AsyncClient, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.samples[step].append(time.perf_counter() - start)
+        self.requests += 1
+        if response.status_code >= 400:
+            self.errors[f"{step}:{response.status_code}"] += 1
+            return None
+        return response
+
+
+async def _virtual_user(client: httpx.AsyncClient, recorder: Recorder, email: str, data: Dict, answers: int, iterations: int):
+    test_id = data["test_id"]
+    for _ in range(iterations):
+        scenario_start = time.perf_counter()
+        response = await recorder.call(
+            "login", client, "POST", "/api/v1/auth/login", json={"email": email, "password": BENCH_PASSWORD}
+        )
+        if response is None:
+            continue
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        response = await recorder.call("start", client, "GET", f"/api/v1/tests/{test_id}/start", headers=headers)
+        if response is None:
+            continue
+        attempt_id = response.json()["id"]
+
+        await recorder.call("fetch_test", client, "GET", f"/api/v1/tests/{test_id}", headers=headers)
+
+        for question_id in data["question_ids"][:answers]:
+            await recorder.call(
+                "submit_answer", client, "POST", f"/api/v1/attempts/{attempt_id}/submit-answer",
+                params={"question_id": question_id},
+                json={"question_id": question_id, "selected_options": [0]}, headers=headers,
+            )
+
+        await recorder.call("finish", client, "POST", f"/api/v1/attempts/{attempt_id}/finish", headers=headers)
+
+        recorder.samples["scenario"].append(time.perf_counter() - scenario_start)
+
+
+async def _run(client: httpx.AsyncClient, data: Dict, users: int, answers: int, iterations: int) -> Dict:
+    recorder = Recorder()
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _virtual_user(client, recorder, data["emails"][i], data, answers, iterations) for i in range(users)
+    ))
+    elapsed = time.perf_counter() - started
+
+    results = {step: percentiles(samples) for step, samples in recorder.samples.items()}
+    results["throughput"] = {
+        "requests": recorder.requests,
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_sec": round(recorder.requests / elapsed, 2),
+        "scenarios_per_sec": round(len(recorder.samples["scenario"]) / elapsed, 2),
+        "errors": dict(recorder.errors),
+    }
+    return results
+
+
+def run(users: int = 10, questions: int = 50, answers: int = 20, iterations: int = 1, base_url: Optional[str] = None) -> Dict:
+    """Сценарий экзамена; с base_url данные засеваются в DATABASE_URL, который должен быть базой этого воркера"""
+    data = seed(users, questions)
+
+    async def main():
+        if base_url:
+            client = httpx.AsyncClient(base_url=base_url, timeout=60)
+        else:
+            from app.main import app
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+        async with client:
+            return await _run(client, data, users, answers, iterations)
+
+    return asyncio.run(main())
@@ -0,0 +1,105 @@
+"""Микробенчмарки горячих участков без базы данных"""
+
+import json
+import random
+import uuid
+from typing import Dict
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.auth import create_access_token
+from app.core.keys import get_key_manager
+from app.core.cache import TTLCache
+from app.core.compression import SUPPORTED_ENCODINGS, compress
+from app.core.serialization import dump_test
+from app.db.models.question_bank import BankQuestion
+from app.db.models.questions import Question
+from app.db.models.test import Test
+from app.schemas.test import TestCreate
+from app.services.grading import NEGATIVE_MARKING, grade_answer
+from app.services.versions import QuestionSnapshot
+
+from benchmarks.common import bench
+
+
+def make_test_payload(questions: int = 100, options: int = 5, seed: int = 1) -> Dict:
+    """Тест с вопросами в формате TestCreate (как его присылает фронтенд)"""
+    rng = random.Random(seed)
+    return {
+        "title": "Кардиология: итоговый тест",
+        "description": "Бенчмарк-тест",
+        "duration": 60,
+        "is_active": True,
+        "scoring_policy": "partial_credit",
+        "questions": [
+            {
+                "question_text": f"Вопрос {i + 1}: какой препарат выбора при состоянии {rng.randint(1, 999)}?",
+                "options": [f"Вариант ответа {j + 1} к вопросу {i + 1}" for j in range(options)],
+                "correct_answers": sorted(rng.sample(range(options), rng.randint(1, 2))),
+                "question_type": "multiple_choice",
+                "points": rng.choice((1, 1, 2)),
+            }
+            for i in range(questions)
+        ],
+    }
+
+
+def _question(data: Dict) -> Question:
+    bank_question = BankQuestion(
+        question_text=data["question_text"], options=data["options"], question_type=data["question_type"]
+    )
+    return Question(bank_question=bank_question, correct_answers=data["correct_answers"], points=data["points"])
+
+
+def run(min_time: float = 1.0) -> Dict[str, Dict]:
+    results = {}
+
+    # Прием ответа проверяет вопрос из снимка версии в кеше
+    question = QuestionSnapshot(
+        id=uuid.uuid4(),
+        question_text="Вопрос",
+        options=["a", "b", "c", "d", "e"],
+        correct_answers=[0, 2],
+        question_type="multiple_choice",
+        points=1,
+        order_index=0,
+    )
+    results["grade_answer"] = bench(lambda: grade_answer(question, [0, 2], None), min_time)
+    results["grade_answer_negative_marking"] = bench(
+        lambda: grade_answer(question, [0, 1], None, NEGATIVE_MARKING), min_time
+    )
+
+    claims = {"sub": "0192f0c4-5a7e-7c3b-9d2e-4f6a8b1c3d5e", "email": "student@example.com", "role": "student", "ver": 0}
+    results["jwt_encode"] = bench(lambda: create_access_token(claims), min_time)
+    token = create_access_token(claims)
+    results["jwt_decode"] = bench(lambda: get_key_manager().decode(token), min_time)
+
+    payload = make_test_payload(100)
+    results["validate_test_create_100q"] = bench(lambda: TestCreate.model_validate(payload), min_time)
+    model = TestCreate.model_validate(payload)
+    results["dump_json_test_create_100q"] = bench(model.model_dump_json, min_time)
+
+    # Ответ GET /tests/{test_id}: старый путь FastAPI (валидация response_model ->
+    # jsonable_encoder -> json.dumps), новый (одна валидация -> байты) и попадание в кеш
+    # Поля со значениями по умолчанию берутся из схемы: у несохраненного Test
+    # умолчания колонок (pause_budget_seconds, max_pauses) еще не применены
+    payload = make_test_payload(100)
+    test = Test(**TestCreate.model_validate(payload).model_dump(exclude={"questions"}))
+    test.questions = [_question(q) for q in payload["questions"]]
+    results["response_test_100q_jsonable_encoder"] = bench(
+        lambda: json.dumps(
+            jsonable_encoder(TestCreate.model_validate(test, from_attributes=True)),
+            ensure_ascii=False, separators=(",", ":"),
+        ).encode("utf-8"),
+        min_time,
+    )
+    results["response_test_100q_direct_bytes"] = bench(lambda: dump_test(test), min_time)
+    cache = TTLCache("bench", 10, None)
+    cache.set(test.id, dump_test(test))
+    results["response_test_100q_cached"] = bench(lambda: cache.get(test.id), min_time)
+
+    body = dump_test(test)
+    for encoding in SUPPORTED_ENCODINGS:
+        results[f"compress_test_100q_{encoding}"] = bench(lambda: compress(body, encoding), min_time)
+
+    return results
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Проверка времени импорта приложения (холодный старт воркера).
+
+Запускает ``python -X importtime -c "import app.main"`` несколько раз и
+падает с кодом 1, если:
+- импорт app.main дольше импорта самих фреймворков (fastapi и
+  sqlalchemy.orm) больше чем в ``--max-ratio`` раз. Пары прогонов
+  чередуются и сравнивается медиана отношений, поэтому порог не зависит от
+  скорости машины и нагрузки на нее (CI-раннеры заметно медленнее ноутбука);
+- задан ``--budget-ms`` и медиана абсолютного времени его превышает;
+- при старте импортирован модуль, который должен загружаться лениво.
+
+    python check_import_time.py                       # как в CI: только относительный порог
+    python check_import_time.py --max-ratio 1.8 --runs 9
+    python check_import_time.py --budget-ms 1000      # абсолютный бюджет для своей машины
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+# Загружаются при первом использовании (см. app/core/auth.py, app/server.py, app/db/archive.py)
+LAZY_MODULES = ["passlib", "jose", "cryptography", "gunicorn", "benchmarks", "pyarrow"]
+
+# Нижняя граница: без этих импортов приложение не стартует
+BASELINE_MODULES = ["fastapi", "sqlalchemy.orm"]
+
+# Локально app.main примерно в 1.6 раза дольше базового импорта
+DEFAULT_MAX_RATIO = 2.0
+
+
+def measure(modules: List[str]) -> Tuple[float, Dict[str, int], List[Tuple[int, str]]]:
+    """
+    Один прогон: (мс на импорт modules, модуль -> кумулятивное время в мкс,
+    топ по кумулятивному времени). Время - сумма строк верхнего уровня для
+    modules, без запуска интерпретатора и site.
+    """
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="0")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+        capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if result.returncode != 0:
+        print(result.stderr)
+        sys.exit(2)
+
+    cumulative: Dict[str, int] = {}
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        try:
+            value = int(cumulative_us.strip())
+        except ValueError:
+            continue  # строка заголовка
+        # Верхний уровень - имя без отступа после разделителя
+        if not name[1:].startswith(" ") and name.strip() in modules:
+            total_us += value
+        cumulative[name.strip()] = value
+    top = sorted(((us, name) for name, us in cumulative.items()), reverse=True)[:15]
+    return total_us / 1000, cumulative, top
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Бюджет времени импорта app.main")
+    parser.add_argument("--max-ratio", type=float, default=float(os.environ.get("IMPORT_TIME_MAX_RATIO", DEFAULT_MAX_RATIO)),
+                        help="во сколько раз app.main может быть дольше импорта fastapi и sqlalchemy.orm")
+    budget = os.environ.get("IMPORT_TIME_BUDGET_MS")
+    parser.add_argument("--budget-ms", type=float, default=float(budget) if budget else None,
+                        help="абсолютный бюджет, мс (по умолчанию не проверяется)")
+    parser.add_argument("--runs", type=int, default=7)
+    args = parser.parse_args()
+
+    # Первый прогон прогревает .pyc и файловый кеш ОС и не учитывается
+    measure(["app.main"])
+    measure(BASELINE_MODULES)
+    pairs: List[Tuple[float, float]] = []
+    runs = []
+    for _ in range(args.runs):
+        baseline_ms, _, _ = measure(BASELINE_MODULES)
+        app_ms, cumulative, top = measure(["app.main"])
+        pairs.append((app_ms, baseline_ms))
+        runs.append((cumulative, top))
+    median_ms = statistics.median(app_ms for app_ms, _ in pairs)
+    baseline_ms = statistics.median(baseline for _, baseline in pairs)
+    ratio = statistics.median(app_ms / baseline for app_ms, baseline in pairs)
+
+    print(f"import app.main: median {median_ms:.1f} ms (runs: {', '.join(f'{app_ms:.0f}' for app_ms, _ in pairs)})")
+    print(f"import {', '.join(BASELINE_MODULES)}: median {baseline_ms:.1f} ms")
+    print(f"ratio: {ratio:.2f} (max {args.max_ratio:.2f})" + (f", budget: {args.budget_ms:.0f} ms" if args.budget_ms else ""))
+
+    failed = False
+    eager = sorted({name for name in runs[0][0] for lazy in LAZY_MODULES if name == lazy or name.startswith(lazy + ".")})
+    if eager:
+        print(f"❌ Модули должны загружаться лениво, но импортированы при старте: {', '.join(eager)}")
+        failed = True
+
+    over_ratio = ratio > args.max_ratio
+    over_budget = args.budget_ms is not None and median_ms > args.budget_ms
+    if over_ratio or over_budget:
+        print("❌ " + ("Импорт приложения непропорционально дольше фреймворков" if over_ratio else "Бюджет превышен")
+              + ". Самые тяжелые импорты:")
+        for us, name in runs[0][1]:
+            print(f"  {us / 1000:8.1f} ms  {name}")
+        failed = True
+
+    if not failed:
+        print("✅ OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Проверка планов горячих запросов (регрессии индексов).
+
+Наполняет базу синтетическими данными внутри транзакции, делает ANALYZE,
+выполняет EXPLAIN (FORMAT JSON) для каждого горячего запроса и падает с
+кодом 1, если в плане есть Seq Scan по таблице, где строк больше порога,
+или запрос по одной попытке читает больше одной секции таблицы.
+В конце транзакция откатывается, так что база остается как была.
+
+Нужна PostgreSQL со схемой на голове миграций (alembic upgrade head):
+
+    python check_query_plans.py
+    python check_query_plans.py --seq-scan-threshold 500 --scale 2
+    python check_query_plans.py --no-seed      # на существующих данных (копия прода)
+"""
+
+import argparse
+import json
+import sys
+import uuid
+from datetime import date
+from typing import Callable, Dict, List, Tuple
+
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.engine import Connection
+
+from app.core.config import settings
+from app.db.models import ActiveAttempt, Question, Test, TestAttempt, TestVersion, UserAnswer
+from app.db.partitions import add_months, create_partitions
+
+DEFAULT_SEQ_SCAN_THRESHOLD = 1000
+
+# Базовые объемы при --scale 1
+BASE_USERS = 2000
+BASE_TESTS = 2000
+QUESTIONS_PER_TEST = 20
+TESTS_PER_BANK_QUESTION = 4
+ATTEMPTS_PER_USER = 5
+ANSWERS_PER_ATTEMPT = 10
+
+
+def seed(conn: Connection, scale: float) -> None:
+    """
+    Синтетические данные одним INSERT ... SELECT на таблицу.
+
+    В users заполняются только колонки, общие для модели и истории миграций.
+    """
+    users = int(BASE_USERS * scale)
+    tests = int(BASE_TESTS * scale)
+    today = date.today()
+    create_partitions(conn, add_months(today, -1), add_months(today, 1))
+    conn.execute(text("""
+        INSERT INTO users (id, email, hashed_password, created_at)
+        SELECT gen_random_uuid(), 'plan-' || g || '@example.com', 'x', now()
+        FROM generate_series(1, :users) g
+    """), {"users": users})
+    conn.execute(text("""
+        INSERT INTO tests (id, title, description, duration, is_active, created_at)
+        SELECT gen_random_uuid(), 'Plan test ' || g, NULL, 30, g % 10 <> 0, now() - g * interval '1 minute'
+        FROM generate_series(1, :tests) g
+    """), {"tests": tests})
+    # Одна опубликованная версия на тест, как после миграции
+    conn.execute(text("""
+        INSERT INTO test_versions (id, test_id, version, title, description, duration, published_at)
+        SELECT gen_random_uuid(), id, 1, title, description, duration, created_at
+        FROM tests WHERE title LIKE 'Plan test %'
+    """))
+    conn.execute(text("""
+        UPDATE tests SET current_version_id = v.id FROM test_versions v
+        WHERE v.test_id = tests.id AND tests.title LIKE 'Plan test %'
+    """))
+    # Вопрос банка в среднем общий для нескольких тестов
+    bank = max(1, tests * QUESTIONS_PER_TEST // TESTS_PER_BANK_QUESTION)
+    conn.execute(text("""
+        INSERT INTO question_bank (id, content_hash, question_text, options, question_type, created_at)
+        SELECT gen_random_uuid(), md5('plan-a-' || g) || md5('plan-b-' || g), 'Plan question ' || g,
+               '["a", "b"]', 'multiple_choice', now()
+        FROM generate_series(1, :bank) g
+    """), {"bank": bank})
+    conn.execute(text("""
+        WITH b AS (
+            SELECT id, row_number() OVER (ORDER BY question_text) AS n
+            FROM question_bank WHERE question_text LIKE 'Plan question %'
+        ), t AS (
+            SELECT id, current_version_id, row_number() OVER (ORDER BY title) AS n
+            FROM tests WHERE title LIKE 'Plan test %'
+        )
+        INSERT INTO questions (id, test_id, version_id, bank_question_id, correct_answers, points, order_index)
+        SELECT gen_random_uuid(), t.id, t.current_version_id, b.id, '[0]', 1, q
+        FROM t CROSS JOIN generate_series(0, :per_test - 1) q
+        JOIN b ON b.n = ((t.n * :per_test + q) % :bank) + 1
+    """), {"per_test": QUESTIONS_PER_TEST, "bank": bank})
+    # Последняя попытка пользователя незавершенная, остальные завершены.
+    # id - UUIDv7 от started_at, как у приложения (ключ секционирования)
+    conn.execute(text("""
+        WITH u AS (
+            SELECT id, row_number() OVER (ORDER BY email) AS n FROM users WHERE email LIKE 'plan-%'
+        ), t AS (
+            SELECT id, current_version_id, row_number() OVER (ORDER BY title) AS n
+            FROM tests WHERE title LIKE 'Plan test %'
+        )
+        INSERT INTO test_attempts (id, user_id, test_id, test_version_id, started_at, status, version, paused_seconds)
+        SELECT (lpad(to_hex((extract(epoch FROM s.started_at) * 1000)::bigint), 12, '0')
+                || '7' || substr(md5(random()::text), 1, 3)
+                || 'a' || substr(md5(random()::text), 1, 15))::uuid,
+               u.id, t.id, t.current_version_id, s.started_at,
+               CASE WHEN a = 0 THEN 'in_progress' ELSE 'completed' END, 1, 0
+        FROM u CROSS JOIN generate_series(0, :per_user - 1) a
+        CROSS JOIN LATERAL (SELECT (now() - a * interval '1 hour')::timestamp AS started_at) s
+        JOIN t ON t.n = ((u.n * 7 + a) % :tests) + 1
+    """), {"per_user": ATTEMPTS_PER_USER, "tests": tests})
+    conn.execute(text("""
+        INSERT INTO active_attempts (user_id, test_id, attempt_id)
+        SELECT a.user_id, a.test_id, a.id
+        FROM test_attempts a
+        JOIN users u ON u.id = a.user_id AND u.email LIKE 'plan-%'
+        WHERE a.status = 'in_progress'
+    """))
+    conn.execute(text("""
+        INSERT INTO user_answers (id, attempt_id, question_id, selected_options, is_correct, points_earned, answered_at)
+        SELECT gen_random_uuid(), a.id, q.id, '[0]', true, 1, now()
+        FROM test_attempts a
+        JOIN users u ON u.id = a.user_id AND u.email LIKE 'plan-%'
+        JOIN questions q ON q.test_id = a.test_id AND q.order_index < :per_attempt
+    """), {"per_attempt": ANSWERS_PER_ATTEMPT})
+    for table in (
+        "users", "tests", "test_versions", "question_bank", "questions", "test_attempts", "user_answers",
+        "active_attempts",
+    ):
+        conn.execute(text(f"ANALYZE {table}"))
+
+
+def sample_ids(conn: Connection) -> Dict[str, uuid.UUID]:
+    row = conn.execute(
+        select(
+            TestAttempt.id, TestAttempt.user_id, TestAttempt.test_id, TestAttempt.test_version_id,
+            UserAnswer.question_id, Question.bank_question_id,
+        )
+        .join(UserAnswer, UserAnswer.attempt_id == TestAttempt.id)
+        .join(Question, Question.id == UserAnswer.question_id)
+        .limit(1)
+    ).first()
+    if row is None:
+        print("❌ В базе нет попыток с ответами: запустите без --no-seed")
+        sys.exit(2)
+    return {
+        "attempt_id": row[0], "user_id": row[1], "test_id": row[2], "version_id": row[3], "question_id": row[4],
+        "bank_question_id": row[5],
+    }
+
+
+# Горячие запросы приложения: имя -> построитель запроса по образцовым id.
+# При изменении запроса в коде обновите его копию здесь.
+HOT_QUERIES: Dict[str, Callable[[Dict[str, uuid.UUID]], object]] = {
+    # GET /tests (crud.get_tests, test_service.get_tests_with_pagination)
+    "tests_page": lambda ids: select(Test).order_by(Test.created_at.desc()).offset(0).limit(10),
+    # test_service.warm_test_cache
+    "tests_active_recent": lambda ids: (
+        select(Test).where(Test.is_active.is_(True)).order_by(Test.created_at.desc()).limit(50)
+    ),
+    # GET /tests/{test_id}: вопросы текущей версии (Test.questions, текст - из банка)
+    "test_questions": lambda ids: (
+        select(Question)
+        .where(Question.test_id == ids["test_id"], Question.version_id == ids["version_id"])
+        .order_by(Question.order_index)
+    ),
+    # start_test: конфликт по ключу active_attempts
+    "active_attempt": lambda ids: select(ActiveAttempt.attempt_id).where(
+        ActiveAttempt.user_id == ids["user_id"], ActiveAttempt.test_id == ids["test_id"]
+    ),
+    # crud.get_user_attempts
+    "user_attempts": lambda ids: select(TestAttempt).where(TestAttempt.user_id == ids["user_id"]),
+    # services.attempts.get_attempt_for_update
+    "attempt_for_update": lambda ids: (
+        select(TestAttempt, TestVersion.duration, TestVersion.pause_budget_seconds, TestVersion.max_pauses)
+        .join(TestVersion, TestVersion.id == TestAttempt.test_version_id)
+        .where(TestAttempt.id == ids["attempt_id"], TestAttempt.user_id == ids["user_id"])
+    ),
+    # submit_answer: снимок версии при промахе кеша (services.versions.get_snapshot)
+    "version_snapshot": lambda ids: select(TestVersion.snapshot).where(TestVersion.id == ids["version_id"]),
+    # submit_answer: ON CONFLICT (attempt_id, question_id)
+    "answer_conflict": lambda ids: select(UserAnswer.id).where(
+        UserAnswer.attempt_id == ids["attempt_id"], UserAnswer.question_id == ids["question_id"]
+    ),
+    # finish_attempt: агрегаты баллов
+    "finish_score": lambda ids: select(func.coalesce(func.sum(UserAnswer.points_earned), 0)).where(
+        UserAnswer.attempt_id == ids["attempt_id"]
+    ),
+    "finish_max_score": lambda ids: select(TestVersion.max_score).where(TestVersion.id == ids["version_id"]),
+    # GET /admin/question-bank/{question_id} (question_bank.question_stats)
+    "bank_question_answers": lambda ids: (
+        select(func.count())
+        .select_from(UserAnswer)
+        .join(Question, Question.id == UserAnswer.question_id)
+        .where(Question.bank_question_id == ids["bank_question_id"])
+    ),
+}
+
+
+# Запросы по одной попытке: должны читать не больше одной секции
+PRUNED_QUERIES = {"attempt_for_update", "answer_conflict", "finish_score"}
+
+
+def _walk(plan: Dict) -> List[Dict]:
+    nodes = [plan]
+    for child in plan.get("Plans", []):
+        nodes.extend(_walk(child))
+    return nodes
+
+
+def explain(conn: Connection, statement) -> Dict:
+    compiled = statement.compile(dialect=conn.dialect)
+    result = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + compiled.string, compiled.params).scalar()
+    if isinstance(result, str):
+        result = json.loads(result)
+    return result[0]["Plan"]
+
+
+def check(conn: Connection, threshold: int) -> List[Tuple[str, str, List[str]]]:
+    """Возвращает (запрос, сводка плана, нарушения)"""
+    ids = sample_ids(conn)
+    reltuples = dict(conn.execute(text(
+        "SELECT relname, reltuples::bigint FROM pg_class WHERE relkind IN ('r', 'p')"
+    )).all())
+    parents = dict(conn.execute(text("""
+        SELECT child.relname, parent.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    """)).all())
+    results = []
+    for name, build in HOT_QUERIES.items():
+        nodes = _walk(explain(conn, build(ids)))
+        summary = ", ".join(
+            f"{node['Node Type']}({node.get('Index Name') or node.get('Relation Name')})"
+            if node.get("Relation Name") or node.get("Index Name") else node["Node Type"]
+            for node in nodes
+        )
+        violations = [
+            f"Seq Scan on {node['Relation Name']} (~{reltuples.get(node['Relation Name'], 0)} rows)"
+            for node in nodes
+            if node["Node Type"] == "Seq Scan" and reltuples.get(node["Relation Name"], 0) > threshold
+        ]
+        if name in PRUNED_QUERIES:
+            touched: Dict[str, set] = {}
+            for node in nodes:
+                parent = parents.get(node.get("Relation Name"))
+                if parent is not None:
+                    touched.setdefault(parent, set()).add(node["Relation Name"])
+            violations.extend(
+                f"{parent}: no partition pruning ({len(names)} partitions)"
+                for parent, names in touched.items() if len(names) > 1
+            )
+        results.append((name, summary, violations))
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="EXPLAIN горячих запросов")
+    parser.add_argument("--seq-scan-threshold", type=int, default=DEFAULT_SEQ_SCAN_THRESHOLD,
+                        help="допустимый Seq Scan только по таблицам меньше этого числа строк")
+    parser.add_argument("--scale", type=float, default=1.0, help="множитель объема синтетических данных")
+    parser.add_argument("--no-seed", action="store_true", help="не наполнять базу, проверять на текущих данных")
+    args = parser.parse_args()
+
+    if not settings.postgres_url.startswith("postgresql"):
+        print("❌ Проверка планов работает только с PostgreSQL")
+        return 2
+
+    engine = create_engine(settings.postgres_url)
+    with engine.connect() as conn:
+        try:
+            if not args.no_seed:
+                seed(conn, args.scale)
+            results = check(conn, args.seq_scan_threshold)
+        finally:
+            conn.rollback()
+    engine.dispose()
+
+    failed = False
+    for name, summary, violations in results:
+        print(f"{'❌' if violations else '✅'} {name}: {summary}")
+        for violation in violations:
+            print(f"     {violation}")
+        failed = failed or bool(violations)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
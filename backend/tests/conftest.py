@@ -0,0 +1,91 @@
+"""
+Общие фикстуры: одноразовая SQLite, приложение через TestClient, фабрики
+пользователей и тестов.
+
+Настройки читаются при импорте app, поэтому окружение задается до него.
+Все тесты работают в одной базе и создают свои строки (уникальные email,
+отдельные тесты), массовые операции - только с фильтром по test_ids.
+"""
+
+import os
+import tempfile
+import uuid
+from pathlib import Path
+
+_TMP = Path(tempfile.mkdtemp(prefix="medical-tests-"))
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_TMP / 'test.sqlite3'}",
+    "ARCHIVE_DIR": str(_TMP / "archive"),
+    "PROFILING_DIR": str(_TMP / "profiles"),
+    "RATE_LIMIT_PER_MINUTE": "1000000",
+    "LOG_LEVEL": "WARNING",
+    "BULK_CHUNK_PAUSE_SECONDS": "0",
+    "MONITOR_BROKER": "",
+})
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.core.auth import create_token_pair
+from app.crud.crud import create_test
+from app.db.models import Base, Question, User
+from app.db.session import SessionLocal, engine
+from app.main import app
+from app.schemas.test import TestCreate
+from tests.helpers import make_payload
+
+Base.metadata.create_all(engine)
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def db():
+    with SessionLocal() as session:
+        yield session
+
+
+def _headers(user: User) -> dict:
+    return {"Authorization": f"Bearer {create_token_pair(user)['access_token']}"}
+
+
+@pytest.fixture
+def make_user():
+    """Пользователь и заголовки с его токеном (пароль не нужен: токен выдается напрямую)"""
+    def make(role: str = "student"):
+        with SessionLocal() as session:
+            user = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="-", role=role, is_active=True)
+            session.add(user)
+            session.commit()
+            session.refresh(user)
+            session.expunge(user)
+        return user, _headers(user)
+    return make
+
+
+@pytest.fixture
+def student(make_user):
+    return make_user()
+
+
+@pytest.fixture
+def admin(make_user):
+    return make_user("admin")
+
+
+@pytest.fixture
+def make_test():
+    """Создать тест через crud (ответ POST /tests не содержит id); возвращает (test_id, [question_id])"""
+    def make(**overrides):
+        with SessionLocal() as session:
+            test = create_test(session, TestCreate(**make_payload(**overrides)))
+            question_ids = session.scalars(
+                select(Question.id).where(Question.test_id == test.id).order_by(Question.order_index)
+            ).all()
+            return test.id, list(question_ids)
+    return make
@@ -0,0 +1,54 @@
+"""Вспомогательные функции тестов: тело теста и шаги прохождения через API"""
+
+import uuid
+
+
+def make_payload(**overrides) -> dict:
+    """Тест из трех вопросов: single, multiple (2 верных из 4) и открытый"""
+    payload = {
+        "title": f"Кардиология {uuid.uuid4().hex[:8]}",
+        "description": "Тест для pytest",
+        "duration": 30,
+        "is_active": True,
+        "scoring_policy": "all_or_nothing",
+        "questions": [
+            {
+                "question_text": f"Препарат выбора {uuid.uuid4().hex[:6]}?",
+                "options": ["a", "b", "c"],
+                "correct_answers": [1],
+                "question_type": "single_choice",
+                "points": 1,
+            },
+            {
+                "question_text": f"Признаки состояния {uuid.uuid4().hex[:6]}?",
+                "options": ["a", "b", "c", "d"],
+                "correct_answers": [0, 2],
+                "question_type": "multiple_choice",
+                "points": 2,
+            },
+            {
+                "question_text": f"Опишите тактику {uuid.uuid4().hex[:6]}",
+                "options": None,
+                "correct_answers": None,
+                "question_type": "open_ended",
+                "points": 1,
+            },
+        ],
+    }
+    payload.update(overrides)
+    return payload
+
+
+def start(client, headers, test_id) -> dict:
+    response = client.get(f"/api/v1/tests/{test_id}/start", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def answer(client, headers, attempt_id, question_id, selected=None, text=None):
+    return client.post(
+        f"/api/v1/attempts/{attempt_id}/submit-answer",
+        params={"question_id": str(question_id)},
+        json={"question_id": str(question_id), "selected_options": selected, "text_answer": text},
+        headers=headers,
+    )
@@ -0,0 +1,74 @@
+from datetime import datetime
+from pathlib import Path
+from uuid import UUID
+
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.db import archive, models
+from app.db.session import engine
+from tests.helpers import answer, start
+
+# Попытки тестов датируются этим днем; база общая, поэтому отсечка архивации
+# ниже дат всех остальных попыток
+LONG_AGO = datetime(2000, 1, 1)
+CUTOFF = datetime(2001, 1, 1)
+
+
+def _finished_attempt(client, headers, test_id, question_id, selected) -> str:
+    attempt = start(client, headers, test_id)
+    answer(client, headers, attempt["id"], question_id, selected)
+    assert client.post(f"/api/v1/attempts/{attempt['id']}/finish", headers=headers).status_code == 200
+    return attempt["id"]
+
+
+def _archive(db, attempt_ids, directory: Path, batch_size=1000):
+    db.execute(update(models.TestAttempt).where(models.TestAttempt.id.in_([UUID(i) for i in attempt_ids]))
+               .values(completed_at=LONG_AGO))
+    db.commit()
+    return archive.archive_attempts(engine, directory, CUTOFF, batch_size=batch_size)
+
+
+def test_archived_attempts_are_read_through_the_api(client, student, make_user, make_test, db):
+    user, headers = student
+    other, other_headers = make_user()
+    first_test, (first_single, *_) = make_test()
+    second_test, (second_single, *_) = make_test()
+    mine = [
+        _finished_attempt(client, headers, first_test, first_single, [1]),
+        _finished_attempt(client, headers, second_test, second_single, [0]),
+    ]
+    foreign = _finished_attempt(client, other_headers, first_test, first_single, [1])
+
+    written = _archive(db, [*mine, foreign], Path(settings.ARCHIVE_DIR), batch_size=2)
+    assert len(written) == 6  # две пачки: попытки, ответы, индекс
+    assert db.scalars(select(models.TestAttempt).where(models.TestAttempt.user_id == user.id)).all() == []
+
+    history = client.get("/api/v1/attempts/history", headers=headers).json()
+    assert {row["id"] for row in history} == set(mine)
+    answers = client.get(f"/api/v1/attempts/{mine[0]}/answers", headers=headers).json()
+    assert [(row["question_id"], row["selected_options"], row["is_correct"]) for row in answers] == [
+        (str(first_single), [1], True)
+    ]
+    assert client.get(f"/api/v1/attempts/{foreign}/answers", headers=headers).status_code == 404
+    assert len(client.get(f"/api/v1/attempts/{foreign}/answers", headers=other_headers).json()) == 1
+
+    summary = archive.test_summary(Path(settings.ARCHIVE_DIR), first_test)
+    assert (summary["attempts"], summary["by_status"], summary["answers"]) == (2, {"completed": 2}, 2)
+    assert summary["correct_ratio"] == 1.0
+
+
+def test_batches_without_an_index_are_scanned(client, student, make_test, db, tmp_path):
+    user, headers = student
+    test_id, (single, *_) = make_test()
+    attempt_id = _finished_attempt(client, headers, test_id, single, [2])
+    written = _archive(db, [attempt_id], tmp_path)
+
+    (index,) = [path for path in written if path.name.endswith(archive.USERS_SUFFIX)]
+    index.unlink()
+    assert [row["id"] for row in archive.read_user_attempts(tmp_path, user.id)] == [attempt_id]
+    assert len(archive.read_attempt_answers(tmp_path, UUID(attempt_id), user.id)) == 1
+
+    assert archive.build_missing_indexes(tmp_path) == [index]
+    assert archive.UserIndex(tmp_path).stems(str(user.id)) == ([index.name[:-len(archive.USERS_SUFFIX)]], [])
+    assert archive.read_attempt_answers(tmp_path, UUID(attempt_id), test_id) is None
@@ -0,0 +1,40 @@
+from uuid import UUID, uuid4
+
+from sqlalchemy import select
+
+from app.db.models import AttemptIdAlias, UserAnswer
+from tests.helpers import answer, start
+
+
+def _alias(db, attempt_id) -> str:
+    """Попытка, перенумерованная миграцией: ее прежний uuid4"""
+    old_id = uuid4()
+    db.add(AttemptIdAlias(old_id=old_id, new_id=UUID(attempt_id)))
+    db.commit()
+    return str(old_id)
+
+
+def test_new_attempt_ids_are_uuid7(client, student, make_test):
+    test_id, _ = make_test()
+    assert UUID(start(client, student[1], test_id)["id"]).version == 7
+
+
+def test_old_attempt_id_resolves_to_the_new_one(client, student, make_test, db):
+    _, headers = student
+    test_id, (single, *_) = make_test()
+    attempt = start(client, headers, test_id)
+    old_id = _alias(db, attempt["id"])
+
+    assert answer(client, headers, old_id, single, [1]).status_code == 200
+    assert db.scalar(select(UserAnswer.attempt_id).where(UserAnswer.question_id == single)) == UUID(attempt["id"])
+    assert client.get(f"/api/v1/attempts/{old_id}/sync", headers=headers).json()["answers"][0]["selected_options"] == [1]
+    assert len(client.get(f"/api/v1/attempts/{old_id}/answers", headers=headers).json()) == 1
+    finished = client.post(f"/api/v1/attempts/{old_id}/finish", headers=headers).json()
+    assert (finished["id"], finished["status"]) == (attempt["id"], "completed")
+
+
+def test_old_attempt_id_of_another_user_is_not_found(client, student, admin, make_test, db):
+    test_id, _ = make_test()
+    old_id = _alias(db, start(client, admin[1], test_id)["id"])
+    assert client.get(f"/api/v1/attempts/{old_id}/sync", headers=student[1]).status_code == 404
+    assert client.get(f"/api/v1/attempts/{uuid4()}/sync", headers=student[1]).status_code == 404
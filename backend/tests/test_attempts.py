@@ -0,0 +1,150 @@
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from sqlalchemy import select, update
+
+from app.db import models
+from app.db.models import ActiveAttempt
+from tests.helpers import answer, start
+
+
+def _post(client, headers, attempt_id, action, **params):
+    return client.post(f"/api/v1/attempts/{attempt_id}/{action}", params=params, headers=headers)
+
+
+def test_start_returns_the_unfinished_attempt(client, student, make_test, db):
+    user, headers = student
+    test_id, _ = make_test()
+    first = start(client, headers, test_id)
+    assert first["status"] == "in_progress"
+    assert start(client, headers, test_id)["id"] == first["id"]
+    claim = db.scalar(select(ActiveAttempt.attempt_id).where(ActiveAttempt.user_id == user.id))
+    assert str(claim) == first["id"]
+
+    _post(client, headers, first["id"], "finish")
+    assert db.scalar(select(ActiveAttempt.attempt_id).where(ActiveAttempt.user_id == user.id)) is None
+    assert start(client, headers, test_id)["id"] != first["id"]
+
+
+def test_pause_resume_finish(client, student, make_test):
+    _, headers = student
+    test_id, (single, *_) = make_test()
+    attempt = start(client, headers, test_id)
+
+    paused = _post(client, headers, attempt["id"], "pause").json()
+    assert paused["status"] == "paused"
+    assert paused["pause_count"] == 1
+    assert answer(client, headers, attempt["id"], single, [1]).status_code == 409
+
+    resumed = _post(client, headers, attempt["id"], "resume").json()
+    assert resumed["status"] == "in_progress"
+    assert resumed["version"] > paused["version"]
+    assert answer(client, headers, attempt["id"], single, [1]).status_code == 200
+
+    finished = _post(client, headers, attempt["id"], "finish").json()
+    assert finished["status"] == "completed"
+    assert finished["score"] == 1
+    assert _post(client, headers, attempt["id"], "finish").status_code == 409
+    assert answer(client, headers, attempt["id"], single, [0]).status_code == 409
+
+
+def test_stale_version_is_rejected(client, student, make_test):
+    _, headers = student
+    test_id, _ = make_test()
+    attempt = start(client, headers, test_id)
+    paused = _post(client, headers, attempt["id"], "pause", version=attempt["version"]).json()
+    # Второе окно клиента еще видит версию до паузы
+    assert _post(client, headers, attempt["id"], "finish", version=attempt["version"]).status_code == 409
+    assert _post(client, headers, attempt["id"], "resume", version=paused["version"]).status_code == 200
+
+
+def test_abandon(client, student, make_test):
+    _, headers = student
+    test_id, _ = make_test()
+    attempt = start(client, headers, test_id)
+    assert _post(client, headers, attempt["id"], "abandon").json()["status"] == "abandoned"
+    assert _post(client, headers, attempt["id"], "resume").status_code == 409
+
+
+def test_other_users_attempt_is_not_found(client, make_user, make_test):
+    _, owner = make_user()
+    _, stranger = make_user()
+    test_id, _ = make_test()
+    attempt = start(client, owner, test_id)
+    assert _post(client, stranger, attempt["id"], "finish").status_code == 404
+
+
+def test_pause_limit(client, student, make_test):
+    _, headers = student
+    test_id, _ = make_test(max_pauses=1)
+    attempt = start(client, headers, test_id)
+    _post(client, headers, attempt["id"], "pause")
+    _post(client, headers, attempt["id"], "resume")
+    response = _post(client, headers, attempt["id"], "pause")
+    assert response.status_code == 409
+    assert "Pause limit" in response.json()["detail"]
+
+
+def test_exhausted_pause_budget(client, student, make_test, db):
+    _, headers = student
+    test_id, _ = make_test(pause_budget_seconds=60)
+    attempt = start(client, headers, test_id)
+    db.execute(
+        update(models.TestAttempt).where(models.TestAttempt.id == UUID(attempt["id"])).values(paused_seconds=60)
+    )
+    db.commit()
+    response = _post(client, headers, attempt["id"], "pause")
+    assert response.status_code == 409
+    assert "budget" in response.json()["detail"]
+
+
+def test_pause_beyond_budget_counts_against_deadline(client, student, make_test, db):
+    _, headers = student
+    test_id, (single, *_) = make_test(duration=30, pause_budget_seconds=60)
+    attempt = start(client, headers, test_id)
+    _post(client, headers, attempt["id"], "pause")
+    # Пауза длиной 2 часа: в срок идет только бюджет (60 с), 30 минут давно истекли
+    long_ago = datetime.utcnow() - timedelta(hours=2)
+    db.execute(
+        update(models.TestAttempt).where(models.TestAttempt.id == UUID(attempt["id"]))
+        .values(started_at=long_ago, paused_at=long_ago)
+    )
+    db.commit()
+    response = _post(client, headers, attempt["id"], "resume")
+    assert response.status_code == 409
+    assert answer(client, headers, attempt["id"], single, [1]).status_code == 409
+    history = client.get("/api/v1/attempts/history", headers=headers).json()
+    assert [row["status"] for row in history if row["id"] == attempt["id"]] == ["expired"]
+
+
+def test_overdue_attempt_expires(client, student, make_test, db):
+    _, headers = student
+    test_id, (single, *_) = make_test(duration=1)
+    attempt = start(client, headers, test_id)
+    db.execute(
+        update(models.TestAttempt).where(models.TestAttempt.id == UUID(attempt["id"]))
+        .values(started_at=datetime.utcnow() - timedelta(minutes=5))
+    )
+    db.commit()
+    assert answer(client, headers, attempt["id"], single, [1]).status_code == 409
+    # Завершение после срока фиксирует результат со статусом expired и освобождает заявку
+    finished = _post(client, headers, attempt["id"], "finish").json()
+    assert finished["status"] == "expired"
+    assert finished["score"] == 0
+    assert start(client, headers, test_id)["id"] != attempt["id"]
+
+
+def test_deactivated_test_can_still_be_resumed(client, make_user, make_test, db):
+    _, headers = make_user()
+    _, newcomer = make_user()
+    test_id, (single, *_) = make_test()
+    attempt = start(client, headers, test_id)
+    db.execute(update(models.Test).where(models.Test.id == test_id).values(is_active=False))
+    db.commit()
+
+    # Начатая попытка продолжается, новую начать нельзя
+    assert start(client, headers, test_id)["id"] == attempt["id"]
+    assert answer(client, headers, attempt["id"], single, [1]).status_code == 200
+    assert client.get(f"/api/v1/tests/{test_id}/start", headers=newcomer).status_code == 404
+    _post(client, headers, attempt["id"], "finish")
+    assert client.get(f"/api/v1/tests/{test_id}/start", headers=headers).status_code == 404
@@ -0,0 +1,66 @@
+import asyncio
+
+from sqlalchemy import update
+
+from app.core.auth import create_token_pair, is_token_version_current
+from app.core.cache import token_version_cache
+from app.db.models import User
+from app.db.session import SessionLocal
+from app.middleware import auth as auth_middleware
+
+
+def _me(client, headers):
+    return client.get("/api/v1/auth/me", headers=headers)
+
+
+def test_role_change_rejects_old_tokens(client, admin, student):
+    user, headers = student
+    assert _me(client, headers).json()["role"] == "student"
+
+    promoted = client.patch(f"/api/v1/admin/users/{user.id}", json={"role": "admin"}, headers=admin[1])
+    assert promoted.status_code == 200
+    # Роль зашита в claims: старый токен больше не принимается, новый несет новую роль
+    assert _me(client, headers).status_code == 401
+    with SessionLocal() as db:
+        fresh = db.get(User, user.id)
+        new_headers = {"Authorization": f"Bearer {create_token_pair(fresh)['access_token']}"}
+    assert _me(client, new_headers).json()["role"] == "admin"
+
+
+def test_deactivated_user_is_rejected(client, admin, student):
+    user, headers = student
+    assert client.post(f"/api/v1/admin/users/{user.id}/deactivate", headers=admin[1]).status_code == 200
+    assert _me(client, headers).status_code == 401
+    assert client.post(f"/api/v1/admin/users/{admin[0].id}/deactivate", headers=admin[1]).status_code == 400
+
+
+def test_token_version_bump_in_another_worker(client, student):
+    user, headers = student
+    assert _me(client, headers).status_code == 200
+    with SessionLocal() as db:
+        db.execute(update(User).where(User.id == user.id).values(token_version=User.token_version + 1))
+        db.commit()
+    # Другой воркер сменил версию: здесь она видна после истечения записи кеша
+    assert _me(client, headers).status_code == 200
+    token_version_cache.invalidate(user.id)
+    assert _me(client, headers).status_code == 401
+
+
+def test_cache_miss_is_checked_off_the_event_loop(client, student, monkeypatch):
+    user, headers = student
+    calls = []
+
+    def checked(user_id, token_version):
+        try:
+            asyncio.get_running_loop()
+            calls.append("event loop")
+        except RuntimeError:
+            calls.append("thread")
+        return is_token_version_current(user_id, token_version)
+
+    monkeypatch.setattr(auth_middleware, "is_token_version_current", checked)
+    token_version_cache.invalidate(user.id)
+    assert _me(client, headers).status_code == 200
+    # Повторный запрос - из кеша, без базы
+    assert _me(client, headers).status_code == 200
+    assert calls == ["thread"]
@@ -0,0 +1,107 @@
+from sqlalchemy import select, update
+
+from app.core import jobs
+from app.db import models
+from app.db.models import Job, Question
+from app.services.tasks import execute
+from tests.helpers import answer, start
+
+
+def _create(client, headers, action, test_ids):
+    return client.post(
+        "/api/v1/admin/bulk-jobs",
+        json={"action": action, "filter": {"test_ids": [str(test_id) for test_id in test_ids]}},
+        headers=headers,
+    )
+
+
+def _queued(db, bulk_job_id):
+    return db.scalars(
+        select(Job).where(Job.kind == "bulk.run", Job.payload["bulk_job_id"].as_string() == bulk_job_id)
+        .order_by(Job.created_at)
+    ).all()
+
+
+def _run(client, headers, bulk_job_id):
+    """Выполнить операцию как воркер и вернуть ее состояние из API"""
+    assert execute("bulk.run", {"bulk_job_id": bulk_job_id})["status"]
+    return client.get(f"/api/v1/admin/bulk-jobs/{bulk_job_id}", headers=headers).json()
+
+
+def test_bulk_jobs_are_admin_only(client, student, make_test):
+    _, headers = student
+    test_id, _ = make_test()
+    assert _create(client, headers, "deactivate", [test_id]).status_code == 403
+    assert client.delete("/api/v1/tests/", headers=headers).status_code == 403
+
+
+def test_deactivate_runs_through_the_queue(client, admin, make_test, db):
+    _, headers = admin
+    test_ids = [make_test()[0] for _ in range(3)]
+    response = _create(client, headers, "deactivate", test_ids[:2])
+    assert response.status_code == 202
+    job = response.json()
+    assert (job["status"], job["total"]) == ("pending", 2)
+    (queued,) = _queued(db, job["id"])
+    assert (queued.status, queued.max_attempts) == (jobs.QUEUED, 3)
+
+    job = _run(client, headers, job["id"])
+    assert (job["status"], job["processed"], job["skipped"]) == ("completed", 2, 0)
+    active = dict(db.execute(select(models.Test.id, models.Test.is_active).where(models.Test.id.in_(test_ids))).all())
+    assert active == {test_ids[0]: False, test_ids[1]: False, test_ids[2]: True}
+
+
+def test_delete_skips_tests_in_progress(client, admin, student, make_test, db):
+    _, headers = admin
+    busy, _ = make_test()
+    free, _ = make_test()
+    start(client, student[1], busy)
+
+    job = _run(client, headers, _create(client, headers, "delete", [busy, free]).json()["id"])
+    assert (job["status"], job["processed"], job["skipped"]) == ("completed", 1, 1)
+    assert set(db.scalars(select(models.Test.id).where(models.Test.id.in_([busy, free])))) == {busy}
+
+
+def test_cancel_and_resume(client, admin, make_test, db):
+    _, headers = admin
+    test_id, _ = make_test()
+    job_id = _create(client, headers, "deactivate", [test_id]).json()["id"]
+
+    assert client.post(f"/api/v1/admin/bulk-jobs/{job_id}/cancel", headers=headers).json()["status"] == "cancelled"
+    # Задача очереди уже стоит: исполнитель видит отмену и ничего не делает
+    assert _run(client, headers, job_id)["status"] == "cancelled"
+    assert db.scalar(select(models.Test.is_active).where(models.Test.id == test_id)) is True
+
+    assert client.post(f"/api/v1/admin/bulk-jobs/{job_id}/resume", headers=headers).json()["status"] == "pending"
+    assert len(_queued(db, job_id)) == 2
+    assert _run(client, headers, job_id)["status"] == "completed"
+    db.expire_all()
+    assert db.scalar(select(models.Test.is_active).where(models.Test.id == test_id)) is False
+
+
+def test_duplicate_creates_inactive_copy(client, admin, make_test, db):
+    _, headers = admin
+    test_id, questions = make_test()
+    title = db.scalar(select(models.Test.title).where(models.Test.id == test_id))
+    assert _run(client, headers, _create(client, headers, "duplicate", [test_id]).json()["id"])["processed"] == 1
+    copy = db.scalars(select(models.Test).where(models.Test.title == f"{title} (копия)")).one()
+    assert copy.is_active is False
+    assert copy.current_version_id is not None
+    copied = db.scalars(select(Question.id).where(Question.test_id == copy.id)).all()
+    assert len(copied) == len(questions)
+    assert set(copied).isdisjoint(questions)
+
+
+def test_regrade_rescores_finished_attempts(client, admin, student, make_test, db):
+    _, headers = admin
+    test_id, (single, *_) = make_test()
+    attempt = start(client, student[1], test_id)
+    answer(client, student[1], attempt["id"], single, [2])
+    assert client.post(f"/api/v1/attempts/{attempt['id']}/finish", headers=student[1]).json()["score"] == 0
+
+    # Исправление ключа в опубликованной версии
+    db.execute(update(Question).where(Question.id == single).values(correct_answers=[2]))
+    db.commit()
+    assert _run(client, headers, _create(client, headers, "regrade", [test_id]).json()["id"])["status"] == "completed"
+    history = client.get("/api/v1/attempts/history", headers=student[1]).json()
+    assert [row["score"] for row in history if row["id"] == attempt["id"]] == [1]
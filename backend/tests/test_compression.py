@@ -0,0 +1,63 @@
+import gzip
+
+import pytest
+
+from app.core.compression import SUPPORTED_ENCODINGS, PrecompressedPayload, compress, negotiate
+from app.core.config import settings
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate", "gzip"),
+    ("gzip, br", SUPPORTED_ENCODINGS[0]),
+    ("br;q=0, gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("identity", None),
+    ("", None),
+    ("*", SUPPORTED_ENCODINGS[0]),
+])
+def test_negotiate(header, expected):
+    assert negotiate(header) == expected
+
+
+def test_gzip_output_is_deterministic():
+    body = b'{"a": 1}' * 200
+    assert compress(body, "gzip") == compress(body, "gzip")
+    assert gzip.decompress(compress(body, "gzip", best=True)) == body
+
+
+def test_precompressed_payload_compresses_once(monkeypatch):
+    payload = PrecompressedPayload(b"x" * 4096)
+    calls = []
+    monkeypatch.setattr("app.core.compression.compress", lambda body, encoding, best: calls.append(encoding) or b"z")
+    assert payload.encoded("gzip") == payload.encoded("gzip") == b"z"
+    assert calls == ["gzip"]
+
+
+def test_small_responses_are_not_compressed(client):
+    response = client.get("/health/live", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+
+def test_json_responses_are_compressed(client, student, make_test, monkeypatch):
+    monkeypatch.setattr(settings, "COMPRESSION_MIN_SIZE", 0)
+    make_test()
+    for encoding in SUPPORTED_ENCODINGS:
+        response = client.get("/api/v1/tests", headers={**student[1], "Accept-Encoding": encoding})
+        assert response.headers["content-encoding"] == encoding
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert isinstance(response.json(), list)
+
+
+def test_cached_test_body_is_sent_precompressed(client, student, make_test, monkeypatch):
+    monkeypatch.setattr(settings, "COMPRESSION_MIN_SIZE", 0)
+    test_id, _ = make_test()
+    url = f"/api/v1/tests/{test_id}"
+    headers = {**student[1], "Accept-Encoding": "gzip"}
+    first, second = client.get(url, headers=headers), client.get(url, headers=headers)
+    # Второй ответ из кеша: те же сжатые байты, middleware не сжимает повторно
+    assert first.headers["content-encoding"] == second.headers["content-encoding"] == "gzip"
+    assert first.json() == second.json()
+    assert len(first.json()["questions"]) == 3
+    plain = client.get(url, headers={**student[1], "Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.json() == first.json()
@@ -0,0 +1,111 @@
+import asyncio
+import time
+from uuid import uuid4
+
+import orjson
+
+from app.core import events
+from app.core.config import settings
+from app.core.events import LocalBroker, PostgresBroker, _load_broker, _psycopg_dsn
+from app.db.session import SessionLocal
+from app.services import monitoring
+from tests.helpers import start
+
+
+class _Request:
+    """Клиент SSE, который не отключается"""
+
+    async def is_disconnected(self) -> bool:
+        return False
+
+
+def test_local_broker_fans_out_per_channel():
+    async def scenario():
+        broker = LocalBroker(queue_size=2)
+        await broker.start()
+        first, second, other = broker.subscribe("a"), broker.subscribe("a"), broker.subscribe("b")
+        # publish вызывается из пула потоков эндпоинтов
+        await asyncio.to_thread(broker.publish, "a", {"n": 1})
+        assert (await first.get(1), await second.get(1)) == ({"n": 1}, {"n": 1})
+        assert await other.get(0.05) is None
+
+        for n in range(3):
+            broker.publish("a", {"n": n})
+        await asyncio.sleep(0)
+        assert first.lost and first.queue.qsize() == 2
+
+        first.close()
+        second.close()
+        assert "a" not in broker._channels
+        broker.publish("a", {"n": 4})  # без подписчиков - ничего не делает
+        await broker.stop()
+
+    asyncio.run(scenario())
+
+
+def test_postgres_payloads_fit_the_notify_limit():
+    broker = PostgresBroker(dsn="postgresql://localhost/db", pg_channel="monitor")
+    batch = [("test:1", {"attempt_id": str(uuid4()), "pad": "x" * 200}) for _ in range(100)]
+    payloads = broker._payloads(batch)
+    assert len(payloads) > 1
+    assert all(len(payload.encode()) < 8000 for payload in payloads)
+    decoded = [orjson.loads(payload) for payload in payloads]
+    assert {message["src"] for message in decoded} == {broker.source}
+    assert [tuple(event) for message in decoded for event in message["events"]] == batch
+
+
+def test_postgres_broker_skips_its_own_notifications():
+    broker = PostgresBroker(dsn="postgresql://localhost/db", pg_channel="monitor")
+    subscription = events.Subscription(broker, "test:1", 10)
+    broker._channels["test:1"] = {subscription}
+    other = PostgresBroker(dsn="postgresql://localhost/db", pg_channel="monitor")
+
+    broker._receive(broker._payloads([("test:1", {"n": 1})])[0])
+    broker._receive("not json")
+    broker._receive(other._payloads([("test:1", {"n": 2}), ("test:2", {"n": 3})])[0])
+    assert subscription.get_nowait() == {"n": 2}
+    assert subscription.get_nowait() is None
+
+
+def test_broker_selection(monkeypatch):
+    assert _psycopg_dsn("postgresql+psycopg://user:secret@db:5432/app") == "postgresql://user:secret@db:5432/app"
+    assert isinstance(_load_broker(""), LocalBroker)  # тесты идут на SQLite
+    monkeypatch.setattr(settings, "DATABASE_URL", "postgresql+psycopg://user:secret@db:5432/app")
+    assert type(_load_broker("")) is PostgresBroker
+    assert type(_load_broker("app.core.events:LocalBroker")) is LocalBroker
+
+
+def test_monitor_is_admin_only(client, student, admin, make_test):
+    test_id, _ = make_test()
+    assert client.get(f"/api/v1/tests/{test_id}/monitor", headers=student[1]).status_code == 403
+    assert client.get(f"/api/v1/tests/{uuid4()}/monitor", headers=admin[1]).status_code == 404
+
+
+def test_stream_coalesces_events_within_the_throttle(client, student, make_test, monkeypatch):
+    monkeypatch.setattr(settings, "MONITOR_THROTTLE_SECONDS", 0.2)
+    test_id, questions = make_test()
+    attempt = start(client, student[1], test_id)
+    with SessionLocal() as db:
+        snapshot = monitoring.load_snapshot(db, test_id)
+
+    async def scenario():
+        broker = LocalBroker()
+        await broker.start()
+        subscription = broker.subscribe(monitoring.channel(test_id))
+        stream = monitoring.stream(_Request(), test_id, subscription, snapshot)
+        first = await stream.__anext__()
+        started = time.monotonic()
+        for question_id in questions:
+            broker.publish(monitoring.channel(test_id), monitoring.answer_event(test_id, attempt["id"], question_id))
+        update = await stream.__anext__()
+        elapsed = time.monotonic() - started
+        await stream.aclose()
+        assert not broker._channels  # подписка закрыта вместе с потоком
+        return first, update, elapsed
+
+    first, update, elapsed = asyncio.run(scenario())
+    assert first.startswith(b"event: snapshot\n")
+    assert update.startswith(b"event: update\n")
+    (row,) = orjson.loads(update.split(b"data: ", 1)[1])["attempts"]
+    assert (row["attempt_id"], row["answered"]) == (attempt["id"], len(questions))
+    assert elapsed >= 0.2
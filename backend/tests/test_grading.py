@@ -0,0 +1,64 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.grading import ALL_OR_NOTHING, NEGATIVE_MARKING, PARTIAL_CREDIT, grade_answer
+from tests.helpers import answer, start
+
+# 2 верных из 5, вес 2: штраф за неверный вариант - 2 / 3
+MULTIPLE = SimpleNamespace(
+    question_type="multiple_choice", options=["a", "b", "c", "d", "e"], correct_answers=[0, 2], points=2
+)
+SINGLE = SimpleNamespace(question_type="single_choice", options=["a", "b", "c"], correct_answers=[1], points=1)
+OPEN = SimpleNamespace(question_type="open_ended", options=None, correct_answers=None, points=3)
+
+
+@pytest.mark.parametrize("policy", [ALL_OR_NOTHING, PARTIAL_CREDIT, NEGATIVE_MARKING])
+def test_exact_answer_earns_full_points(policy):
+    assert grade_answer(MULTIPLE, [2, 0], None, policy) == (True, 2)
+
+
+@pytest.mark.parametrize("policy", [ALL_OR_NOTHING, PARTIAL_CREDIT, NEGATIVE_MARKING])
+def test_skipped_question_earns_nothing(policy):
+    assert grade_answer(MULTIPLE, [], None, policy) == (False, 0)
+    assert grade_answer(MULTIPLE, None, None, policy) == (False, 0)
+
+
+@pytest.mark.parametrize("selected, policy, expected", [
+    ([0], ALL_OR_NOTHING, 0),
+    ([0], PARTIAL_CREDIT, 1),
+    ([0], NEGATIVE_MARKING, 1),
+    ([0, 1], PARTIAL_CREDIT, 0.33),
+    ([1, 3], PARTIAL_CREDIT, 0),
+    ([1, 3], NEGATIVE_MARKING, -1.33),
+    ([1, 3, 4], NEGATIVE_MARKING, -2),
+    ([0, 1, 2, 3, 4], PARTIAL_CREDIT, 0),
+])
+def test_partial_answers(selected, policy, expected):
+    is_correct, points = grade_answer(MULTIPLE, selected, None, policy)
+    assert is_correct is False
+    assert points == expected
+
+
+def test_single_choice_is_graded():
+    assert grade_answer(SINGLE, [1], None) == (True, 1)
+    assert grade_answer(SINGLE, [0], None, NEGATIVE_MARKING) == (False, -0.5)
+
+
+def test_open_ended_is_not_graded():
+    assert grade_answer(OPEN, None, "тактика", PARTIAL_CREDIT) == (None, 0)
+
+
+def test_attempt_score_uses_test_policy_and_weights(client, student, make_test):
+    _, headers = student
+    test_id, (single, multiple, open_ended) = make_test(scoring_policy="negative_marking")
+    attempt = start(client, headers, test_id)
+    assert answer(client, headers, attempt["id"], single, [1]).json()["points_earned"] == 1
+    # 1 верный из 2 и 1 неверный из 2: 2 * (1/2 - 1/2)
+    assert answer(client, headers, attempt["id"], multiple, [0, 1]).json()["points_earned"] == 0
+    assert answer(client, headers, attempt["id"], open_ended, text="тактика").json()["is_correct"] is None
+
+    finished = client.post(f"/api/v1/attempts/{attempt['id']}/finish", headers=headers).json()
+    assert finished["status"] == "completed"
+    assert finished["score"] == 1
+    assert finished["max_score"] == 4
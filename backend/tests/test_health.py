@@ -0,0 +1,59 @@
+import logging
+
+import pytest
+
+from app.core import health
+
+LEAK = "connection to server at 10.1.2.3, port 5432 failed: database \"exams_prod\" does not exist"
+
+
+class _BrokenEngine:
+    def connect(self):
+        raise RuntimeError(LEAK)
+
+
+@pytest.fixture
+def broken_database(monkeypatch):
+    monkeypatch.setattr(health, "_get_probe_engine", lambda: _BrokenEngine())
+    health.check_database()
+    yield
+    monkeypatch.undo()
+    health.check_database()
+
+
+def test_liveness_and_readiness(client):
+    health.check_database()
+    assert client.get("/health/live").json() == {"status": "alive"}
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    report = response.json()
+    assert report["status"] == "ready"
+    assert report["database"]["reachable"] is True
+    assert "pool" in report
+    assert client.get("/health/db").json()["database"] == "connected"
+
+
+def test_unreachable_database_is_not_leaked(client, broken_database, caplog):
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["reasons"] == ["database unreachable"]
+    assert "10.1.2.3" not in response.text and "exams_prod" not in response.text
+    assert client.get("/health/db").status_code == 503
+
+    # Подробности - в логе, один раз на новую ошибку
+    with caplog.at_level(logging.ERROR, logger="app.core.health"):
+        health.check_database()
+        health.check_database()
+    assert [record.getMessage() for record in caplog.records] == []
+    health.state.db_error = "previous error"
+    with caplog.at_level(logging.ERROR, logger="app.core.health"):
+        health.check_database()
+    assert "10.1.2.3" in caplog.text
+
+
+def test_stale_check_is_not_ready(client, monkeypatch):
+    health.check_database()
+    monkeypatch.setattr(health.state, "checked_at", health.state.checked_at - 10_000)
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert "health check is stale" in response.json()["reasons"]
@@ -0,0 +1,138 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, update
+
+from app.core import jobs
+from app.core.config import settings
+from app.db.models import Job
+from app.db.session import SessionLocal
+
+
+@pytest.fixture(autouse=True)
+def empty_queue(db):
+    """Очередь общая для всей базы: claim берет любую готовую задачу"""
+    db.execute(delete(Job))
+    db.commit()
+
+
+def _enqueue(db, kind="archive.run", **kwargs) -> Job:
+    job = jobs.enqueue(db, kind, {"older_than_days": 1}, **kwargs)
+    db.commit()
+    return job
+
+
+def _claim(worker: str):
+    """Как воркер: выборка в своей сессии"""
+    with SessionLocal() as session:
+        claimed = [(job.id, job.attempts) for job in jobs.claim(session, worker, 10)]
+        session.commit()
+    return claimed
+
+
+def _call(func, *args, **kwargs):
+    with SessionLocal() as session:
+        result = func(session, *args, **kwargs)
+        session.commit()
+    return result
+
+
+def _set(job_id, **values):
+    with SessionLocal() as session:
+        session.execute(update(Job).where(Job.id == job_id).values(**values))
+        session.commit()
+
+
+def _get(db, job_id) -> Job:
+    db.expire_all()
+    return db.get(Job, job_id)
+
+
+def test_max_attempts_default_from_task_registry(db):
+    assert _enqueue(db, "bulk.run").max_attempts == 3
+    assert _enqueue(db, "archive.run").max_attempts == settings.JOBS_MAX_ATTEMPTS
+    assert _enqueue(db, "bulk.run", max_attempts=7).max_attempts == 7
+
+
+def test_delayed_job_is_not_claimed(db):
+    job = _enqueue(db, delay=3600)
+    assert _claim("w1") == []
+    _set(job.id, run_at=datetime.utcnow() - timedelta(seconds=1))
+    assert _claim("w1") == [(job.id, 1)]
+    assert _claim("w2") == []
+
+
+def test_failures_back_off_until_attempts_run_out(db):
+    job = _enqueue(db, max_attempts=2)
+    _claim("w1")
+    _call(jobs.fail, job.id, "w1", "boom")
+    first = _get(db, job.id)
+    assert (first.status, first.attempts, first.error) == (jobs.QUEUED, 1, "boom")
+    assert first.run_at > datetime.utcnow()
+
+    _set(job.id, run_at=datetime.utcnow())
+    assert _claim("w1") == [(job.id, 2)]
+    _call(jobs.fail, job.id, "w1", "boom again")
+    assert (_get(db, job.id).status, _get(db, job.id).locked_by) == (jobs.FAILED, None)
+
+
+def test_retry_does_not_spend_an_attempt(db):
+    job = _enqueue(db, max_attempts=1)
+    _claim("w1")
+    _call(jobs.fail, job.id, "w1", "Released for retry", retry_in=0)
+    assert (_get(db, job.id).status, _get(db, job.id).attempts) == (jobs.QUEUED, 0)
+    assert _claim("w1") == [(job.id, 1)]
+    _call(jobs.complete, job.id, "w1", {"files": []})
+    assert (_get(db, job.id).status, _get(db, job.id).result) == (jobs.SUCCEEDED, {"files": []})
+
+
+def test_stale_job_moves_to_another_worker(db):
+    job = _enqueue(db, max_attempts=3)
+    _claim("w1")
+    _call(jobs.heartbeat, "w1", [job.id])
+    assert _call(jobs.requeue_stale) == 0
+
+    _set(job.id, heartbeat_at=datetime.utcnow() - timedelta(seconds=settings.JOBS_STALE_SECONDS + 1))
+    assert _call(jobs.requeue_stale) == 1
+    assert _get(db, job.id).status == jobs.QUEUED
+    assert _claim("w2") == [(job.id, 2)]
+
+    # Первый воркер очнулся: его результат и heartbeat уже не принимаются
+    before = _get(db, job.id).heartbeat_at
+    _call(jobs.heartbeat, "w1", [job.id])
+    _call(jobs.complete, job.id, "w1", {"by": "w1"})
+    _call(jobs.fail, job.id, "w1", "late failure")
+    job_row = _get(db, job.id)
+    assert (job_row.status, job_row.locked_by, job_row.heartbeat_at) == (jobs.RUNNING, "w2", before)
+
+    _call(jobs.complete, job.id, "w2", {"by": "w2"})
+    assert (_get(db, job.id).status, _get(db, job.id).result) == (jobs.SUCCEEDED, {"by": "w2"})
+
+
+def test_stale_job_without_attempts_left_fails(db):
+    job = _enqueue(db, max_attempts=1)
+    _claim("w1")
+    _set(job.id, heartbeat_at=datetime.utcnow() - timedelta(seconds=settings.JOBS_STALE_SECONDS + 1))
+    assert _call(jobs.requeue_stale) == 1
+    assert (_get(db, job.id).status, _get(db, job.id).error) == (jobs.FAILED, "Worker lost (no heartbeat)")
+
+
+def test_admin_retry_and_cancel(client, admin, student, db):
+    _, headers = admin
+    job = _enqueue(db, max_attempts=1)
+    _claim("w1")
+    _call(jobs.fail, job.id, "w1", "boom")
+
+    url = f"/api/v1/admin/jobs/{job.id}"
+    assert client.post(f"{url}/retry", headers=student[1]).status_code == 403
+    assert client.post(f"{url}/cancel", headers=headers).status_code == 409
+    retried = client.post(f"{url}/retry", headers=headers).json()
+    assert (retried["status"], retried["attempts"]) == (jobs.QUEUED, 0)
+    assert client.get("/api/v1/admin/jobs/stats", headers=headers).json()["counts"] == {"archive.run": {jobs.QUEUED: 1}}
+    assert client.post(f"{url}/cancel", headers=headers).json()["status"] == jobs.CANCELLED
+    assert client.post(f"{url}/cancel", headers=headers).status_code == 409
+
+
+def test_unknown_job_kind_is_rejected(client, admin):
+    response = client.post("/api/v1/admin/jobs", json={"kind": "no.such.task"}, headers=admin[1])
+    assert response.status_code == 422
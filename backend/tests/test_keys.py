@@ -0,0 +1,117 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from jose import JWTError
+
+from app.core.keys import KeyManager, SigningKey, generate
+
+SECRET = "test-secret"
+
+
+@pytest.fixture(scope="module")
+def key_files(tmp_path_factory):
+    """Два закрытых ключа (ES256, RS256) и открытая часть первого"""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.serialization import load_pem_private_key
+
+    directory = tmp_path_factory.mktemp("keys")
+    paths = {}
+    for name, algorithm in (("ec", "ES256"), ("rsa", "RS256")):
+        pem = generate(algorithm)
+        paths[name] = directory / f"{name}.pem"
+        paths[name].write_bytes(pem)
+    public = load_pem_private_key(paths["ec"].read_bytes(), password=None).public_key()
+    paths["ec_public"] = directory / "ec.pub.pem"
+    paths["ec_public"].write_bytes(
+        public.public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+    )
+    return {name: str(path) for name, path in paths.items()}
+
+
+def _manager(*paths, legacy_hs256=False, legacy_until=None) -> KeyManager:
+    return KeyManager(list(paths), SECRET, "HS256", legacy_hs256, legacy_until)
+
+
+def _claims() -> dict:
+    return {"sub": "u", "exp": datetime.utcnow() + timedelta(minutes=5)}
+
+
+def test_shared_secret_without_keys():
+    manager = _manager()
+    token = manager.encode(_claims())
+    assert manager.decode(token)["sub"] == "u"
+    assert json.loads(manager.jwks()) == {"keys": []}
+
+
+def test_signing_key_and_jwks(key_files):
+    from jose import jwt
+
+    manager = _manager(key_files["ec"], key_files["rsa"])
+    token = manager.encode(_claims())
+    kid = jwt.get_unverified_header(token)["kid"]
+    assert kid == SigningKey(open(key_files["ec"], "rb").read()).kid
+    assert manager.decode(token)["sub"] == "u"
+    jwks = json.loads(manager.jwks())["keys"]
+    assert [(key["kid"], key["alg"]) for key in jwks][0] == (kid, "ES256")
+    assert {key["alg"] for key in jwks} == {"ES256", "RS256"}
+    assert all("d" not in key for key in jwks)
+
+
+def test_kid_does_not_depend_on_the_private_part(key_files):
+    private = SigningKey(open(key_files["ec"], "rb").read())
+    public = SigningKey(open(key_files["ec_public"], "rb").read())
+    assert private.kid == public.kid
+    assert private.can_sign and not public.can_sign
+
+
+def test_rotation(key_files):
+    old = _manager(key_files["ec"])
+    token = old.encode(_claims())
+    # Шаг 2: новый ключ первым, старый еще принимается
+    rotated = _manager(key_files["rsa"], key_files["ec"])
+    assert rotated.decode(token)["sub"] == "u"
+    assert rotated.decode(rotated.encode(_claims()))["sub"] == "u"
+    # Шаг 3: старый ключ убран
+    with pytest.raises(JWTError):
+        _manager(key_files["rsa"]).decode(token)
+
+
+def test_public_key_only_cannot_sign(key_files):
+    with pytest.raises(ValueError):
+        _manager(key_files["ec_public"])
+    verifier = _manager(key_files["rsa"], key_files["ec_public"])
+    assert verifier.decode(_manager(key_files["ec"]).encode(_claims()))["sub"] == "u"
+
+
+def test_legacy_hs256_tokens_are_rejected_by_default(key_files):
+    legacy_token = _manager().encode(_claims())
+    with pytest.raises(JWTError):
+        _manager(key_files["ec"]).decode(legacy_token)
+    assert _manager(key_files["ec"], legacy_hs256=True).decode(legacy_token)["sub"] == "u"
+
+
+def test_legacy_window_closes_at_the_cutoff(key_files):
+    legacy_token = _manager().encode(_claims())
+    open_window = _manager(key_files["ec"], legacy_until=datetime.utcnow() + timedelta(hours=1))
+    assert open_window.decode(legacy_token)["sub"] == "u"
+    closed = _manager(key_files["ec"], legacy_until=datetime.utcnow() - timedelta(seconds=1))
+    with pytest.raises(JWTError):
+        closed.decode(legacy_token)
+
+
+def test_forged_hs256_token_with_public_kid_is_rejected(key_files):
+    from jose import jwt
+
+    manager = _manager(key_files["rsa"])
+    kid = json.loads(manager.jwks())["keys"][0]["kid"]
+    # Алгоритм задает ключ: HS256 с открытым ключом в качестве секрета не проходит
+    forged = jwt.encode(_claims(), "forged", algorithm="HS256", headers={"kid": kid})
+    with pytest.raises(JWTError):
+        manager.decode(forged)
+
+
+def test_jwks_endpoint_is_public(client):
+    response = client.get("/.well-known/jwks.json")
+    assert response.status_code == 200
+    assert "keys" in response.json()
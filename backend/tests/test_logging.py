@@ -0,0 +1,74 @@
+import json
+import logging
+import sys
+
+from app.core.logging import (
+    JsonFormatter,
+    RequestIdFilter,
+    RouteSamplingFilter,
+    _AsyncQueueHandler,
+    parse_route_rates,
+    request_id_var,
+)
+from app.middleware.logging import REQUEST_ID_HEADER
+
+
+def _record(level=logging.INFO, msg="hello %s", args=("world",), **extra) -> logging.LogRecord:
+    record = logging.LogRecord("app.test", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_extra_fields():
+    record = _record(route="/api/v1/tests/{test_id}", status=200, request_id=None)
+    record.exc_text = "Traceback..."
+    payload = json.loads(JsonFormatter().format(record))
+    assert payload["message"] == "hello world"
+    assert (payload["level"], payload["logger"]) == ("INFO", "app.test")
+    assert (payload["route"], payload["status"]) == ("/api/v1/tests/{test_id}", 200)
+    assert payload["exc_info"] == "Traceback..."
+    assert "request_id" not in payload  # пустые поля не пишутся
+
+
+def test_request_id_filter_uses_the_context():
+    token = request_id_var.set("abc")
+    try:
+        record = _record()
+        RequestIdFilter().filter(record)
+    finally:
+        request_id_var.reset(token)
+    assert record.request_id == "abc"
+
+
+def test_route_sampling_keeps_warnings_and_unrouted_records():
+    sampling = RouteSamplingFilter(0.0, parse_route_rates("/api/v1/tests/{test_id}=1, /health=0,broken"))
+    assert sampling.route_rates == {"/api/v1/tests/{test_id}": 1.0, "/health": 0.0}
+    assert sampling.filter(_record(route="/api/v1/tests/{test_id}"))
+    assert not sampling.filter(_record(route="/health"))
+    assert not sampling.filter(_record(route="/other"))  # ставка по умолчанию
+    assert sampling.filter(_record(logging.WARNING, route="/health"))
+    assert sampling.filter(_record())
+
+
+def test_queue_handler_renders_the_message_in_the_caller_thread():
+    values = ["before"]
+    record = _record(msg="%s", args=(values,))
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        record.exc_info = sys.exc_info()
+    prepared = _AsyncQueueHandler(None).prepare(record)
+    values[0] = "after"
+    assert (prepared.msg, prepared.args) == ("['before']", None)
+    assert prepared.exc_info is None and "RuntimeError: boom" in prepared.exc_text
+
+
+def test_request_id_is_propagated_and_generated(client, caplog):
+    caplog.set_level(logging.INFO, logger="app.middleware.logging")
+    response = client.get("/health/live", headers={REQUEST_ID_HEADER: "req-1"})
+    assert response.headers[REQUEST_ID_HEADER] == "req-1"
+    generated = client.get("/health/live").headers[REQUEST_ID_HEADER]
+    assert len(generated) == 32 and generated != "req-1"
+
+    (record, *_) = [record for record in caplog.records if getattr(record, "route", None) == "/health/live"]
+    assert (record.method, record.status) == ("GET", 200)
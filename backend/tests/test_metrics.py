@@ -0,0 +1,55 @@
+import pytest
+
+from app.core import metrics
+from app.core.metrics import Counter, Histogram, Registry
+from tests.helpers import start
+
+
+def _sample(text: str, prefix: str) -> float:
+    """Значение строки экспозиции, начинающейся с prefix"""
+    (line,) = [line for line in text.splitlines() if line.startswith(prefix + " ")]
+    return float(line.rsplit(" ", 1)[1])
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    histogram = registry.register(Histogram("latency_seconds", "Задержка", ("route",), buckets=(0.1, 1.0)))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, route="/x")
+    text = registry.render()
+    assert "# TYPE latency_seconds histogram" in text
+    assert _sample(text, 'latency_seconds_bucket{route="/x",le="0.1"}') == 1
+    assert _sample(text, 'latency_seconds_bucket{route="/x",le="1"}') == 3
+    assert _sample(text, 'latency_seconds_bucket{route="/x",le="+Inf"}') == 4
+    assert _sample(text, 'latency_seconds_count{route="/x"}') == 4
+    assert _sample(text, 'latency_seconds_sum{route="/x"}') == 6.05
+
+
+def test_counter_labels_are_checked_and_escaped():
+    registry = Registry()
+    counter = registry.register(Counter("events_total", "События", ("kind",)))
+    counter.inc(kind='a"b\n')
+    counter.inc(2, kind='a"b\n')
+    assert _sample(registry.render(), 'events_total{kind="a\\"b\\n"}') == 3
+    with pytest.raises(ValueError):
+        counter.inc(other="x")
+
+
+def test_metrics_endpoint_labels_by_route_template(client, student, make_test):
+    _, headers = student
+    test_id, _ = make_test()
+    started = metrics.ATTEMPTS_STARTED.value()
+    assert client.get(f"/api/v1/tests/{test_id}", headers=headers).status_code == 200
+    start(client, headers, test_id)
+    client.get("/no/such/path", headers=headers)
+
+    response = client.get("/metrics")
+    assert response.headers["content-type"] == metrics.CONTENT_TYPE
+    text = response.text
+    # UUID из пути в метки не попадает: кардинальность ограничена числом маршрутов
+    assert str(test_id) not in text
+    assert 'route="/api/v1/tests/{test_id}",status="200"' in text
+    assert 'route="/api/v1/tests/{test_id}/start"' in text
+    assert 'route="unmatched",status="404"' in text
+    assert _sample(text, "attempts_started_total") == started + 1
+    assert _sample(text, 'db_queries_per_request_count{route="/api/v1/tests/{test_id}/start"}') >= 1
@@ -0,0 +1,74 @@
+import copy
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from app.db import models
+from app.db.session import SessionLocal
+from app.services.monitoring import MonitorState, attempt_event, load_snapshot
+from tests.helpers import make_payload, start
+
+
+def _state(test_id) -> MonitorState:
+    with SessionLocal() as db:
+        return MonitorState(load_snapshot(db, test_id))
+
+
+def _rows(state: MonitorState):
+    return {row["attempt_id"]: row for row in state.snapshot()["attempts"]}
+
+
+def test_limits_follow_each_attempts_version(client, make_user, make_test, admin):
+    _, early = make_user()
+    _, late = make_user()
+    payload = make_payload(duration=30, pause_budget_seconds=60)
+    test_id, _ = make_test(**payload)
+    first = start(client, early, test_id)
+
+    # Версия 2: час на тест и четвертый вопрос
+    changed = copy.deepcopy(payload)
+    changed["duration"] = 60
+    changed["questions"].append(dict(changed["questions"][0], question_text="Дополнительный вопрос?"))
+    assert client.put(f"/api/v1/tests/{test_id}", json=changed, headers=admin[1]).status_code == 200
+    second = start(client, late, test_id)
+
+    state = _state(test_id)
+    rows = _rows(state)
+    assert (rows[first["id"]]["questions"], rows[second["id"]]["questions"]) == (3, 4)
+    assert 29 * 60 < rows[first["id"]]["time_left_seconds"] <= 30 * 60
+    assert 59 * 60 < rows[second["id"]]["time_left_seconds"] <= 60 * 60
+    assert (state.snapshot()["duration_minutes"], state.snapshot()["questions"]) == (60, 4)
+
+
+def test_pause_budget_comes_from_the_version(client, student, make_test):
+    _, headers = student
+    test_id, _ = make_test(duration=30, pause_budget_seconds=60)
+    attempt = start(client, headers, test_id)
+    state = _state(test_id)
+    row = state.attempts[attempt["id"]]
+    # Пауза 10 минут: в срок не идет только бюджет версии (60 с)
+    now = datetime.utcnow()
+    row.update(status="paused", paused_at=(now - timedelta(minutes=10)).isoformat(),
+               started_at=(now - timedelta(minutes=10)).isoformat())
+    assert 20 * 60 + 50 < _rows(state)[attempt["id"]]["time_left_seconds"] <= 21 * 60
+
+
+def test_attempt_on_unknown_version_triggers_reload(client, student, make_test, admin):
+    _, headers = student
+    payload = make_payload()
+    test_id, _ = make_test(**payload)
+    state = _state(test_id)
+    assert state.attempts == {}
+
+    changed = copy.deepcopy(payload)
+    changed["duration"] = 45
+    client.put(f"/api/v1/tests/{test_id}", json=changed, headers=admin[1])
+    attempt = start(client, headers, test_id)
+    with SessionLocal() as db:
+        event = attempt_event(db.get(models.TestAttempt, UUID(attempt["id"])))
+    state.apply(event)
+    assert state.needs_reload
+
+    reloaded = _state(test_id)
+    reloaded.apply(event)
+    assert not reloaded.needs_reload
+    assert 44 * 60 < _rows(reloaded)[attempt["id"]]["time_left_seconds"] <= 45 * 60
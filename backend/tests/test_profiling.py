@@ -0,0 +1,61 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from app.core.config import settings
+from app.core.profiling import SqlCapture, write_report
+from app.middleware.logging import REQUEST_ID_HEADER
+from app.middleware.profiling import PROFILE_HEADER
+
+
+@pytest.fixture
+def profiles(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _reports(directory: Path):
+    return [json.loads(path.read_text()) for path in sorted(directory.glob("*.json"))]
+
+
+def test_forced_profile_is_admin_only(client, admin, student, profiles):
+    url = "/api/v1/attempts/history"
+    assert client.get(url, headers={**student[1], PROFILE_HEADER: "1"}).status_code == 200
+    assert _reports(profiles) == []
+
+    response = client.get(url, headers={**admin[1], PROFILE_HEADER: "1", REQUEST_ID_HEADER: "../../etc"})
+    assert response.status_code == 200
+    (report,) = _reports(profiles)
+    assert (report["route"], report["status"], report["forced"]) == ("/api/v1/attempts/history", 200, True)
+    assert report["request_id"] == "../../etc"
+    assert report["user_id"] == str(admin[0].id)
+    assert report["sql"]["count"] == len(report["sql"]["statements"]) >= 1
+    assert report["profile"]["interval_ms"] == settings.PROFILING_SAMPLE_INTERVAL_MS
+    # Имя файла - только из безопасных символов request_id
+    assert [path.name.endswith("-etc.json") for path in profiles.iterdir()] == [True]
+
+
+def test_slow_requests_are_reported(client, student, profiles, monkeypatch):
+    assert client.get("/api/v1/auth/me", headers=student[1]).status_code == 200
+    assert _reports(profiles) == []
+    monkeypatch.setattr(settings, "PROFILING_SLOW_REQUEST_MS", 0)
+    client.get("/api/v1/auth/me", headers=student[1])
+    (report,) = _reports(profiles)
+    assert (report["route"], report["forced"], report["profile"]) == ("/api/v1/auth/me", False, None)
+
+
+def test_reports_are_rotated(profiles, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_MAX_FILES", 2)
+    for number in range(4):
+        write_report({"request_id": f"r{number}"})
+    assert len(list(profiles.glob("*.json"))) == 2
+
+
+def test_sql_capture_is_bounded(monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_MAX_STATEMENTS", 2)
+    capture = SqlCapture()
+    for _ in range(5):
+        capture.add("SELECT 1", 0.0012)
+    assert (len(capture.statements), capture.dropped) == (2, 3)
+    assert capture.statements[0] == {"statement": "SELECT 1", "duration_ms": 1.2}
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from app.core.auth import create_token_pair
+from app.core.revocation import BloomFilter, Denylist, denylist, revoke, sync_denylist
+from app.db.session import SessionLocal
+
+
+def _refresh(client, refresh_token):
+    return client.post("/api/v1/auth/refresh", json={"refresh_token": refresh_token})
+
+
+def _me(client, access_token):
+    return client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {access_token}"})
+
+
+def test_refresh_rotates_the_pair(client, student):
+    user, _ = student
+    first = create_token_pair(user)
+    second = _refresh(client, first["refresh_token"])
+    assert second.status_code == 200
+    second = second.json()
+    assert second["refresh_token"] != first["refresh_token"]
+    assert _me(client, second["access_token"]).status_code == 200
+    assert _refresh(client, second["refresh_token"]).status_code == 200
+
+
+def test_refresh_reuse_revokes_the_family(client, student):
+    user, _ = student
+    first = create_token_pair(user)
+    second = _refresh(client, first["refresh_token"]).json()
+
+    # Старый refresh-токен предъявлен повторно: утечка, отзывается вся сессия
+    reused = _refresh(client, first["refresh_token"])
+    assert reused.status_code == 401
+    assert _me(client, first["access_token"]).status_code == 401
+    assert _me(client, second["access_token"]).status_code == 401
+    assert _refresh(client, second["refresh_token"]).status_code == 401
+
+    # Другие сессии пользователя не затронуты
+    other = create_token_pair(user)
+    assert _me(client, other["access_token"]).status_code == 200
+
+
+def test_logout_revokes_access_and_refresh(client, student):
+    user, _ = student
+    pair = create_token_pair(user)
+    headers = {"Authorization": f"Bearer {pair['access_token']}"}
+    assert client.post("/api/v1/auth/logout", headers=headers).status_code == 204
+    assert _me(client, pair["access_token"]).status_code == 401
+    assert _refresh(client, pair["refresh_token"]).status_code == 401
+
+
+def test_revocation_reaches_the_denylist_only_on_commit():
+    committed, rolled_back = uuid4().hex, uuid4().hex
+    expires_at = datetime.utcnow() + timedelta(hours=1)
+    with SessionLocal() as db:
+        assert revoke(db, rolled_back, expires_at) is True
+        db.rollback()
+        assert revoke(db, committed, expires_at) is True
+        assert not denylist.is_revoked(committed)
+        db.commit()
+    assert denylist.is_revoked(committed)
+    assert not denylist.is_revoked(rolled_back)
+    with SessionLocal() as db:
+        assert revoke(db, committed, expires_at) is False
+        db.commit()
+
+
+def test_full_sync_drops_expired_entries():
+    live, expired = uuid4().hex, uuid4().hex
+    with SessionLocal() as db:
+        revoke(db, live, datetime.utcnow() + timedelta(hours=1))
+        revoke(db, expired, datetime.utcnow() - timedelta(seconds=1))
+        db.commit()
+    sync_denylist(full=True)
+    assert denylist.is_revoked(live)
+    assert not denylist.is_revoked(expired)
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, 0.01)
+    keys = [uuid4().hex for _ in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+    false_positives = sum(uuid4().hex in bloom for _ in range(10000))
+    assert false_positives < 300
+
+
+def test_overflowing_denylist_errs_on_the_safe_side():
+    exact = Denylist(capacity=100, error_rate=0.01, exact_max=1)
+    expires_at = datetime.utcnow() + timedelta(hours=1)
+    exact.add("a", expires_at)
+    assert exact.is_revoked("a") and not exact.is_revoked("b")
+    # Точное множество переполнено: положительный ответ фильтра считается отзывом
+    exact.add("b", expires_at)
+    assert exact.is_revoked("b")
+    assert exact.is_revoked(None, "a")
@@ -0,0 +1,71 @@
+import json
+from datetime import datetime
+from uuid import uuid4
+
+from app.core import cache as cache_module
+from app.core.cache import TTLCache, test_payload_cache
+from app.core.metrics import CACHE_REQUESTS
+from app.core.serialization import FastJSONResponse, dump_model, dump_test
+from app.db import models
+from app.schemas import test as schemas
+
+
+def test_dump_model_matches_pydantic(db, make_test):
+    test_id, _ = make_test()
+    test = db.get(models.Test, test_id)
+    expected = schemas.TestCreate.model_validate(test, from_attributes=True).model_dump(mode="json")
+    assert json.loads(dump_test(test)) == expected
+    assert json.loads(dump_model(schemas.TestCreate, test)) == expected
+
+
+def test_fast_json_response_handles_uuid_datetime_and_int_keys():
+    key = uuid4()
+    body = FastJSONResponse({"id": key, "at": datetime(2026, 1, 2, 3, 4, 5), 1: "one"}).body
+    assert json.loads(body) == {"id": str(key), "at": "2026-01-02T03:04:05", "1": "one"}
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    lru = TTLCache("test_lru", maxsize=2, ttl=None)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1  # "a" теперь свежее "b"
+    lru.set("c", 3)
+    assert (lru.get("a"), lru.get("b"), lru.get("c")) == (1, None, 3)
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    ttl = TTLCache("test_ttl", maxsize=10, ttl=30)
+    ttl.set("a", 1)
+    misses = CACHE_REQUESTS.value(cache="test_ttl", result="miss")
+    now[0] += 29
+    assert ttl.get("a") == 1
+    now[0] += 2
+    assert ttl.get("a", "gone") == "gone"
+    assert len(ttl) == 0
+    assert CACHE_REQUESTS.value(cache="test_ttl", result="miss") == misses + 1
+
+
+def test_test_body_is_cached_until_update(client, admin, make_test):
+    _, headers = admin
+    test_id, _ = make_test()
+    test_payload_cache.invalidate(test_id)
+    url = f"/api/v1/tests/{test_id}"
+    hits = CACHE_REQUESTS.value(cache="test_payload", result="hit")
+
+    first = client.get(url, headers=headers)
+    assert client.get(url, headers=headers).content == first.content
+    assert CACHE_REQUESTS.value(cache="test_payload", result="hit") == hits + 1
+
+    body = {**first.json(), "title": f"Обновлен {uuid4().hex[:6]}"}
+    assert client.put(url, json=body, headers=headers).status_code == 200
+    assert test_payload_cache.get(test_id) is None
+    assert client.get(url, headers=headers).json()["title"] == body["title"]
+
+
+def test_list_endpoint_uses_the_same_schema(client, student, make_test):
+    make_test()
+    tests = client.get("/api/v1/tests", params={"limit": 3}, headers=student[1]).json()
+    assert 1 <= len(tests) <= 3
+    assert all(schemas.TestCreate.model_validate(test) for test in tests)
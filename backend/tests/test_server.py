@@ -0,0 +1,31 @@
+import pytest
+
+from app import server
+from app.core.config import settings
+
+
+@pytest.mark.parametrize("cpus, expected", [(1, 2), (4, 8), (64, 12)])
+def test_worker_count_from_cpus(monkeypatch, cpus, expected):
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 0)
+    monkeypatch.setattr(settings, "WORKERS_PER_CORE", 2)
+    monkeypatch.setattr(settings, "MAX_WORKERS", 12)
+    monkeypatch.setattr(server.os, "cpu_count", lambda: cpus)
+    assert server.worker_count() == expected
+
+
+def test_web_concurrency_overrides_the_cpu_count(monkeypatch):
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 3)
+    monkeypatch.setattr(server.os, "cpu_count", lambda: 64)
+    assert server.worker_count() == 3
+
+
+def test_gunicorn_config_accepts_the_options():
+    application = server.Server("app.main:app", server.gunicorn_options())
+    cfg = application.cfg
+    assert cfg.worker_class_str == "uvicorn.workers.UvicornWorker"
+    assert cfg.preload_app is True
+    assert (cfg.graceful_timeout, cfg.max_requests) == (settings.GRACEFUL_TIMEOUT, settings.WORKER_MAX_REQUESTS)
+    assert cfg.bind == [f"{settings.HOST}:{settings.PORT}"]
+    assert cfg.post_fork is server.post_fork
+    # access-лог пишет LoggingMiddleware
+    assert cfg.accesslog is None
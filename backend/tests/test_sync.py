@@ -0,0 +1,80 @@
+from tests.helpers import start
+
+
+def _sync(client, headers, attempt_id, seq, answers):
+    return client.post(
+        f"/api/v1/attempts/{attempt_id}/sync",
+        json={"seq": seq, "answers": [
+            {"question_id": str(question_id), "selected_options": selected} for question_id, selected in answers
+        ]},
+        headers=headers,
+    )
+
+
+def _state(client, headers, attempt_id):
+    response = client.get(f"/api/v1/attempts/{attempt_id}/sync", headers=headers)
+    assert response.status_code == 200
+    state = response.json()
+    return state["ack_seq"], {row["question_id"]: row["selected_options"] for row in state["answers"]}
+
+
+def test_packets_are_acknowledged_in_order(client, student, make_test):
+    _, headers = student
+    test_id, (single, multiple, _) = make_test()
+    attempt = start(client, headers, test_id)["id"]
+
+    assert _sync(client, headers, attempt, 1, [(single, [0])]).json() == {"ack_seq": 1, "applied": 1}
+    assert _sync(client, headers, attempt, 2, [(single, [1]), (multiple, [0, 2])]).json() == {
+        "ack_seq": 2, "applied": 2,
+    }
+    assert _state(client, headers, attempt) == (2, {str(single): [1], str(multiple): [0, 2]})
+
+
+def test_retried_and_late_packets_change_nothing(client, student, make_test):
+    _, headers = student
+    test_id, (single, *_) = make_test()
+    attempt = start(client, headers, test_id)["id"]
+    _sync(client, headers, attempt, 1, [(single, [0])])
+    _sync(client, headers, attempt, 2, [(single, [1])])
+
+    # Повтор пакета 2 и опоздавший пакет 1 только подтверждаются
+    assert _sync(client, headers, attempt, 2, [(single, [2])]).json() == {"ack_seq": 2, "applied": 0}
+    assert _sync(client, headers, attempt, 1, [(single, [0])]).json() == {"ack_seq": 2, "applied": 0}
+    assert _state(client, headers, attempt) == (2, {str(single): [1]})
+
+
+def test_unchanged_answers_are_not_rewritten(client, student, make_test):
+    _, headers = student
+    test_id, (single, *_) = make_test()
+    attempt = start(client, headers, test_id)["id"]
+    _sync(client, headers, attempt, 1, [(single, [1])])
+    assert _sync(client, headers, attempt, 2, [(single, [1])]).json() == {"ack_seq": 2, "applied": 0}
+
+
+def test_last_answer_in_packet_wins(client, student, make_test):
+    _, headers = student
+    test_id, (single, *_) = make_test()
+    attempt = start(client, headers, test_id)["id"]
+    assert _sync(client, headers, attempt, 1, [(single, [0]), (single, [2])]).json()["applied"] == 1
+    assert _state(client, headers, attempt)[1] == {str(single): [2]}
+
+
+def test_sync_is_rejected_after_finish(client, student, make_test):
+    _, headers = student
+    test_id, (single, *_) = make_test()
+    attempt = start(client, headers, test_id)["id"]
+    _sync(client, headers, attempt, 1, [(single, [1])])
+    client.post(f"/api/v1/attempts/{attempt}/finish", headers=headers)
+    assert _sync(client, headers, attempt, 2, [(single, [0])]).status_code == 409
+    # Опоздавший повтор уже принятого пакета по-прежнему подтверждается
+    assert _sync(client, headers, attempt, 1, [(single, [1])]).json() == {"ack_seq": 1, "applied": 0}
+
+
+def test_question_from_another_test_is_rejected(client, student, make_test):
+    _, headers = student
+    test_id, _ = make_test()
+    _, (foreign, *_) = make_test()
+    attempt = start(client, headers, test_id)["id"]
+    response = _sync(client, headers, attempt, 1, [(foreign, [0])])
+    assert response.status_code in (400, 404, 422)
+    assert _state(client, headers, attempt) == (0, {})
@@ -0,0 +1,69 @@
+import copy
+from uuid import UUID
+
+from sqlalchemy import select
+
+from app.db.models import Question
+from tests.helpers import answer, make_payload, start
+
+
+def _questions(db, attempt):
+    return db.scalars(
+        select(Question.id).where(Question.version_id == UUID(attempt["test_version_id"])).order_by(Question.order_index)
+    ).all()
+
+
+def _versions(client, headers, test_id):
+    response = client.get(f"/api/v1/tests/{test_id}/versions", headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_started_attempt_keeps_its_version(client, make_user, make_test, admin, db):
+    _, early = make_user()
+    _, late = make_user()
+    payload = make_payload()
+    test_id, _ = make_test(**payload)
+    first = start(client, early, test_id)
+    first_questions = _questions(db, first)
+
+    # Меняем верный ответ: начатая попытка проверяется по версии 1
+    changed = copy.deepcopy(payload)
+    changed["questions"][0]["correct_answers"] = [2]
+    assert client.put(f"/api/v1/tests/{test_id}", json=changed, headers=admin[1]).status_code == 200
+
+    assert answer(client, early, first["id"], first_questions[0], [1]).json()["is_correct"] is True
+    second = start(client, late, test_id)
+    assert second["test_version_id"] != first["test_version_id"]
+    second_questions = _questions(db, second)
+    assert set(second_questions).isdisjoint(first_questions)
+    assert answer(client, late, second["id"], second_questions[0], [1]).json()["is_correct"] is False
+    assert answer(client, late, second["id"], second_questions[0], [2]).json()["is_correct"] is True
+
+    versions = _versions(client, late, test_id)
+    assert sorted((v["version"], v["is_current"]) for v in versions) == [(1, False), (2, True)]
+
+
+def test_unchanged_update_does_not_publish(client, make_test, admin):
+    payload = make_payload()
+    test_id, _ = make_test(**payload)
+    assert client.put(f"/api/v1/tests/{test_id}", json=payload, headers=admin[1]).status_code == 200
+    assert [v["version"] for v in _versions(client, admin[1], test_id)] == [1]
+
+
+def test_version_snapshot_is_cacheable(client, student, make_test):
+    _, headers = student
+    test_id, _ = make_test()
+    (version,) = _versions(client, headers, test_id)
+    url = f"/api/v1/tests/{test_id}/versions/{version['id']}"
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert "immutable" in response.headers["Cache-Control"]
+
+    cached = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+
+    foreign, _ = make_test()
+    assert client.get(f"/api/v1/tests/{foreign}/versions/{version['id']}", headers=headers).status_code == 404